@@ -0,0 +1,723 @@
+"""
+Ensamblador RV32IMF para la salida de compiler.py.
+
+Convierte el texto ensamblador que genera CodeGenerator en código máquina
+(formatos R/I/S/B/U/J, R4 y la extensión F) sobre un bytearray, resuelve
+las etiquetas en dos pasadas y escribe un objeto ELF32 reubicable, listo
+para enlazar con la biblioteca matemática, sin un ensamblador externo.
+
+Uso: python assembler.py <programa.s> [objeto.o]
+"""
+
+import re
+import struct
+import sys
+
+# Registros enteros y de punto flotante por nombre ABI
+INT_REGISTERS = ['zero', 'ra', 'sp', 'gp', 'tp', 't0', 't1', 't2', 's0', 's1',
+                 'a0', 'a1', 'a2', 'a3', 'a4', 'a5', 'a6', 'a7',
+                 's2', 's3', 's4', 's5', 's6', 's7', 's8', 's9', 's10', 's11',
+                 't3', 't4', 't5', 't6']
+FLOAT_REGISTERS = ['ft0', 'ft1', 'ft2', 'ft3', 'ft4', 'ft5', 'ft6', 'ft7', 'fs0', 'fs1',
+                   'fa0', 'fa1', 'fa2', 'fa3', 'fa4', 'fa5', 'fa6', 'fa7',
+                   'fs2', 'fs3', 'fs4', 'fs5', 'fs6', 'fs7', 'fs8', 'fs9', 'fs10', 'fs11',
+                   'ft8', 'ft9', 'ft10', 'ft11']
+INT_INDEX = {name: index for index, name in enumerate(INT_REGISTERS)}
+INT_INDEX.update({f'x{index}': index for index in range(32)})
+INT_INDEX['fp'] = 8
+FLOAT_INDEX = {name: index for index, name in enumerate(FLOAT_REGISTERS)}
+FLOAT_INDEX.update({f'f{index}': index for index in range(32)})
+
+# Formato R: mnemónico -> (funct3, funct7); opcode OP
+R_TYPE = {
+    'add': (0, 0x00), 'sub': (0, 0x20), 'sll': (1, 0x00), 'slt': (2, 0x00),
+    'sltu': (3, 0x00), 'xor': (4, 0x00), 'srl': (5, 0x00), 'sra': (5, 0x20),
+    'or': (6, 0x00), 'and': (7, 0x00),
+    # Extensión M
+    'mul': (0, 0x01), 'mulh': (1, 0x01), 'mulhsu': (2, 0x01), 'mulhu': (3, 0x01),
+    'div': (4, 0x01), 'divu': (5, 0x01), 'rem': (6, 0x01), 'remu': (7, 0x01),
+}
+# Formato I aritmético: mnemónico -> funct3; opcode OP-IMM
+I_TYPE = {'addi': 0, 'slti': 2, 'sltiu': 3, 'xori': 4, 'ori': 6, 'andi': 7}
+# Desplazamientos con inmediato: mnemónico -> (funct3, funct7)
+SHIFT_TYPE = {'slli': (1, 0x00), 'srli': (5, 0x00), 'srai': (5, 0x20)}
+# Cargas y almacenamientos: mnemónico -> (opcode, funct3, registro flotante)
+LOADS = {'lb': (0x03, 0, False), 'lh': (0x03, 1, False), 'lw': (0x03, 2, False),
+         'lbu': (0x03, 4, False), 'lhu': (0x03, 5, False), 'flw': (0x07, 2, True)}
+STORES = {'sb': (0x23, 0, False), 'sh': (0x23, 1, False), 'sw': (0x23, 2, False),
+          'fsw': (0x27, 2, True)}
+# Saltos condicionales: mnemónico -> funct3
+BRANCHES = {'beq': 0, 'bne': 1, 'blt': 4, 'bge': 5, 'bltu': 6, 'bgeu': 7}
+# Extensión F, opcode OP-FP: mnemónico -> (funct7, funct3 o None si lleva
+# modo de redondeo, rs2 fijo o None, clases de rd/rs1/rs2: 'f' o 'x')
+FP_TYPE = {
+    'fadd.s': (0x00, None, None, 'fff'), 'fsub.s': (0x04, None, None, 'fff'),
+    'fmul.s': (0x08, None, None, 'fff'), 'fdiv.s': (0x0C, None, None, 'fff'),
+    'fsqrt.s': (0x2C, None, 0, 'ff'),
+    'fsgnj.s': (0x10, 0, None, 'fff'), 'fsgnjn.s': (0x10, 1, None, 'fff'),
+    'fsgnjx.s': (0x10, 2, None, 'fff'),
+    'fmin.s': (0x14, 0, None, 'fff'), 'fmax.s': (0x14, 1, None, 'fff'),
+    'fcvt.w.s': (0x60, None, 0, 'xf'), 'fcvt.wu.s': (0x60, None, 1, 'xf'),
+    'fmv.x.w': (0x70, 0, 0, 'xf'), 'fclass.s': (0x70, 1, 0, 'xf'),
+    'feq.s': (0x50, 2, None, 'xff'), 'flt.s': (0x50, 1, None, 'xff'),
+    'fle.s': (0x50, 0, None, 'xff'),
+    'fcvt.s.w': (0x68, None, 0, 'fx'), 'fcvt.s.wu': (0x68, None, 1, 'fx'),
+    'fmv.w.x': (0x78, 0, 0, 'fx'),
+}
+# Formato R4 (multiplicación y suma fusionadas): mnemónico -> opcode
+R4_TYPE = {'fmadd.s': 0x43, 'fmsub.s': 0x47, 'fnmsub.s': 0x4B, 'fnmadd.s': 0x4F}
+ROUNDING = {'rne': 0, 'rtz': 1, 'rdn': 2, 'rup': 3, 'rmm': 4, 'dyn': 7}
+ROUNDING_NAMES = {value: name for name, value in ROUNDING.items()}
+
+# Pseudoinstrucciones que son un alias directo
+ALIASES = {
+    'mv': lambda rd, rs: [('addi', [rd, rs, '0'])],
+    'not': lambda rd, rs: [('xori', [rd, rs, '-1'])],
+    'neg': lambda rd, rs: [('sub', [rd, 'zero', rs])],
+    'seqz': lambda rd, rs: [('sltiu', [rd, rs, '1'])],
+    'snez': lambda rd, rs: [('sltu', [rd, 'zero', rs])],
+    'fmv.s': lambda rd, rs: [('fsgnj.s', [rd, rs, rs])],
+    'fneg.s': lambda rd, rs: [('fsgnjn.s', [rd, rs, rs])],
+    'fabs.s': lambda rd, rs: [('fsgnjx.s', [rd, rs, rs])],
+    'fmv.s.x': lambda rd, rs: [('fmv.w.x', [rd, rs])],
+    'fmv.x.s': lambda rd, rs: [('fmv.x.w', [rd, rs])],
+}
+# Saltos condicionales derivados: mnemónico -> (salto base, operandos)
+BRANCH_ALIASES = {
+    'ble': ('bge', lambda a, b: [b, a]), 'bgt': ('blt', lambda a, b: [b, a]),
+    'bleu': ('bgeu', lambda a, b: [b, a]), 'bgtu': ('bltu', lambda a, b: [b, a]),
+    'beqz': ('beq', lambda a: [a, 'zero']), 'bnez': ('bne', lambda a: [a, 'zero']),
+    'blez': ('bge', lambda a: ['zero', a]), 'bgez': ('bge', lambda a: [a, 'zero']),
+    'bltz': ('blt', lambda a: [a, 'zero']), 'bgtz': ('blt', lambda a: ['zero', a]),
+}
+# Salto condicional con la condición contraria, para alargar saltos lejanos
+INVERSE_BRANCH = {'beq': 'bne', 'bne': 'beq', 'blt': 'bge', 'bge': 'blt',
+                  'bltu': 'bgeu', 'bgeu': 'bltu'}
+
+# Tipos de reubicación de RISC-V usados en el objeto
+R_RISCV_CALL_PLT = 19
+R_RISCV_PCREL_HI20 = 23
+R_RISCV_PCREL_LO12_I = 24
+
+MEMORY_OPERAND = re.compile(r'^(-?\w*)\((\w+)\)$')
+LOCAL_REFERENCE = re.compile(r'^(\d+)([fb])$')
+
+
+def assembler_error(message, line=None):
+    """Error de ensamblado con el número de línea del texto de entrada"""
+    return Exception(f"Error de ensamblado: {message}" + (f" en línea {line}" if line else ""))
+
+
+class Instruction:
+    """Instrucción base (sin pseudoinstrucciones) pendiente de codificar"""
+
+    __slots__ = ('mnemonic', 'operands', 'fixup', 'line', 'long')
+
+    def __init__(self, mnemonic, operands, fixup=None, line=None):
+        self.mnemonic = mnemonic
+        self.operands = operands
+        # Operando que es una etiqueta: (tipo, etiqueta) o None
+        self.fixup = fixup
+        self.line = line
+        # Salto condicional alargado a salto contrario + jal
+        self.long = False
+
+    @property
+    def size(self):
+        return 8 if self.long else 4
+
+
+class Assembler:
+    """
+    Ensamblador en dos pasadas. La primera expande las pseudoinstrucciones
+    y calcula la dirección de cada etiqueta, alargando los saltos
+    condicionales que no alcanzan su destino; la segunda codifica cada
+    instrucción en 32 bits. Las referencias a .data y las llamadas a
+    funciones externas quedan como reubicaciones del objeto ELF.
+    """
+
+    def __init__(self):
+        self.text = bytearray()
+        self.data = bytearray()
+        self.symbols = {}      # Etiqueta -> (sección, desplazamiento)
+        self.relocations = []  # (desplazamiento en .text, símbolo, tipo)
+        self.externals = []    # Funciones llamadas que no están definidas
+        self.listing = []      # Texto canónico de cada palabra de .text
+        self.globals = set()
+
+    def assemble(self, source):
+        """Ensambla el texto y llena text, data, symbols y relocations"""
+        instructions, labels = self._parse(source)
+        self._layout(instructions, labels)
+        self._encode(instructions)
+        return self
+
+    # Primera pasada: análisis y expansión
+
+    def _parse(self, source):
+        """Separa las secciones y expande cada instrucción a instrucciones base"""
+        instructions = []
+        labels = {}            # Etiqueta de .text -> índice de instrucción
+        local_counts = {}      # Etiquetas locales (1:, 2:...) definidas
+        section = '.text'
+        for line_number, raw in enumerate(source.split('\n'), 1):
+            line = raw.strip()
+            if section == '.text' and '#' in line:
+                line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            if line in ('.text', '.data'):
+                section = line
+                continue
+            if line.startswith('.globl') or line.startswith('.global'):
+                self.globals.add(line.split()[1])
+                continue
+            if line.startswith('.align') or line.startswith('.section'):
+                continue
+
+            if section == '.data':
+                self._parse_data(line, line_number)
+                continue
+
+            if line.endswith(':'):
+                name = line[:-1].strip()
+                if name.isdigit():
+                    count = local_counts.get(name, 0)
+                    local_counts[name] = count + 1
+                    name = f'{name}@{count}'
+                if name in labels:
+                    raise assembler_error(f"etiqueta '{name}' repetida", line_number)
+                labels[name] = len(instructions)
+                continue
+
+            mnemonic, _, rest = line.partition(' ')
+            operands = [operand.strip() for operand in rest.split(',')] if rest.strip() else []
+            # Referencias locales 1f/1b a la etiqueta siguiente o anterior
+            for position, operand in enumerate(operands):
+                match = LOCAL_REFERENCE.match(operand)
+                if match:
+                    digit, direction = match.groups()
+                    count = local_counts.get(digit, 0)
+                    operands[position] = f'{digit}@{count if direction == "f" else count - 1}'
+            for instruction in self._expand(mnemonic, operands, line_number):
+                instructions.append(instruction)
+        return instructions, labels
+
+    def _parse_data(self, line, line_number):
+        """Agrega una definición de .data: etiqueta: .tipo valor"""
+        label, _, directive = line.partition(':')
+        kind, _, value = directive.strip().partition(' ')
+        if kind in ('.float', '.word'):
+            # Alinear a 4 bytes
+            self.data.extend(b'\0' * (-len(self.data) % 4))
+        self.symbols[label.strip()] = ('.data', len(self.data))
+        if kind == '.float':
+            for item in value.split(','):
+                self.data.extend(struct.pack('<f', float(item)))
+        elif kind == '.word':
+            for item in value.split(','):
+                self.data.extend(struct.pack('<i', int(item, 0)))
+        elif kind in ('.string', '.asciz'):
+            text = value.strip()[1:-1]
+            text = text.replace('\\n', '\n').replace('\\t', '\t').replace('\\"', '"')
+            self.data.extend(text.encode('utf-8') + b'\0')
+        elif kind == '.space':
+            self.data.extend(b'\0' * int(value))
+        else:
+            raise assembler_error(f"directiva no soportada: {kind}", line_number)
+
+    def _expand(self, mnemonic, operands, line):
+        """Expande una instrucción o pseudoinstrucción a instrucciones base"""
+        if mnemonic in ALIASES:
+            return [Instruction(name, ops, line=line) for name, ops in ALIASES[mnemonic](*operands)]
+        if mnemonic in BRANCH_ALIASES:
+            base, order = BRANCH_ALIASES[mnemonic]
+            *registers, label = operands
+            return [Instruction(base, order(*registers) + [label], ('branch', label), line)]
+        if mnemonic in BRANCHES:
+            return [Instruction(mnemonic, operands, ('branch', operands[2]), line)]
+        if mnemonic == 'li':
+            rd, value = operands[0], self._immediate(operands[1], line)
+            if -2048 <= value < 2048:
+                return [Instruction('addi', [rd, 'zero', str(value)], line=line)]
+            value &= 0xFFFFFFFF
+            upper = ((value + 0x800) >> 12) & 0xFFFFF
+            lower = value - (upper << 12)
+            lower = (lower + 0x800) % 0x1000 - 0x800 if lower else 0
+            result = [Instruction('lui', [rd, str(upper)], line=line)]
+            if lower:
+                result.append(Instruction('addi', [rd, rd, str(lower)], line=line))
+            return result
+        if mnemonic == 'la':
+            rd, label = operands
+            return [Instruction('auipc', [rd, '0'], ('pcrel_hi', label), line),
+                    Instruction('addi', [rd, rd, '0'], ('pcrel_lo', label), line)]
+        if mnemonic == 'call':
+            return [Instruction('auipc', ['ra', '0'], ('call', operands[0]), line),
+                    Instruction('jalr', ['ra', '0(ra)'], ('call_lo', operands[0]), line)]
+        if mnemonic == 'j':
+            return [Instruction('jal', ['zero', operands[0]], ('jal', operands[0]), line)]
+        if mnemonic == 'jal' and len(operands) == 1:
+            return [Instruction('jal', ['ra', operands[0]], ('jal', operands[0]), line)]
+        if mnemonic == 'jal':
+            return [Instruction('jal', operands, ('jal', operands[1]), line)]
+        if mnemonic == 'jr':
+            return [Instruction('jalr', ['zero', f'0({operands[0]})'], line=line)]
+        if mnemonic == 'ret':
+            return [Instruction('jalr', ['zero', '0(ra)'], line=line)]
+        if mnemonic == 'nop':
+            return [Instruction('addi', ['zero', 'zero', '0'], line=line)]
+        return [Instruction(mnemonic, operands, line=line)]
+
+    def _layout(self, instructions, labels):
+        """Calcula las direcciones, alargando saltos fuera de alcance hasta que no cambien"""
+        while True:
+            address = 0
+            addresses = []
+            for instruction in instructions:
+                addresses.append(address)
+                address += instruction.size
+            addresses.append(address)
+            for label, index in labels.items():
+                self.symbols[label] = ('.text', addresses[index])
+            changed = False
+            for instruction, address in zip(instructions, addresses):
+                if instruction.fixup and instruction.fixup[0] == 'branch' and not instruction.long:
+                    offset = self._text_address(instruction.fixup[1], instruction.line) - address
+                    if not -4096 <= offset < 4096:
+                        instruction.long = True
+                        changed = True
+            if not changed:
+                return
+
+    def _text_address(self, label, line):
+        """Dirección de una etiqueta de .text"""
+        section, address = self.symbols.get(label, (None, None))
+        if section != '.text':
+            raise assembler_error(f"etiqueta no definida: {label}", line)
+        return address
+
+    # Segunda pasada: codificación
+
+    def _encode(self, instructions):
+        """Codifica cada instrucción y registra las reubicaciones"""
+        text = self.text
+        pending_hi = {}        # Etiqueta de la parte alta de cada la
+        hi_count = 0
+        for instruction in instructions:
+            address = len(text)
+            kind, label = instruction.fixup or (None, None)
+            operands = list(instruction.operands)
+            mnemonic = instruction.mnemonic
+
+            if kind == 'branch':
+                offset = self._text_address(label, instruction.line) - address
+                if instruction.long:
+                    # Salto contrario sobre un jal al destino
+                    self._emit(INVERSE_BRANCH[mnemonic], operands[:2] + ['8'], instruction.line)
+                    self._emit('jal', ['zero', str(offset - 4)], instruction.line)
+                    continue
+                operands[2] = str(offset)
+            elif kind == 'jal':
+                operands[-1] = str(self._text_address(label, instruction.line) - address)
+            elif kind in ('pcrel_hi', 'call'):
+                section, target = self.symbols.get(label, (None, None))
+                if section == '.text':
+                    # Destino en la misma sección: se resuelve aquí mismo
+                    offset = target - address
+                    operands[1] = str(((offset + 0x800) >> 12) & 0xFFFFF)
+                    pending_hi[label] = offset
+                else:
+                    pending_hi[label] = None
+                    if kind == 'call':
+                        if label not in self.externals:
+                            self.externals.append(label)
+                        self.relocations.append((address, label, R_RISCV_CALL_PLT))
+                    elif section == '.data':
+                        hi_label = f'.Lpcrel_hi{hi_count}'
+                        hi_count += 1
+                        self.symbols[hi_label] = ('.text', address)
+                        pending_hi[label] = hi_label
+                        self.relocations.append((address, label, R_RISCV_PCREL_HI20))
+                    else:
+                        raise assembler_error(f"etiqueta no definida: {label}", instruction.line)
+            elif kind in ('pcrel_lo', 'call_lo'):
+                hi = pending_hi.pop(label)
+                if isinstance(hi, int):
+                    lower = (hi + 0x800) % 0x1000 - 0x800
+                    if kind == 'pcrel_lo':
+                        operands[2] = str(lower)
+                    else:
+                        operands[1] = f'{lower}(ra)'
+                elif hi is not None:
+                    self.relocations.append((address, hi, R_RISCV_PCREL_LO12_I))
+            self._emit(mnemonic, operands, instruction.line)
+
+    def _emit(self, mnemonic, operands, line):
+        """Codifica una instrucción base y la agrega a .text"""
+        word, fields = self.encode(mnemonic, operands, line)
+        self.text.extend(struct.pack('<I', word))
+        self.listing.append(format_instruction(mnemonic, fields))
+
+    def encode(self, mnemonic, operands, line=None):
+        """Devuelve la palabra de 32 bits de una instrucción base y sus campos"""
+        try:
+            if mnemonic in R_TYPE:
+                funct3, funct7 = R_TYPE[mnemonic]
+                rd, rs1, rs2 = (self._register(op, line) for op in operands)
+                return r_type(0x33, rd, funct3, rs1, rs2, funct7), (rd, rs1, rs2)
+            if mnemonic in I_TYPE:
+                rd, rs1 = self._register(operands[0], line), self._register(operands[1], line)
+                imm = self._signed(operands[2], 12, line)
+                return i_type(0x13, rd, I_TYPE[mnemonic], rs1, imm), (rd, rs1, imm)
+            if mnemonic in SHIFT_TYPE:
+                funct3, funct7 = SHIFT_TYPE[mnemonic]
+                rd, rs1 = self._register(operands[0], line), self._register(operands[1], line)
+                shamt = self._immediate(operands[2], line)
+                if not 0 <= shamt < 32:
+                    raise assembler_error(f"desplazamiento fuera de rango: {shamt}", line)
+                return i_type(0x13, rd, funct3, rs1, shamt | (funct7 << 5)), (rd, rs1, shamt)
+            if mnemonic in LOADS:
+                opcode, funct3, is_float = LOADS[mnemonic]
+                rd = self._register(operands[0], line, is_float)
+                imm, rs1 = self._memory(operands[1], line)
+                return i_type(opcode, rd, funct3, rs1, imm), (rd, imm, rs1)
+            if mnemonic in STORES:
+                opcode, funct3, is_float = STORES[mnemonic]
+                rs2 = self._register(operands[0], line, is_float)
+                imm, rs1 = self._memory(operands[1], line)
+                return s_type(opcode, funct3, rs1, rs2, imm), (rs2, imm, rs1)
+            if mnemonic in BRANCHES:
+                rs1, rs2 = self._register(operands[0], line), self._register(operands[1], line)
+                offset = self._signed(operands[2], 13, line)
+                return b_type(BRANCHES[mnemonic], rs1, rs2, offset), (rs1, rs2, offset)
+            if mnemonic == 'jal':
+                rd = self._register(operands[0], line)
+                offset = self._signed(operands[1], 21, line)
+                return j_type(rd, offset), (rd, offset)
+            if mnemonic == 'jalr':
+                rd = self._register(operands[0], line)
+                imm, rs1 = self._memory(operands[1], line)
+                return i_type(0x67, rd, 0, rs1, imm), (rd, imm, rs1)
+            if mnemonic in ('lui', 'auipc'):
+                rd = self._register(operands[0], line)
+                imm = self._immediate(operands[1], line)
+                if not 0 <= imm < (1 << 20):
+                    raise assembler_error(f"inmediato fuera de rango: {imm}", line)
+                return (imm << 12) | (rd << 7) | (0x37 if mnemonic == 'lui' else 0x17), (rd, imm)
+            if mnemonic == 'ecall':
+                return 0x00000073, ()
+            if mnemonic == 'ebreak':
+                return 0x00100073, ()
+            if mnemonic in FP_TYPE:
+                funct7, funct3, fixed_rs2, classes = FP_TYPE[mnemonic]
+                count = len(classes)
+                registers = [self._register(op, line, kind == 'f')
+                             for op, kind in zip(operands[:count], classes)]
+                rm = None
+                if funct3 is None:
+                    rm = ROUNDING['dyn']
+                    if len(operands) > count:
+                        rm = self._rounding(operands[count], line)
+                rs2 = registers[2] if fixed_rs2 is None else fixed_rs2
+                word = r_type(0x53, registers[0], funct3 if rm is None else rm,
+                              registers[1], rs2, funct7)
+                return word, tuple(registers) + ((rm,) if rm is not None else ())
+            if mnemonic in R4_TYPE:
+                registers = [self._register(op, line, True) for op in operands[:4]]
+                rm = self._rounding(operands[4], line) if len(operands) > 4 else ROUNDING['dyn']
+                rd, rs1, rs2, rs3 = registers
+                word = ((rs3 << 27) | (rs2 << 20) | (rs1 << 15) | (rm << 12) | (rd << 7)
+                        | R4_TYPE[mnemonic])
+                return word, (rd, rs1, rs2, rs3, rm)
+        except (IndexError, ValueError):
+            raise assembler_error(f"operandos inválidos: {mnemonic} {', '.join(operands)}", line)
+        raise assembler_error(f"instrucción no soportada: {mnemonic}", line)
+
+    def _register(self, name, line, is_float=False):
+        """Número de un registro entero o flotante"""
+        index = (FLOAT_INDEX if is_float else INT_INDEX).get(name)
+        if index is None:
+            raise assembler_error(f"registro no válido: {name}", line)
+        return index
+
+    def _immediate(self, text, line):
+        """Valor de un inmediato decimal o hexadecimal"""
+        try:
+            return int(text, 0)
+        except ValueError:
+            raise assembler_error(f"inmediato no válido: {text}", line)
+
+    def _signed(self, text, bits, line):
+        """Inmediato con signo que debe caber en el número de bits dado"""
+        value = self._immediate(text, line)
+        if not -(1 << (bits - 1)) <= value < (1 << (bits - 1)):
+            raise assembler_error(f"inmediato fuera de rango: {value}", line)
+        return value
+
+    def _memory(self, text, line):
+        """Operando de memoria desplazamiento(registro)"""
+        match = MEMORY_OPERAND.match(text.replace(' ', ''))
+        if not match:
+            raise assembler_error(f"operando de memoria no válido: {text}", line)
+        offset = match.group(1) or '0'
+        return self._signed(offset, 12, line), self._register(match.group(2), line)
+
+    def _rounding(self, text, line):
+        """Modo de redondeo de una instrucción de punto flotante"""
+        if text not in ROUNDING:
+            raise assembler_error(f"modo de redondeo no válido: {text}", line)
+        return ROUNDING[text]
+
+    # Salida
+
+    def to_elf(self):
+        """Devuelve el objeto ELF32 reubicable con .text, .data y sus símbolos"""
+        return ElfWriter(self).write()
+
+
+def r_type(opcode, rd, funct3, rs1, rs2, funct7):
+    return (funct7 << 25) | (rs2 << 20) | (rs1 << 15) | (funct3 << 12) | (rd << 7) | opcode
+
+
+def i_type(opcode, rd, funct3, rs1, imm):
+    return ((imm & 0xFFF) << 20) | (rs1 << 15) | (funct3 << 12) | (rd << 7) | opcode
+
+
+def s_type(opcode, funct3, rs1, rs2, imm):
+    return (((imm >> 5) & 0x7F) << 25) | (rs2 << 20) | (rs1 << 15) | (funct3 << 12) \
+        | ((imm & 0x1F) << 7) | opcode
+
+
+def b_type(funct3, rs1, rs2, offset):
+    return (((offset >> 12) & 1) << 31) | (((offset >> 5) & 0x3F) << 25) | (rs2 << 20) \
+        | (rs1 << 15) | (funct3 << 12) | (((offset >> 1) & 0xF) << 8) \
+        | (((offset >> 11) & 1) << 7) | 0x63
+
+
+def j_type(rd, offset):
+    return (((offset >> 20) & 1) << 31) | (((offset >> 1) & 0x3FF) << 21) \
+        | (((offset >> 11) & 1) << 20) | (((offset >> 12) & 0xFF) << 12) | (rd << 7) | 0x6F
+
+
+def sign_extend(value, bits):
+    """Interpreta los bits bajos de value como un entero con signo"""
+    value &= (1 << bits) - 1
+    return value - (1 << bits) if value >> (bits - 1) else value
+
+
+def format_instruction(mnemonic, fields):
+    """Texto canónico de una instrucción base a partir de sus campos"""
+    if mnemonic in LOADS or mnemonic in STORES:
+        is_float = (LOADS.get(mnemonic) or STORES.get(mnemonic))[2]
+        register, imm, base = fields
+        names = FLOAT_REGISTERS if is_float else INT_REGISTERS
+        return f"{mnemonic} {names[register]}, {imm}({INT_REGISTERS[base]})"
+    if mnemonic == 'jalr':
+        rd, imm, rs1 = fields
+        return f"jalr {INT_REGISTERS[rd]}, {imm}({INT_REGISTERS[rs1]})"
+    if mnemonic in FP_TYPE or mnemonic in R4_TYPE:
+        classes = FP_TYPE[mnemonic][3] if mnemonic in FP_TYPE else 'ffff'
+        parts = [(FLOAT_REGISTERS if kind == 'f' else INT_REGISTERS)[register]
+                 for register, kind in zip(fields, classes)]
+        if len(fields) > len(classes) and fields[-1] != ROUNDING['dyn']:
+            parts.append(ROUNDING_NAMES[fields[-1]])
+        return f"{mnemonic} {', '.join(parts)}"
+    if not fields:
+        return mnemonic
+    parts = []
+    for position, value in enumerate(fields):
+        # Registros primero; el último campo numérico es un inmediato
+        is_register = (mnemonic in R_TYPE or position < len(fields) - 1)
+        parts.append(INT_REGISTERS[value] if is_register else str(value))
+    return f"{mnemonic} {', '.join(parts)}"
+
+
+def decode(word):
+    """Decodifica una palabra de 32 bits al texto canónico de su instrucción"""
+    opcode = word & 0x7F
+    rd = (word >> 7) & 0x1F
+    funct3 = (word >> 12) & 0x7
+    rs1 = (word >> 15) & 0x1F
+    rs2 = (word >> 20) & 0x1F
+    funct7 = word >> 25
+    i_imm = sign_extend(word >> 20, 12)
+
+    def find(table, key):
+        for mnemonic, value in table.items():
+            if value == key:
+                return mnemonic
+        raise ValueError(f"instrucción desconocida: {word:#010x}")
+
+    if opcode == 0x33:
+        return format_instruction(find(R_TYPE, (funct3, funct7)), (rd, rs1, rs2))
+    if opcode == 0x13:
+        if funct3 in (1, 5):
+            mnemonic = find(SHIFT_TYPE, (funct3, funct7))
+            return format_instruction(mnemonic, (rd, rs1, rs2))
+        return format_instruction(find(I_TYPE, funct3), (rd, rs1, i_imm))
+    if opcode in (0x03, 0x07):
+        mnemonic = find(LOADS, (opcode, funct3, opcode == 0x07))
+        return format_instruction(mnemonic, (rd, i_imm, rs1))
+    if opcode in (0x23, 0x27):
+        imm = sign_extend((funct7 << 5) | rd, 12)
+        mnemonic = find(STORES, (opcode, funct3, opcode == 0x27))
+        return format_instruction(mnemonic, (rs2, imm, rs1))
+    if opcode == 0x63:
+        offset = sign_extend(((word >> 31) << 12) | (((word >> 7) & 1) << 11)
+                             | (((word >> 25) & 0x3F) << 5) | (((word >> 8) & 0xF) << 1), 13)
+        return format_instruction(find(BRANCHES, funct3), (rs1, rs2, offset))
+    if opcode == 0x6F:
+        offset = sign_extend(((word >> 31) << 20) | (((word >> 12) & 0xFF) << 12)
+                             | (((word >> 20) & 1) << 11) | (((word >> 21) & 0x3FF) << 1), 21)
+        return format_instruction('jal', (rd, offset))
+    if opcode == 0x67:
+        return format_instruction('jalr', (rd, i_imm, rs1))
+    if opcode in (0x37, 0x17):
+        return format_instruction('lui' if opcode == 0x37 else 'auipc', (rd, word >> 12))
+    if word == 0x00000073:
+        return 'ecall'
+    if word == 0x00100073:
+        return 'ebreak'
+    if opcode == 0x53:
+        for mnemonic, (f7, f3, fixed_rs2, classes) in FP_TYPE.items():
+            if f7 != funct7 or (f3 is not None and f3 != funct3):
+                continue
+            if fixed_rs2 is not None and fixed_rs2 != rs2:
+                continue
+            fields = (rd, rs1, rs2)[:len(classes)]
+            return format_instruction(mnemonic, fields + ((funct3,) if f3 is None else ()))
+    if opcode in R4_TYPE.values() and (funct7 & 3) == 0:
+        mnemonic = find(R4_TYPE, opcode)
+        return format_instruction(mnemonic, (rd, rs1, rs2, word >> 27, funct3))
+    raise ValueError(f"instrucción desconocida: {word:#010x}")
+
+
+def disassemble(code):
+    """Texto canónico de cada instrucción de un bloque de código máquina"""
+    return [decode(word) for (word,) in struct.iter_unpack('<I', bytes(code))]
+
+
+def verify(assembler):
+    """
+    Comprueba la codificación decodificando .text y comparándolo con el
+    texto de las instrucciones ensambladas. Devuelve las diferencias como
+    (índice, esperado, decodificado).
+    """
+    decoded = disassemble(assembler.text)
+    return [(index, expected, got)
+            for index, (expected, got) in enumerate(zip(assembler.listing, decoded))
+            if expected != got]
+
+
+class ElfWriter:
+    """Escritor mínimo de objetos ELF32 reubicables para RISC-V"""
+
+    EM_RISCV = 243
+    EF_RISCV_FLOAT_ABI_SINGLE = 0x2
+
+    def __init__(self, assembler):
+        self.assembler = assembler
+
+    def write(self):
+        assembler = self.assembler
+        # Tabla de cadenas de símbolos
+        strtab = bytearray(b'\0')
+
+        def name_offset(name):
+            offset = len(strtab)
+            strtab.extend(name.encode() + b'\0')
+            return offset
+
+        # Símbolos locales primero, luego los globales y los externos
+        section_index = {'.text': 1, '.data': 2}
+        symbols = [(0, 0, 0, 0, 0)]
+        indices = {}
+        # Las etiquetas numéricas (1:, 2:...) no llegan a la tabla de símbolos
+        local = [name for name in assembler.symbols
+                 if name not in assembler.globals and '@' not in name]
+        global_names = [name for name in assembler.symbols if name in assembler.globals]
+        for name in local:
+            section, value = assembler.symbols[name]
+            info = 1 if section == '.data' else 0      # STB_LOCAL, STT_OBJECT/NOTYPE
+            indices[name] = len(symbols)
+            symbols.append((name_offset(name), value, 0, info, section_index[section]))
+        first_global = len(symbols)
+        for name in global_names:
+            section, value = assembler.symbols[name]
+            indices[name] = len(symbols)
+            # STB_GLOBAL, STT_FUNC en .text
+            symbols.append((name_offset(name), value, 0, (1 << 4) | 2, section_index[section]))
+        for name in assembler.externals:
+            if name not in indices:
+                indices[name] = len(symbols)
+                symbols.append((name_offset(name), 0, 0, 1 << 4, 0))   # STB_GLOBAL, SHN_UNDEF
+
+        symtab = b''.join(struct.pack('<IIIBBH', name, value, size, info, 0, shndx)
+                          for name, value, size, info, shndx in symbols)
+        rela = b''.join(struct.pack('<IIi', offset, (indices[symbol] << 8) | kind, 0)
+                        for offset, symbol, kind in assembler.relocations)
+
+        shstrtab = bytearray(b'\0')
+        section_names = {}
+        for name in ('.text', '.data', '.rela.text', '.symtab', '.strtab', '.shstrtab'):
+            section_names[name] = len(shstrtab)
+            shstrtab.extend(name.encode() + b'\0')
+
+        # Contenido de las secciones, alineado a 4 bytes tras la cabecera
+        contents = [bytes(assembler.text), bytes(assembler.data), rela, symtab,
+                    bytes(strtab), bytes(shstrtab)]
+        offsets = []
+        offset = 52
+        for content in contents:
+            offset += -offset % 4
+            offsets.append(offset)
+            offset += len(content)
+        section_header_offset = offset + (-offset % 4)
+
+        # (nombre, tipo, flags, enlace, info, alineación, tamaño de entrada)
+        headers = [
+            ('.text', 1, 0x6, 0, 0, 4, 0),          # SHT_PROGBITS, SHF_ALLOC|SHF_EXECINSTR
+            ('.data', 1, 0x3, 0, 0, 4, 0),          # SHT_PROGBITS, SHF_WRITE|SHF_ALLOC
+            ('.rela.text', 4, 0x40, 4, 1, 4, 12),   # SHT_RELA, SHF_INFO_LINK
+            ('.symtab', 2, 0, 5, first_global, 4, 16),
+            ('.strtab', 3, 0, 0, 0, 1, 0),
+            ('.shstrtab', 3, 0, 0, 0, 1, 0),
+        ]
+        elf = bytearray()
+        elf.extend(b'\x7fELF' + bytes([1, 1, 1, 0]) + b'\0' * 8)
+        elf.extend(struct.pack('<HHIIIIIHHHHHH', 1, self.EM_RISCV, 1, 0, 0,
+                               section_header_offset, self.EF_RISCV_FLOAT_ABI_SINGLE,
+                               52, 0, 0, 40, len(headers) + 1, len(headers)))
+        for content, start in zip(contents, offsets):
+            elf.extend(b'\0' * (start - len(elf)))
+            elf.extend(content)
+        elf.extend(b'\0' * (section_header_offset - len(elf)))
+        elf.extend(b'\0' * 40)
+        for (name, kind, flags, link, info, align, entsize), content, start in zip(
+                headers, contents, offsets):
+            elf.extend(struct.pack('<IIIIIIIIII', section_names[name], kind, flags, 0,
+                                   start, len(content), link, info, align, entsize))
+        return bytes(elf)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Uso: python assembler.py <programa.s> [objeto.o]")
+        sys.exit(1)
+    input_file = sys.argv[1]
+    output_file = sys.argv[2] if len(sys.argv) > 2 else input_file.rsplit('.', 1)[0] + '.o'
+    with open(input_file, 'r') as f:
+        assembler = Assembler().assemble(f.read())
+    with open(output_file, 'wb') as f:
+        f.write(assembler.to_elf())
+    differences = verify(assembler)
+    for index, expected, got in differences[:10]:
+        print(f"Diferencia en la instrucción {index}: {expected} != {got}")
+    print(f"{len(assembler.listing)} instrucciones, {len(assembler.data)} bytes de datos; "
+          f"objeto guardado en {output_file}")
+    sys.exit(1 if differences else 0)
+
+
+if __name__ == "__main__":
+    main()
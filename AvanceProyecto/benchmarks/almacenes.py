@@ -0,0 +1,109 @@
+"""
+Benchmark de la eliminación de almacenes muertos.
+
+Compila cada programa con y sin --dead-stores, ejecuta las dos versiones
+en el simulador de mv/mv1.py y comprueba que impriman lo mismo. Muestra
+las instrucciones eliminadas por función y cuántas instrucciones se
+ejecutaron antes y después.
+
+Uso: python benchmarks/almacenes.py [opción ...]   (p. ej. peephole fold cse)
+"""
+
+import os
+import sys
+
+DIRECTORIO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRECTORIO)
+sys.path.insert(0, os.path.join(os.path.dirname(DIRECTORIO), 'mv'))
+
+from compiler import Compiler
+from mv1 import RiscVSimulator
+
+PROGRAMAS = {
+    'sobrescritas': '''
+var int a;
+var int b;
+var int i;
+a = 5;
+b = a * 3;
+for (i = 1; 200) {
+  a = i * 2;
+  b = i * 5 - 3;
+  a = b - 1;
+}
+println(a);
+end.
+''',
+    'llamadas': '''
+var float x;
+var float y;
+var int i;
+x = 0.5;
+for (i = 1; 100) {
+  y = sin(x * 1.0);
+  y = cos(x * 1.0);
+  x = x + 0.01;
+}
+println(x, " ", y);
+end.
+''',
+    'sin_usar': '''
+var int i;
+var int j;
+var int s;
+var int t;
+var float f;
+s = 0;
+for (i = 1; 40) {
+  for (j = 1; 25) {
+    t = i * j + 7;
+    f = t / 3;
+    s = s + j;
+  }
+}
+println(s);
+end.
+''',
+    'vivas': '''
+var int i;
+var int a;
+var int b;
+a = 0;
+b = 1;
+for (i = 1; 300) {
+  a = a + b;
+  b = b + 2;
+}
+println(a, " ", b);
+end.
+''',
+}
+
+
+def ejecutar(codigo, **opciones):
+    """Compila y ejecuta; devuelve (salida, instrucciones ejecutadas, eliminadas)"""
+    resultado = Compiler(lexer='regex', **opciones).build(codigo)
+    if not resultado.ok:
+        raise SystemExit(resultado.error)
+    simulador = RiscVSimulator()
+    simulador.load_program(resultado.assembly)
+    simulador.run()
+    eliminadas = resultado.stats.get('almacenes_eliminados', {})
+    return ''.join(simulador.output), simulador.instruction_count, eliminadas
+
+
+def main():
+    opciones = {nombre: True for nombre in sys.argv[1:]}
+    print(f"{'programa':>12} {'eliminadas':>18} {'antes':>9} {'después':>9} {'ahorro':>8}")
+    for nombre, codigo in PROGRAMAS.items():
+        salida, antes, _ = ejecutar(codigo, **opciones)
+        salida_nueva, despues, eliminadas = ejecutar(codigo, dead_stores=True, **opciones)
+        if salida_nueva != salida:
+            raise SystemExit(f"{nombre}: la salida cambió al quitar los almacenes muertos")
+        por_funcion = ', '.join(f"{funcion} {cantidad}" for funcion, cantidad in eliminadas.items())
+        ahorro = 100 * (antes - despues) / antes
+        print(f"{nombre:>12} {por_funcion or '-':>18} {antes:>9} {despues:>9} {ahorro:>7.1f}%")
+
+
+if __name__ == "__main__":
+    main()
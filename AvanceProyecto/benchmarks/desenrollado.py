@@ -0,0 +1,102 @@
+"""
+Benchmark del desenrollado de bucles.
+
+Compila programas con bucles for de límites literales con distintos
+factores de desenrollado, los ejecuta en el simulador de mv/mv1.py y
+muestra cuántas instrucciones se ejecutaron. La salida de cada programa
+debe ser la misma con cualquier factor.
+
+Uso: python benchmarks/desenrollado.py [factor ...]
+"""
+
+import os
+import sys
+
+DIRECTORIO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRECTORIO)
+sys.path.insert(0, os.path.join(os.path.dirname(DIRECTORIO), 'mv'))
+
+from compiler import Compiler
+from mv1 import RiscVSimulator
+
+PROGRAMAS = {
+    'suma': '''
+var int i;
+var int s;
+s = 0;
+for (i = 1; 1000) {
+  s = s + i;
+}
+println(s);
+end.
+''',
+    'anidado': '''
+var int i;
+var int j;
+var int s;
+s = 0;
+for (i = 1; 30) {
+  for (j = 1; 25) {
+    s = s + i * j;
+  }
+}
+println(s);
+end.
+''',
+    'flotante': '''
+var int i;
+var float x;
+var float y;
+x = 0.0;
+y = 1.5;
+for (i = 0; 499) {
+  x = x + y * i;
+}
+println(x);
+end.
+''',
+    'resto': '''
+var int i;
+var int a;
+var int b;
+a = 0;
+b = 1;
+for (i = 1; 997) {
+  a = a + b;
+  b = b + 2;
+}
+println(a, " ", b);
+end.
+''',
+}
+
+
+def ejecutar(codigo, factor, **opciones):
+    """Compila con el factor de desenrollado y devuelve (salida, instrucciones)"""
+    ensamblador = Compiler(lexer='regex', unroll=factor, **opciones).compile(codigo)
+    if ensamblador.startswith('Error'):
+        raise SystemExit(ensamblador)
+    simulador = RiscVSimulator()
+    simulador.load_program(ensamblador)
+    simulador.run()
+    return ''.join(simulador.output), simulador.instruction_count
+
+
+def main():
+    factores = [int(arg) for arg in sys.argv[1:]] or [1, 2, 4, 8]
+    print(f"{'programa':>10} " + ' '.join(f"{'x' + str(f):>9}" for f in factores)
+          + f" {'ahorro':>8}")
+    for nombre, codigo in PROGRAMAS.items():
+        salida_base, _ = ejecutar(codigo, 1)
+        conteos = []
+        for factor in factores:
+            salida, instrucciones = ejecutar(codigo, factor)
+            if salida != salida_base:
+                raise SystemExit(f"{nombre}: salida distinta con factor {factor}")
+            conteos.append(instrucciones)
+        ahorro = 100 * (conteos[0] - min(conteos)) / conteos[0]
+        print(f"{nombre:>10} " + ' '.join(f"{c:>9}" for c in conteos) + f" {ahorro:>7.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark de la latencia de edición de la compilación incremental.
+
+Genera un programa grande con benchmarks/generador.py, lo compila una vez
+con Compiler.incremental y mide cuánto tarda cada edición pequeña (añadir
+una instrucción al principio, en medio o al final, y deshacerla) frente a
+Compiler.build del programa completo. Una edición solo vuelve a generar y
+asignar registros a lo que cambió, así que debe costar una fracción
+pequeña de build; si alguna pasa de --fraccion, termina con error.
+
+Uso: python benchmarks/edicion.py [--sentencias N] [--fraccion F] [opción ...]   (p. ej. peephole fold)
+"""
+
+import argparse
+import os
+import sys
+import time
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(DIRECTORIO))
+
+from compiler import Compiler
+from generador import generar_programa
+
+# Instrucción que se inserta y luego se borra
+INSERTADA = 'println(1);\n'
+
+POSICIONES = {'principio': 0.1, 'medio': 0.5, 'final': 0.9}
+
+
+def cronometrar(funcion, *argumentos):
+    """Devuelve (resultado, segundos) de una llamada"""
+    inicio = time.perf_counter()
+    resultado = funcion(*argumentos)
+    return resultado, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia de edición de Compiler.incremental")
+    parser.add_argument('--sentencias', type=int, default=20000)
+    parser.add_argument('--fraccion', type=float, default=0.1,
+                        help="Máximo de una edición respecto a build (por defecto 0.1)")
+    parser.add_argument('opciones', nargs='*', help="Opciones de Compiler (peephole, fold, ...)")
+    args = parser.parse_args()
+    opciones = {nombre: True for nombre in args.opciones}
+
+    codigo = generar_programa(64, 3, 2, args.sentencias)
+    compilador = Compiler(**opciones)
+    resultado, completa = cronometrar(compilador.build, codigo)
+    if not resultado.ok:
+        raise SystemExit(resultado.error)
+    sesion = compilador.incremental(codigo)
+    _, primera = cronometrar(sesion.compile)
+    print(f"{codigo.count(chr(10))} líneas: build {completa:.3f} s, "
+          f"primera compilación incremental {primera:.3f} s")
+
+    print(f"{'posición':>10} {'editar':>9} {'deshacer':>9} {'fracción':>9}")
+    lentas = []
+    for nombre, fraccion in POSICIONES.items():
+        # Insertar al comienzo de una línea: siempre es una instrucción válida
+        posicion = codigo.index('\n', int(len(codigo) * fraccion)) + 1
+        editado, editar = cronometrar(sesion.edit, posicion, 0, INSERTADA)
+        deshecho, deshacer = cronometrar(sesion.edit, posicion, len(INSERTADA), '')
+        if not (editado.ok and deshecho.ok):
+            raise SystemExit(f"{nombre}: {editado.error or deshecho.error}")
+        peor = max(editar, deshacer) / completa
+        print(f"{nombre:>10} {editar:>8.3f}s {deshacer:>8.3f}s {peor:>9.3f}")
+        if peor > args.fraccion:
+            lentas.append(nombre)
+
+    if lentas:
+        raise SystemExit(f"Ediciones más lentas que {args.fraccion} de build: {', '.join(lentas)}")
+
+
+if __name__ == "__main__":
+    main()
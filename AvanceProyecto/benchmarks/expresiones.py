@@ -0,0 +1,175 @@
+"""
+Benchmark del análisis de expresiones.
+
+Compara el Parser actual, que analiza las expresiones por precedencia de
+operadores con pilas explícitas, con el descenso recursivo anterior
+(expr -> term -> factor, una llamada de Python por nivel de precedencia).
+Mide expresiones largas sin paréntesis y expresiones con paréntesis cada
+vez más anidados; el descenso recursivo se queda sin pila con los más
+profundos. Ambos deben construir el mismo AST.
+
+Uso: python benchmarks/expresiones.py [terminos] [profundidad_maxima]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compiler import (BinOp, MathCall, Num, Parser, RegexLexer, TokenStream, TokenType,
+                      Var)
+
+
+class DescentParser(Parser):
+    """Parser con el análisis de expresiones por descenso recursivo anterior"""
+
+    def expr(self):
+        """
+        expr : term ((PLUS | MINUS) term)*
+        """
+        result = self.term()
+
+        while self.current_token.type in (TokenType.PLUS, TokenType.MINUS):
+            token = self.current_token
+            self.eat(token.type)
+            result = BinOp(token.value, result, self.term(), token.line)
+
+        return result
+
+    def term(self):
+        """
+        term : factor ((TIMES | DIVIDE) factor)*
+        """
+        result = self.factor()
+
+        while self.current_token.type in (TokenType.TIMES, TokenType.DIVIDE):
+            token = self.current_token
+            self.eat(token.type)
+            result = BinOp(token.value, result, self.factor(), token.line)
+
+        return result
+
+    def factor(self):
+        """
+        factor : NUMBER
+               | IDENTIFIER
+               | LPAREN expr RPAREN
+               | (SIN | COS | TAN) LPAREN expr RPAREN
+        """
+        token = self.current_token
+
+        if token.type == TokenType.NUMBER:
+            self.eat(TokenType.NUMBER)
+            return Num(token.value, token.line)
+
+        elif token.type == TokenType.IDENTIFIER:
+            self.eat(TokenType.IDENTIFIER)
+            var_info = self.symbol_table.lookup(token.value)
+            return Var(token.value, var_info['type'], token.line)
+
+        elif token.type == TokenType.LPAREN:
+            self.eat(TokenType.LPAREN)
+            result = self.expr()
+            self.eat(TokenType.RPAREN)
+            return result
+
+        elif token.type in (TokenType.SIN, TokenType.COS, TokenType.TAN):
+            self.eat(token.type)
+            self.eat(TokenType.LPAREN)
+            arg = self.expr()
+            self.eat(TokenType.RPAREN)
+            if arg.type != 'float':
+                raise Exception(f"Error semántico: La función {token.value} requiere un argumento de tipo float")
+            return MathCall(token.value, arg, token.line)
+        else:
+            self.error()
+
+
+def programa(expresion):
+    """Programa Mini-C que asigna la expresión"""
+    return f'var int a;\nvar int b;\nvar float x;\nx = {expresion};\nend.'
+
+
+def expresion_larga(terminos):
+    """Expresión sin paréntesis con todos los niveles de precedencia"""
+    partes = ['a']
+    for i in range(1, terminos):
+        partes.append('+-*/'[i % 4])
+        partes.append(('b', str(i), 'x')[i % 3])
+    return ' '.join(partes)
+
+
+def expresion_anidada(profundidad):
+    """Expresión con paréntesis anidados: (a + (b * (a - ... )))"""
+    return '(a + (b * ' * profundidad + 'x' + '))' * profundidad
+
+
+def forma(nodo):
+    """Estructura del AST sin recursión, para comparar los dos parsers"""
+    resultado = []
+    pendientes = [nodo]
+    while pendientes:
+        nodo = pendientes.pop()
+        if isinstance(nodo, BinOp):
+            resultado.append(nodo.op)
+            pendientes += [nodo.right, nodo.left]
+        elif isinstance(nodo, MathCall):
+            resultado.append(nodo.func)
+            pendientes.append(nodo.arg)
+        else:
+            resultado.append(getattr(nodo, 'name', getattr(nodo, 'value', None)))
+    return resultado
+
+
+def medir(clase, tokens, repeticiones=5):
+    """Devuelve (mejor tiempo en segundos, AST de la expresión) o (None, error)"""
+    mejor = None
+    for _ in range(repeticiones):
+        parser = clase(TokenStream(tokens))
+        inicio = time.perf_counter()
+        try:
+            arbol = parser.program()
+        except RecursionError:
+            return None, 'sin pila'
+        tiempo = time.perf_counter() - inicio
+        if mejor is None or tiempo < mejor:
+            mejor = tiempo
+    return mejor, arbol.statements[0].expr
+
+
+def comparar(nombre, codigo):
+    """Imprime una fila con los tiempos de ambos parsers"""
+    lexer = RegexLexer(codigo)
+    tokens = []
+    while not tokens or tokens[-1].type != TokenType.EOF:
+        tokens.append(lexer.get_next_token())
+
+    actual, arbol = medir(Parser, tokens)
+    anterior, arbol_anterior = medir(DescentParser, tokens)
+    if anterior is None:
+        columna, razon = f"{arbol_anterior:>12}", '-'
+    else:
+        if forma(arbol) != forma(arbol_anterior):
+            raise SystemExit(f"{nombre}: los parsers construyen ASTs distintos")
+        columna, razon = f"{anterior * 1000:>12.2f}", f"{anterior / actual:.2f}"
+    print(f"{nombre:>18} {len(tokens):>8} {actual * 1000:>12.2f} {columna} {razon:>7}")
+
+
+def main():
+    terminos = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    maxima = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+    print(f"{'expresión':>18} {'tokens':>8} {'pratt (ms)':>12} {'descenso (ms)':>12} {'razón':>7}")
+    n = terminos // 8
+    while n <= terminos:
+        comparar(f"larga {n}", programa(expresion_larga(n)))
+        n *= 2
+    profundidad = 50
+    while profundidad <= maxima:
+        comparar(f"anidada {profundidad}", programa(expresion_anidada(profundidad)))
+        profundidad *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Generador de programas Mini-C sintéticos para los benchmarks.
+
+Los programas usan solo lo que acepta el Parser de compiler.py:
+declaraciones int y float, asignaciones, print/println y for anidados, con
+expresiones de todos los niveles de precedencia (comparaciones, %, menos
+unario, sin/cos/tan). Se generan con una semilla fija, así que los mismos
+parámetros siempre dan el mismo programa.
+
+Uso: python benchmarks/generador.py [variables] [profundidad] [anidamiento] [sentencias]
+"""
+
+import random
+import sys
+
+# En Mini-C int / int da float, así que las expresiones enteras no dividen
+OPERADORES_INT = ('+', '-', '*', '%', '<', '==')
+OPERADORES_FLOAT = ('+', '-', '*', '/')
+
+
+class GeneradorProgramas:
+    """
+    Genera un programa con variables int y float (mitad y mitad), expresiones
+    de profundidad máxima profundidad, for anidados hasta anidamiento niveles
+    y sentencias sentencias en total (un for cuenta como una, más su cuerpo).
+    """
+
+    def __init__(self, variables=8, profundidad=3, anidamiento=1, sentencias=100, semilla=0):
+        self.enteras = [f"a{i}" for i in range(max(1, variables // 2))]
+        self.flotantes = [f"x{i}" for i in range(max(1, variables - len(self.enteras)))]
+        self.contadores = [f"i{i}" for i in range(anidamiento)]
+        self.profundidad = profundidad
+        self.anidamiento = anidamiento
+        self.sentencias = sentencias
+        self.rng = random.Random(semilla)
+
+    def programa(self):
+        """Devuelve el código fuente del programa"""
+        lineas = [f"var int {nombre};" for nombre in self.enteras + self.contadores]
+        lineas += [f"var float {nombre};" for nombre in self.flotantes]
+        self.bloque(lineas, self.sentencias, 0)
+        lineas.append(f"println({self.enteras[0]}, \" \", {self.flotantes[0]});")
+        lineas.append("end.")
+        return '\n'.join(lineas)
+
+    def bloque(self, lineas, sentencias, nivel):
+        """Agrega sentencias sentencias a lineas con la sangría de nivel"""
+        rng = self.rng
+        sangria = '  ' * nivel
+        while sentencias > 0:
+            if nivel < self.anidamiento and sentencias > 1 and rng.random() < 0.25:
+                # Un for con un cuerpo de hasta 8 sentencias
+                cuerpo = rng.randint(1, min(8, sentencias - 1))
+                contador = self.contadores[nivel]
+                lineas.append(f"{sangria}for ({contador} = 1; {rng.randint(2, 50)}) {{")
+                self.bloque(lineas, cuerpo, nivel + 1)
+                lineas.append(f"{sangria}}}")
+                sentencias -= cuerpo + 1
+                continue
+            if rng.random() < 0.05:
+                lineas.append(f"{sangria}print({rng.choice(self.enteras)}, \" \");")
+            elif rng.random() < 0.5:
+                lineas.append(f"{sangria}{rng.choice(self.enteras)} = {self.expresion_int(self.profundidad)};")
+            else:
+                lineas.append(f"{sangria}{rng.choice(self.flotantes)} = {self.expresion_float(self.profundidad)};")
+            sentencias -= 1
+
+    def expresion_int(self, profundidad):
+        """Expresión entera: solo variables int y literales, para poder usar %"""
+        rng = self.rng
+        if profundidad == 0 or rng.random() < 0.15:
+            if rng.random() < 0.3:
+                return str(rng.randint(1, 99))
+            return rng.choice(self.enteras + self.contadores)
+        if rng.random() < 0.1:
+            return f"-{self.expresion_int(profundidad - 1)}"
+        operador = rng.choice(OPERADORES_INT)
+        izquierda = self.expresion_int(profundidad - 1)
+        derecha = self.expresion_int(rng.randint(0, profundidad - 1))
+        return f"({izquierda} {operador} {derecha})"
+
+    def expresion_float(self, profundidad, enteras=True):
+        """
+        Expresión de punto flotante que mezcla variables int y float. Con
+        enteras=False la hoja de más a la izquierda es float, así que la
+        expresión es float (sin, cos y tan lo exigen).
+        """
+        rng = self.rng
+        if profundidad == 0 or rng.random() < 0.15:
+            eleccion = rng.random()
+            if eleccion < 0.3:
+                return f"{rng.randint(0, 99)}.{rng.randint(0, 9)}"
+            if eleccion < 0.4 and enteras:
+                return rng.choice(self.enteras)
+            return rng.choice(self.flotantes)
+        if rng.random() < 0.1:
+            funcion = rng.choice(('sin', 'cos', 'tan'))
+            return f"{funcion}({self.expresion_float(profundidad - 1, False)})"
+        operador = rng.choice(OPERADORES_FLOAT)
+        izquierda = self.expresion_float(profundidad - 1, enteras)
+        derecha = self.expresion_float(rng.randint(0, profundidad - 1))
+        return f"({izquierda} {operador} {derecha})"
+
+
+def generar_programa(variables=8, profundidad=3, anidamiento=1, sentencias=100, semilla=0):
+    """Código fuente de un programa sintético con los parámetros dados"""
+    return GeneradorProgramas(variables, profundidad, anidamiento, sentencias, semilla).programa()
+
+
+if __name__ == "__main__":
+    print(generar_programa(*(int(arg) for arg in sys.argv[1:5])))
@@ -0,0 +1,209 @@
+"""
+Suite de benchmarks del compilador.
+
+Genera programas Mini-C con benchmarks/generador.py variando un parámetro
+a la vez (sentencias, profundidad de las expresiones, anidamiento de los
+for y número de variables) y mide por separado el lexer, el Parser y el
+CodeGenerator (con la asignación de registros). Muestra los resultados,
+puede guardarlos en JSON y los compara con la línea base guardada en
+benchmarks/linea_base.json.
+
+La línea base se midió en otra máquina, así que cada tiempo se compara
+con el suyo dividido por la razón mediana de todos los casos (la
+diferencia de velocidad entre las máquinas). Un caso es una regresión si
+queda más de --tolerancia veces más lento que eso, y una serie lo es si
+su tiempo crece con el número de tokens con un exponente 0.3 mayor que el
+de la línea base (por ejemplo, de lineal a cuadrático).
+
+Uso: python benchmarks/suite.py [--salida ARCHIVO] [--guardar-linea-base] [opciones]
+"""
+
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(DIRECTORIO))
+
+from compiler import LEXERS, CodeGenerator, Parser, TokenStream, TokenType, count_instructions
+from generador import generar_programa
+
+LINEA_BASE = os.path.join(DIRECTORIO, 'linea_base.json')
+
+FASES = ('lexer', 'parser', 'generador')
+
+# Parámetros de generar_programa; cada serie cambia uno solo
+BASE = dict(variables=8, profundidad=3, anidamiento=1, sentencias=1000)
+SERIES = {
+    'sentencias': (500, 1000, 2000, 4000, 8000),
+    'profundidad': (1, 2, 4, 8, 16),
+    'anidamiento': (0, 2, 4),
+    'variables': (4, 32, 256),
+}
+
+# Diferencia máxima del exponente de crecimiento de una serie
+MARGEN_EXPONENTE = 0.3
+
+
+def medir(codigo, lexer, repeticiones):
+    """
+    Mejor tiempo de cada fase en segundos, tokens e instrucciones generadas.
+    Como timeit, mide con el recolector de ciclos apagado para que sus
+    pausas no metan ruido en la comparación.
+    """
+    mejores = dict.fromkeys(FASES, math.inf)
+    for _ in range(repeticiones):
+        gc.collect()
+        gc.disable()
+        inicio = time.perf_counter()
+        analizador = LEXERS[lexer](codigo)
+        tokens = []
+        while not tokens or tokens[-1].type != TokenType.EOF:
+            tokens.append(analizador.get_next_token())
+        fin_lexer = time.perf_counter()
+        parser = Parser(TokenStream(tokens))
+        programa = parser.program()
+        fin_parser = time.perf_counter()
+        ensamblador = CodeGenerator(parser.symbol_table).generate(programa)
+        fin = time.perf_counter()
+        gc.enable()
+
+        for fase, tiempo in zip(FASES, (fin_lexer - inicio, fin_parser - fin_lexer,
+                                        fin - fin_parser)):
+            mejores[fase] = min(mejores[fase], tiempo)
+    return mejores, len(tokens), count_instructions(ensamblador.split('\n'))
+
+
+def ejecutar(lexer, repeticiones):
+    """Mide todos los casos; devuelve el diccionario que se guarda en JSON"""
+    casos = {}
+    print(f"{'caso':>16} {'tokens':>8} {'instr.':>8} {'lexer (ms)':>11} "
+          f"{'parser (ms)':>12} {'generador (ms)':>15}")
+    for serie, valores in SERIES.items():
+        for valor in valores:
+            parametros = dict(BASE, **{serie: valor})
+            codigo = generar_programa(**parametros)
+            tiempos, tokens, instrucciones = medir(codigo, lexer, repeticiones)
+            nombre = f"{serie} {valor}"
+            casos[nombre] = dict(serie=serie, parametros=parametros, tokens=tokens,
+                                 instrucciones=instrucciones, **tiempos)
+            print(f"{nombre:>16} {tokens:>8} {instrucciones:>8} {tiempos['lexer'] * 1000:>11.2f} "
+                  f"{tiempos['parser'] * 1000:>12.2f} {tiempos['generador'] * 1000:>15.2f}")
+    return {'python': platform.python_version(), 'lexer': lexer,
+            'repeticiones': repeticiones, 'casos': casos}
+
+
+def exponente(casos, serie, fase):
+    """
+    Exponente de crecimiento del tiempo con los tokens: pendiente de la recta
+    de mínimos cuadrados en escala log-log. None si los tokens no llegan a
+    multiplicarse por 8, porque el exponente sería solo ruido.
+    """
+    puntos = [(math.log(caso['tokens']), math.log(caso[fase]))
+              for caso in casos.values() if caso['serie'] == serie]
+    if puntos[-1][0] - puntos[0][0] < math.log(8):
+        return None
+    media_x = statistics.fmean(x for x, _ in puntos)
+    media_y = statistics.fmean(y for _, y in puntos)
+    return (sum((x - media_x) * (y - media_y) for x, y in puntos)
+            / sum((x - media_x) ** 2 for x, _ in puntos))
+
+
+def comparar(resultados, linea_base, tolerancia):
+    """Compara con la línea base; devuelve la lista de regresiones encontradas"""
+    if linea_base['lexer'] != resultados['lexer']:
+        print(f"\nLa línea base usa el lexer {linea_base['lexer']}; no se compara")
+        return []
+    comunes = [nombre for nombre in resultados['casos'] if nombre in linea_base['casos']]
+    if not comunes:
+        print("\nLa línea base no tiene casos en común; no se compara")
+        return []
+
+    razones = {(nombre, fase): resultados['casos'][nombre][fase] / linea_base['casos'][nombre][fase]
+               for nombre in comunes for fase in FASES}
+    factor = statistics.median(razones.values())
+    print(f"\nRazón de tiempos frente a la línea base (Python {linea_base['python']}), "
+          f"dividida por la mediana {factor:.2f}:")
+    print(f"{'caso':>16} " + ' '.join(f"{fase:>10}" for fase in FASES))
+    regresiones = []
+    for nombre in comunes:
+        columnas = []
+        for fase in FASES:
+            razon = razones[(nombre, fase)] / factor
+            marca = ' '
+            if razon > tolerancia:
+                marca = '!'
+                regresiones.append(f"{nombre}, {fase}: {razon:.2f} veces más lento")
+            columnas.append(f"{razon:>9.2f}{marca}")
+        print(f"{nombre:>16} " + ' '.join(columnas))
+
+    print(f"\n{'serie':>16} " + ' '.join(f"{fase:>16}" for fase in FASES) + "   (exponente: actual/base)")
+    for serie in SERIES:
+        nombres = [nombre for nombre in comunes if resultados['casos'][nombre]['serie'] == serie]
+        actuales = {nombre: resultados['casos'][nombre] for nombre in nombres}
+        base = {nombre: linea_base['casos'][nombre] for nombre in nombres}
+        if len(nombres) < 2 or exponente(actuales, serie, FASES[0]) is None:
+            continue
+        columnas = []
+        for fase in FASES:
+            actual, anterior = exponente(actuales, serie, fase), exponente(base, serie, fase)
+            marca = ' '
+            if actual > anterior + MARGEN_EXPONENTE:
+                marca = '!'
+                regresiones.append(f"serie {serie}, {fase}: el exponente pasó de "
+                                   f"{anterior:.2f} a {actual:.2f}")
+            columnas.append(f"{actual:>7.2f}/{anterior:<7.2f}{marca}")
+        print(f"{serie:>16} " + ' '.join(columnas))
+    return regresiones
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(
+        usage="python benchmarks/suite.py [opciones]")
+    arg_parser.add_argument('--lexer', choices=sorted(LEXERS), default='regex',
+                            help="motor de análisis léxico a medir (por defecto: regex)")
+    arg_parser.add_argument('--repeticiones', type=int, default=5, metavar='N',
+                            help="mediciones de cada caso; se toma la mejor (por defecto: 5)")
+    arg_parser.add_argument('--salida', metavar='ARCHIVO',
+                            help="guardar los resultados en ARCHIVO en formato JSON")
+    arg_parser.add_argument('--linea-base', default=LINEA_BASE, metavar='ARCHIVO',
+                            help="línea base con la que comparar (por defecto: benchmarks/linea_base.json)")
+    arg_parser.add_argument('--guardar-linea-base', action='store_true',
+                            help="guardar los resultados como la nueva línea base")
+    arg_parser.add_argument('--tolerancia', type=float, default=2.0, metavar='X',
+                            help="razón máxima frente a la línea base antes de marcar una "
+                                 "regresión (por defecto: 2.0)")
+    args = arg_parser.parse_args()
+
+    resultados = ejecutar(args.lexer, args.repeticiones)
+    if args.salida:
+        with open(args.salida, 'w') as f:
+            json.dump(resultados, f, indent=2)
+    if args.guardar_linea_base:
+        with open(args.linea_base, 'w') as f:
+            json.dump(resultados, f, indent=2)
+        print(f"\nLínea base guardada en {args.linea_base}")
+        return
+
+    if not os.path.exists(args.linea_base):
+        print(f"\nNo hay línea base en {args.linea_base}; usar --guardar-linea-base")
+        return
+    with open(args.linea_base) as f:
+        linea_base = json.load(f)
+    regresiones = comparar(resultados, linea_base, args.tolerancia)
+    if regresiones:
+        print("\nRegresiones:")
+        for regresion in regresiones:
+            print(f"  {regresion}")
+        sys.exit(1)
+    print("\nSin regresiones")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmark de la asignación de temporales.
+
+Compila programas con cada vez más sentencias y muestra el tiempo por
+sentencia. Como los temporales se toman de un pool en O(1) y se liberan
+al final de cada sentencia, el tiempo total debe crecer de forma lineal.
+
+Uso: python benchmarks/temporales.py [sentencias_maximas]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compiler import Compiler
+
+
+def generar_programa(sentencias):
+    """Genera un programa Mini-C con el número de sentencias pedido"""
+    lineas = ['var int a;', 'var int b;', 'var float x;', 'var float y;']
+    for i in range(sentencias):
+        if i % 2 == 0:
+            lineas.append(f'a = (a + {i}) * 3 - b + {i % 7};')
+        else:
+            lineas.append(f'x = x * {i}.5 + y / 2 - a;')
+    lineas.append('print(a, x);')
+    lineas.append('end.')
+    return '\n'.join(lineas)
+
+
+def medir(codigo, repeticiones=3):
+    """Devuelve el mejor tiempo de compilación en segundos"""
+    compilador = Compiler(lexer='regex')
+    mejor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = compilador.compile(codigo)
+        tiempo = time.perf_counter() - inicio
+        if resultado.startswith('Error'):
+            raise SystemExit(resultado)
+        if mejor is None or tiempo < mejor:
+            mejor = tiempo
+    return mejor
+
+
+def main():
+    maximo = int(sys.argv[1]) if len(sys.argv) > 1 else 32000
+    tamanos = []
+    n = 1000
+    while n <= maximo:
+        tamanos.append(n)
+        n *= 2
+
+    print(f"{'sentencias':>10} {'tiempo (ms)':>12} {'us/sentencia':>13}")
+    for n in tamanos:
+        tiempo = medir(generar_programa(n))
+        print(f"{n:>10} {tiempo * 1000:>12.1f} {tiempo * 1e6 / n:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
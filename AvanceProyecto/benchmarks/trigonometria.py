@@ -0,0 +1,163 @@
+"""
+Benchmark de sin, cos y tan en línea (--inline-math).
+
+Compila un programa que recorre un intervalo de valores de x e imprime
+f(x), con la llamada a libm (nivel 0) y con los polinomios de cada nivel,
+y lo ejecuta en el simulador de mv/mv1.py. Compara cada resultado con
+math.sin, math.cos y math.tan de Python sobre el mismo x en precisión
+simple: error absoluto máximo para sin y cos, relativo para tan.
+
+Los polinomios solo valen para |x| < TRIG_DOMAIN (10^5); fuera de ese
+dominio, con x infinito o NaN deben devolver NaN. La columna "fuera"
+cuenta los resultados de esas entradas que no son NaN (debe ser 0).
+
+El costo por evaluación es la diferencia con el mismo programa con y = x,
+en instrucciones ejecutadas y en ciclos según un modelo simple de un
+núcleo en orden (CICLOS). El simulador resuelve call en una instrucción,
+así que en el nivel 0 falta el costo del cuerpo de la función de libm.
+
+Uso: python benchmarks/trigonometria.py [valores_por_intervalo]
+"""
+
+import math
+import os
+import sys
+from collections import Counter
+
+DIRECTORIO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRECTORIO)
+sys.path.insert(0, os.path.join(os.path.dirname(DIRECTORIO), 'mv'))
+
+from compiler import Compiler
+from mv1 import RiscVSimulator
+
+# Ciclos por instrucción de un núcleo en orden sencillo; el resto cuesta 1
+CICLOS = {
+    'lw': 2, 'flw': 2, 'mul': 3, 'div': 20, 'rem': 20,
+    'fadd.s': 4, 'fsub.s': 4, 'fmul.s': 4, 'fmadd.s': 4, 'fmsub.s': 4,
+    'fnmadd.s': 4, 'fnmsub.s': 4, 'fcvt.w.s': 2, 'fcvt.s.w': 2, 'fdiv.s': 16,
+}
+
+INTERVALOS = [('[-pi, pi]', -math.pi, math.pi), ('[-100, 100]', -100.0, 100.0),
+              ('[-1e5, 1e5]', -99999.0, 99999.0)]
+
+# Entradas fuera del dominio de los polinomios
+FUERA = [(1e5, 1e9), (-1e9, -2e5), (1e5, 1.001e5)]
+
+FUNCIONES = {'sin': math.sin, 'cos': math.cos, 'tan': math.tan}
+
+PROGRAMA = '''
+var float x;
+var float y;
+var int i;
+for (i = 1; {n}) {{
+  x = {inicio} + i * {paso};
+  y = {expresion};
+  println(x, " ", y);
+}}
+end.
+'''
+
+
+# Infinito, -infinito y NaN
+ESPECIALES = '''
+var float x;
+var float y;
+var float z;
+z = 0.0;
+x = 1.0 / z;
+y = {expresion};
+println(x, " ", y);
+x = 0.0 - x;
+y = {expresion};
+println(x, " ", y);
+x = x - x;
+y = {expresion};
+println(x, " ", y);
+end.
+'''
+
+
+class Simulador(RiscVSimulator):
+    """Simulador que cuenta cuántas veces se ejecuta cada mnemónico"""
+
+    def run(self, *args, **kwargs):
+        self.mnemonicos = Counter()
+        return super().run(*args, **kwargs)
+
+    def execute_instruction(self, instruction):
+        self.mnemonicos[instruction.split(None, 1)[0]] += 1
+        super().execute_instruction(instruction)
+
+
+def ejecutar(expresion, inicio, fin, n, nivel):
+    """Devuelve los pares (x, y) impresos y el contador de mnemónicos"""
+    paso = (fin - inicio) / n
+    return simular(PROGRAMA.format(n=n, inicio=inicio, paso=paso, expresion=expresion), nivel)
+
+
+def simular(codigo, nivel):
+    """Compila y ejecuta codigo; pares (x, y) impresos y contador de mnemónicos"""
+    resultado = Compiler(lexer='regex', inline_math=nivel).build(codigo)
+    if not resultado.ok:
+        raise SystemExit(resultado.error)
+    simulador = Simulador()
+    simulador.load_program(resultado.assembly)
+    simulador.run()
+    pares = [tuple(map(float, linea.split()))
+             for linea in ''.join(simulador.output).splitlines() if linea]
+    return pares, simulador.mnemonicos
+
+
+def error_maximo(funcion, pares):
+    """Error absoluto máximo (relativo para tan) frente a math"""
+    referencia = FUNCIONES[funcion]
+    errores = []
+    for x, y in pares:
+        esperado = referencia(x)
+        error = abs(y - esperado)
+        errores.append(error / abs(esperado) if funcion == 'tan' and esperado else error)
+    return max(errores)
+
+
+def fuera_del_dominio(funcion, n, nivel):
+    """Resultados que no son NaN con x fuera del dominio, infinito o NaN"""
+    pares = simular(ESPECIALES.format(expresion=f"{funcion}(x)"), nivel)[0]
+    for inicio, fin in FUERA:
+        pares += ejecutar(f"{funcion}(x)", inicio, fin, n, nivel)[0]
+    return sum(1 for _, y in pares if not math.isnan(y))
+
+
+def ciclos(mnemonicos):
+    """Ciclos estimados con el modelo CICLOS"""
+    return sum(cantidad * CICLOS.get(nombre, 1) for nombre, cantidad in mnemonicos.items())
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+
+    # Costo del recorrido sin la función, para restarlo
+    _, base = ejecutar('x', INTERVALOS[0][1], INTERVALOS[0][2], n, 0)
+
+    columnas = ''.join(f"{nombre:>14}" for nombre, _, _ in INTERVALOS)
+    print(f"{'función':>8} {'nivel':>6}{columnas} {'fuera':>6} {'instr/eval':>11} "
+          f"{'ciclos/eval':>12}")
+    for funcion in FUNCIONES:
+        for nivel in (0, 1, 2, 3):
+            errores = []
+            for nombre, inicio, fin in INTERVALOS:
+                pares, mnemonicos = ejecutar(f"{funcion}(x)", inicio, fin, n, nivel)
+                errores.append(error_maximo(funcion, pares))
+                if nombre == INTERVALOS[0][0]:
+                    instrucciones = (sum(mnemonicos.values()) - sum(base.values())) / n
+                    costo = (ciclos(mnemonicos) - ciclos(base)) / n
+            errores = ''.join(f"{error:>14.2e}" for error in errores)
+            # libm calcula el valor también fuera del dominio
+            fuera = fuera_del_dominio(funcion, n // 10, nivel) if nivel else '-'
+            libm = ' + libm' if nivel == 0 else ''
+            print(f"{funcion:>8} {nivel or 'libm':>6}{errores} {fuera:>6} {instrucciones:>11.1f} "
+                  f"{costo:>12.1f}{libm}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,13 +7,33 @@ Este compilador convierte programas escritos en una versión simplificada de C
 a código ensamblador para la arquitectura RISC-V de 32 bits (RV32I).
 """
 
+import argparse
+import bisect
+import contextlib
+import glob
+import hashlib
+import io
+import itertools
+import json
+import math
+import operator
+import os
 import re
+import struct
 import sys
+import time
+import tracemalloc
+from array import array
+from concurrent.futures import ProcessPoolExecutor
 from enum import Enum, auto
 
+from assembler import Assembler
+
 class Token:
     """Clase para representar un token del lenguaje"""
     
+    __slots__ = ('type', 'value', 'line')
+    
     def __init__(self, token_type, value, line=None):
         self.type = token_type
         self.value = value
@@ -43,12 +63,18 @@ class TokenType(Enum):
     MINUS = auto()      # '-'
     TIMES = auto()      # '*'
     DIVIDE = auto()     # '/'
+    MOD = auto()        # '%'
     READ = auto()       # 'read'
     PRINT = auto()      # 'print'
     PRINTLN = auto()    # 'println'
     COMMA = auto()      # ','
     FOR = auto()        # 'for'
     EQUALS = auto()     # '=='
+    NOT_EQUALS = auto() # '!='
+    LESS = auto()       # '<'
+    LESS_EQUAL = auto() # '<='
+    GREATER = auto()    # '>'
+    GREATER_EQUAL = auto() # '>='
     END = auto()        # 'end'
     DOT = auto()        # '.'
     SIN = auto()        # 'sin'
@@ -67,8 +93,9 @@ class Lexer:
         self.line = 1
         
     def _remove_comments(self, text):
-        """Elimina comentarios de estilo C (/* */) del texto"""
-        return re.sub(r'/\*.*?\*/', '', text, flags=re.DOTALL)
+        """Elimina comentarios de estilo C (/* */) del texto, conservando sus saltos de línea"""
+        return re.sub(r'/\*.*?\*/', lambda match: '\n' * match.group().count('\n'), text,
+                      flags=re.DOTALL)
     
     def error(self):
         """Lanza un error de análisis léxico"""
@@ -76,13 +103,14 @@ class Lexer:
     
     def advance(self):
         """Avanza un carácter y actualiza current_char"""
+        # La línea cambia al dejar atrás el salto de línea, no al llegar a él
+        if self.current_char == '\n':
+            self.line += 1
         self.pos += 1
         if self.pos >= len(self.text):
             self.current_char = None
         else:
             self.current_char = self.text[self.pos]
-            if self.current_char == '\n':
-                self.line += 1
     
     def peek(self):
         """Mira el siguiente carácter sin avanzar"""
@@ -134,29 +162,9 @@ class Lexer:
             result += self.current_char
             self.advance()
             
-        # Palabras clave
-        if result == 'var':
-            return Token(TokenType.VAR, result, self.line)
-        elif result in ('int', 'float', 'string', 'char'):
-            return Token(TokenType.TYPE, result, self.line)
-        elif result == 'read':
-            return Token(TokenType.READ, result, self.line)
-        elif result == 'print':
-            return Token(TokenType.PRINT, result, self.line)
-        elif result == 'println':
-            return Token(TokenType.PRINTLN, result, self.line)
-        elif result == 'for':
-            return Token(TokenType.FOR, result, self.line)
-        elif result == 'end':
-            return Token(TokenType.END, result, self.line)
-        elif result == 'sin':
-            return Token(TokenType.SIN, result, self.line)
-        elif result == 'cos':
-            return Token(TokenType.COS, result, self.line)
-        elif result == 'tan':
-            return Token(TokenType.TAN, result, self.line)
-        else:
-            return Token(TokenType.IDENTIFIER, result, self.line)
+        # Palabras clave; los lexemas se internan para compartir una sola copia
+        result = sys.intern(result)
+        return Token(KEYWORDS.get(result, TokenType.IDENTIFIER), result, self.line)
     
     def get_next_token(self):
         """Obtiene el siguiente token del texto de entrada"""
@@ -193,6 +201,20 @@ class Lexer:
                     return Token(TokenType.EQUALS, '==', self.line)
                 return Token(TokenType.ASSIGN, '=', self.line)
                 
+            if self.current_char == '!' and self.peek() == '=':
+                self.advance()
+                self.advance()
+                return Token(TokenType.NOT_EQUALS, '!=', self.line)
+                
+            if self.current_char in '<>':
+                char = self.current_char
+                self.advance()
+                # Verificar si es '<=' / '>=' o solo '<' / '>'
+                if self.current_char == '=':
+                    self.advance()
+                    return Token(SYMBOLS[char + '='], char + '=', self.line)
+                return Token(SYMBOLS[char], char, self.line)
+                
             if self.current_char == '(':
                 char = self.current_char
                 self.advance()
@@ -233,6 +255,11 @@ class Lexer:
                 self.advance()
                 return Token(TokenType.DIVIDE, char, self.line)
                 
+            if self.current_char == '%':
+                char = self.current_char
+                self.advance()
+                return Token(TokenType.MOD, char, self.line)
+                
             if self.current_char == ',':
                 char = self.current_char
                 self.advance()
@@ -248,38 +275,324 @@ class Lexer:
         # Fin de archivo
         return Token(TokenType.EOF, None, self.line)
 
+# Palabras clave del lenguaje y su tipo de token
+KEYWORDS = {
+    'var': TokenType.VAR,
+    'int': TokenType.TYPE,
+    'float': TokenType.TYPE,
+    'string': TokenType.TYPE,
+    'char': TokenType.TYPE,
+    'read': TokenType.READ,
+    'print': TokenType.PRINT,
+    'println': TokenType.PRINTLN,
+    'for': TokenType.FOR,
+    'end': TokenType.END,
+    'sin': TokenType.SIN,
+    'cos': TokenType.COS,
+    'tan': TokenType.TAN,
+}
+
+# Operadores y símbolos y su tipo de token
+SYMBOLS = {
+    ';': TokenType.SEMICOLON,
+    '=': TokenType.ASSIGN,
+    '(': TokenType.LPAREN,
+    ')': TokenType.RPAREN,
+    '{': TokenType.LBRACE,
+    '}': TokenType.RBRACE,
+    '+': TokenType.PLUS,
+    '-': TokenType.MINUS,
+    '*': TokenType.TIMES,
+    '/': TokenType.DIVIDE,
+    '%': TokenType.MOD,
+    ',': TokenType.COMMA,
+    '.': TokenType.DOT,
+    '==': TokenType.EQUALS,
+    '!=': TokenType.NOT_EQUALS,
+    '<': TokenType.LESS,
+    '<=': TokenType.LESS_EQUAL,
+    '>': TokenType.GREATER,
+    '>=': TokenType.GREATER_EQUAL,
+}
+
+# Expresión regular maestra: cada coincidencia salta espacios y comentarios
+# (grupo 1) y reconoce un lexema completo en el grupo correspondiente.
+TOKEN_REGEX = re.compile(r'''
+    (\s*(?:/\*.*?\*/\s*)*)     # espacios y comentarios
+    (?:
+        ([^\W\d]\w*)            # identificadores y palabras clave
+      | "([^"]*)"              # cadenas
+      | ("|/\*)                # cadena o comentario sin cerrar
+      | (==|!=|<=|>=|[;=(){}+\-*/%,.<>])  # operadores y símbolos
+      | (\d+(?:\.\d*)?)         # números enteros o flotantes
+      | (.)                    # carácter inesperado
+      | \Z                     # fin de archivo
+    )''', re.VERBOSE | re.DOTALL)
+
+class RegexLexer:
+    """Analizador léxico basado en una única expresión regular compilada"""
+
+    def __init__(self, text, pos=0, line=1):
+        # Los comentarios se saltan durante el análisis, sin copiar el texto
+        self.text = text
+        self.line = line
+        # Inicio y fin del último lexema reconocido
+        self.start = self.pos = pos
+        self._tokens = self._tokenize()
+
+    def error(self, message):
+        """Lanza un error de análisis léxico"""
+        raise Exception(f'Error léxico: {message} en línea {self.line}')
+
+    def _tokenize(self):
+        """Genera los tokens del texto reconociendo lexemas completos"""
+        line = self.line
+        keywords = KEYWORDS
+        symbols = SYMBOLS
+        intern = sys.intern
+        for match in TOKEN_REGEX.finditer(self.text, self.pos):
+            skipped, name, string, unclosed, symbol, number, other = match.groups()
+            if '\n' in skipped:
+                line += skipped.count('\n')
+            self.start = match.end(1)
+            self.pos = match.end()
+
+            if name is not None:
+                name = intern(name)
+                yield Token(keywords.get(name, TokenType.IDENTIFIER), name, line)
+            elif symbol is not None:
+                yield Token(symbols[symbol], symbol, line)
+            elif number is not None:
+                value = float(number) if '.' in number else int(number)
+                yield Token(TokenType.NUMBER, value, line)
+            elif string is not None:
+                yield Token(TokenType.STRING, string, line)
+                line += string.count('\n')
+            else:
+                self.line = line
+                if unclosed == '"':
+                    self.error('cadena sin cerrar')
+                if unclosed is not None:
+                    self.error('comentario sin cerrar')
+                if other is not None:
+                    self.error(f'carácter inesperado "{other}"')
+                return
+
+    def get_next_token(self):
+        """Obtiene el siguiente token del texto de entrada"""
+        token = next(self._tokens, None)
+        if token is None:
+            # Fin de archivo
+            return Token(TokenType.EOF, None, self.line)
+        return token
+
+# Tamaño del bloque que lee el analizador léxico por flujo (64 KiB)
+STREAM_CHUNK_SIZE = 64 * 1024
+
+WHITESPACE_REGEX = re.compile(r'\s+')
+
+class StreamingLexer(RegexLexer):
+    """
+    Analizador léxico por flujo: lee la fuente por bloques y solo conserva
+    una ventana pequeña del texto, saltando los comentarios al vuelo.
+    """
+
+    def __init__(self, source, chunk_size=STREAM_CHUNK_SIZE):
+        # source puede ser un archivo abierto en modo texto o una cadena
+        if isinstance(source, str):
+            source = io.StringIO(source)
+        self.source = source
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        super().__init__('')
+
+    def _fill(self):
+        """Descarta el texto ya consumido y lee el siguiente bloque"""
+        chunk = self.source.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+
+    def _skip(self, line):
+        """Salta espacios y comentarios; devuelve la línea actualizada"""
+        while True:
+            buffer = self.buffer
+            match = WHITESPACE_REGEX.match(buffer, self.pos)
+            if match:
+                line += buffer.count('\n', self.pos, match.end())
+                self.pos = match.end()
+
+            if self.pos >= len(buffer) or buffer[self.pos] == '/' and self.pos + 1 == len(buffer):
+                # No se puede decidir sin más texto
+                if self.eof:
+                    return line
+                self._fill()
+                continue
+
+            if not buffer.startswith('/*', self.pos):
+                return line
+
+            end = buffer.find('*/', self.pos + 2)
+            if end >= 0:
+                line += buffer.count('\n', self.pos, end)
+                self.pos = end + 2
+            elif not self.eof:
+                # Comentario más largo que la ventana: descartar lo leído
+                # conservando el último carácter por si es el '*' de cierre
+                line += buffer.count('\n', self.pos, len(buffer) - 1)
+                self.buffer = '/*' + buffer[-1] if len(buffer) - self.pos > 2 else '/*'
+                self.pos = 0
+                self._fill()
+            else:
+                # Comentario sin cerrar: se reporta al reconocer el lexema
+                return line
+
+    def _tokenize(self):
+        """Genera los tokens leyendo la fuente bloque por bloque"""
+        line = 1
+        keywords = KEYWORDS
+        symbols = SYMBOLS
+        intern = sys.intern
+        self._fill()
+        while True:
+            line = self._skip(line)
+            match = TOKEN_REGEX.match(self.buffer, self.pos)
+            if not self.eof and (match.end() == len(self.buffer) or match.group(4) is not None):
+                # El lexema podría continuar en el siguiente bloque
+                self._fill()
+                continue
+            self.pos = match.end()
+
+            skipped, name, string, unclosed, symbol, number, other = match.groups()
+            if name is not None:
+                name = intern(name)
+                yield Token(keywords.get(name, TokenType.IDENTIFIER), name, line)
+            elif symbol is not None:
+                yield Token(symbols[symbol], symbol, line)
+            elif number is not None:
+                value = float(number) if '.' in number else int(number)
+                yield Token(TokenType.NUMBER, value, line)
+            elif string is not None:
+                yield Token(TokenType.STRING, string, line)
+                line += string.count('\n')
+            else:
+                self.line = line
+                if unclosed == '"':
+                    self.error('cadena sin cerrar')
+                if unclosed is not None:
+                    self.error('comentario sin cerrar')
+                if other is not None:
+                    self.error(f'carácter inesperado "{other}"')
+                return
+
+# Motores de análisis léxico disponibles
+LEXERS = {
+    'char': Lexer,
+    'regex': RegexLexer,
+    'stream': StreamingLexer,
+}
+
+# Tipos de token indexados por su código en el búfer columnar
+TOKEN_TYPES = list(TokenType)
+TOKEN_TYPE_CODES = {token_type: code for code, token_type in enumerate(TOKEN_TYPES)}
+
+class TokenBuffer:
+    """
+    Búfer columnar de tokens: guarda en arreglos paralelos el código de tipo,
+    el índice del valor en una tabla de valores distintos y la línea de cada
+    token. Expone get_next_token() para que el Parser lo consuma como un lexer.
+    """
+
+    def __init__(self):
+        self.types = array('B')
+        self.values = array('I')
+        self.lines = array('I')
+        self.constants = []      # Valores distintos de los tokens
+        self._constant_index = {}
+        self.pos = 0             # Siguiente token a entregar
+
+    @classmethod
+    def from_lexer(cls, lexer):
+        """Construye el búfer consumiendo todos los tokens del lexer"""
+        buffer = cls()
+        while True:
+            token = lexer.get_next_token()
+            buffer.append(token)
+            if token.type == TokenType.EOF:
+                return buffer
+
+    def append(self, token):
+        """Añade un token al final del búfer"""
+        # El tipo forma parte de la clave para no confundir 1 con 1.0
+        key = (token.value.__class__, token.value)
+        index = self._constant_index.get(key)
+        if index is None:
+            index = len(self.constants)
+            self.constants.append(token.value)
+            self._constant_index[key] = index
+
+        self.types.append(TOKEN_TYPE_CODES[token.type])
+        self.values.append(index)
+        self.lines.append(token.line or 0)
+
+    def __len__(self):
+        return len(self.types)
+
+    def __getitem__(self, index):
+        """Reconstruye el token en la posición indicada"""
+        return Token(TOKEN_TYPES[self.types[index]], self.constants[self.values[index]],
+                     self.lines[index])
+
+    def get_next_token(self):
+        """Entrega el siguiente token del búfer"""
+        if self.pos >= len(self.types):
+            # Fin del búfer: repetir el último token (EOF)
+            return self[len(self.types) - 1]
+        token = self[self.pos]
+        self.pos += 1
+        return token
+
+class TokenStream:
+    """Fuente de tokens sobre una lista ya analizada, con posición ajustable"""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def get_next_token(self):
+        """Entrega el siguiente token de la lista"""
+        if self.pos >= len(self.tokens):
+            # Fin de la lista: repetir el último token (EOF)
+            return self.tokens[-1]
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
 class SymbolTable:
     """Tabla de símbolos para el compilador"""
     
     def __init__(self):
         self.symbols = {}
-        self.float_reg_idx = 0  # Índice para registros float (ft0-ft31)
-        self.int_reg_idx = 0    # Índice para registros int (t0-t6, a0-a7)
+        self.float_reg_idx = 0  # Índice para registros virtuales float (%fv0, %fv1...)
+        self.int_reg_idx = 0    # Índice para registros virtuales int (%iv0, %iv1...)
+        self.reset_temps()
         
     def add_variable(self, name, type_name):
         """Añade una variable a la tabla de símbolos"""
         if name in self.symbols:
             raise Exception(f"Error semántico: Variable '{name}' ya declarada")
         
-        # Asignar un registro apropiado según el tipo
+        # Asignar un registro virtual según el tipo; el registro físico
+        # (o la posición en la pila) lo elige después RegisterAllocator
         register = None
         if type_name == 'float':
-            register = f"ft{self.float_reg_idx}"
+            register = f"%fv{self.float_reg_idx}"
             self.float_reg_idx += 1
-            # Verificar si hemos agotado los registros float disponibles
-            if self.float_reg_idx > 31:
-                # Implementar manejo de "spilling" si se desea (guardar en memoria)
-                raise Exception("Error: Se han agotado los registros de punto flotante")
         elif type_name in ('int', 'char'):
-            # Usar registros temporales t0-t6 (7 registros)
-            if self.int_reg_idx < 7:
-                register = f"t{self.int_reg_idx}"
-            # Luego usar registros de argumento a0-a7 (8 registros)
-            elif self.int_reg_idx < 15:
-                register = f"a{self.int_reg_idx - 7}"
-            else:
-                # Implementar manejo de "spilling" si se desea (guardar en memoria)
-                raise Exception("Error: Se han agotado los registros de entero")
+            register = f"%iv{self.int_reg_idx}"
             self.int_reg_idx += 1
         elif type_name == 'string':
             # Para strings, vamos a usar un puntero en un registro
@@ -300,18 +613,455 @@ class SymbolTable:
         return self.symbols[name]
     
     def get_temp_var(self, type_name):
-        """Crea una variable temporal y la añade a la tabla de símbolos"""
-        name = f"T{len([s for s in self.symbols if s.startswith('T')])}"
-        return self.add_variable(name, type_name)
+        """Toma un registro virtual temporal del pool en O(1).
+        
+        Los temporales no se guardan en la tabla de símbolos, así que no
+        chocan con variables del usuario (por ejemplo una llamada 'T0').
+        """
+        kind = 'f' if type_name == 'float' else 'i'
+        free = self.temp_pool[kind]
+        if free:
+            register = free.pop()
+        else:
+            register = f"%{kind}t{self.temp_count[kind]}"
+            self.temp_count[kind] += 1
+        self.live_temps.append((kind, register))
+        return {'type': type_name, 'register': register}
+    
+    def reset_temps(self):
+        """Vacía el pool de temporales"""
+        self.temp_pool = {'i': [], 'f': []}
+        self.temp_count = {'i': 0, 'f': 0}
+        self.live_temps = []
+        self.pinned = set()    # Temporales que siguen vivos entre sentencias
+    
+    def temp_mark(self):
+        """Marca la cantidad de temporales vivos antes de una sentencia"""
+        return len(self.live_temps)
+    
+    def release_temps(self, mark=0):
+        """Libera los temporales tomados desde la marca para reutilizarlos.
+        
+        Se devuelven en orden inverso, así el pool queda igual que antes
+        de la sentencia.
+        """
+        live = self.live_temps
+        while len(live) > mark:
+            kind, register = live.pop()
+            if register not in self.pinned:
+                self.temp_pool[kind].append(register)
+    
+    def pin(self, register):
+        """Evita que un temporal vuelva al pool al terminar su sentencia"""
+        self.pinned.add(register)
+    
+    def unpin(self, register):
+        """Devuelve un temporal fijado; se libera al terminar la sentencia actual"""
+        self.pinned.discard(register)
+        entry = (register[1], register)
+        if entry not in self.live_temps:
+            self.live_temps.append(entry)
+
+# Nodos del árbol de sintaxis abstracta (AST).
+# Las expresiones guardan su tipo, calculado durante el análisis sintáctico.
+
+class Node:
+    """Nodo base del AST"""
+    
+    __slots__ = ('line',)
+
+class Program(Node):
+    """Programa completo: declaraciones e instrucciones"""
+    
+    __slots__ = ('declarations', 'statements')
+    
+    def __init__(self, declarations, statements, line=None):
+        self.declarations = declarations
+        self.statements = statements
+        self.line = line
+
+class VarDecl(Node):
+    """Declaración de variable: var TYPE IDENTIFIER;"""
+    
+    __slots__ = ('name', 'type_name')
+    
+    def __init__(self, name, type_name, line=None):
+        self.name = name
+        self.type_name = type_name
+        self.line = line
+
+class Assign(Node):
+    """Asignación: IDENTIFIER = expr;"""
+    
+    __slots__ = ('name', 'expr')
+    
+    def __init__(self, name, expr, line=None):
+        self.name = name
+        self.expr = expr
+        self.line = line
+
+class Read(Node):
+    """Lectura: read(IDENTIFIER);"""
+    
+    __slots__ = ('name',)
+    
+    def __init__(self, name, line=None):
+        self.name = name
+        self.line = line
+
+class Print(Node):
+    """Impresión: print(args); o println(args);"""
+    
+    __slots__ = ('args', 'newline')
+    
+    def __init__(self, args, newline, line=None):
+        self.args = args
+        self.newline = newline
+        self.line = line
+
+class For(Node):
+    """Bucle: for (IDENTIFIER = start; end) { body }"""
+    
+    __slots__ = ('name', 'start', 'end', 'body')
+    
+    def __init__(self, name, start, end, body, line=None):
+        self.name = name
+        self.start = start
+        self.end = end
+        self.body = body
+        self.line = line
+
+class Num(Node):
+    """Número literal"""
+    
+    __slots__ = ('value', 'type')
+    
+    def __init__(self, value, line=None):
+        self.value = value
+        self.type = 'float' if isinstance(value, float) else 'int'
+        self.line = line
+
+class Str(Node):
+    """Cadena literal (solo como argumento de print)"""
+    
+    __slots__ = ('value', 'type')
+    
+    def __init__(self, value, line=None):
+        self.value = value
+        self.type = 'string'
+        self.line = line
+
+class Var(Node):
+    """Uso de una variable"""
+    
+    __slots__ = ('name', 'type')
+    
+    def __init__(self, name, type_name, line=None):
+        self.name = name
+        self.type = type_name
+        self.line = line
+
+class BinOp(Node):
+    """Operación binaria: left op right"""
+    
+    __slots__ = ('op', 'left', 'right', 'type')
+    
+    def __init__(self, op, left, right, line=None):
+        self.op = op
+        self.left = left
+        self.right = right
+        self.type = get_result_type(op, left.type, right.type)
+        self.line = line
+
+class UnaryOp(Node):
+    """Operación unaria: op operand (el menos)"""
+    
+    __slots__ = ('op', 'operand', 'type')
+    
+    def __init__(self, op, operand, line=None):
+        self.op = op
+        self.operand = operand
+        self.type = operand.type
+        self.line = line
+
+class MathCall(Node):
+    """Llamada a función matemática: sin, cos o tan"""
+    
+    __slots__ = ('func', 'arg', 'type')
+    
+    def __init__(self, func, arg, line=None):
+        self.func = func
+        self.arg = arg
+        self.type = 'float'
+        self.line = line
+
+# Operadores de comparación: producen 1 si se cumplen y 0 si no
+COMPARISON_OPERATORS = {
+    '<': operator.lt,
+    '>': operator.gt,
+    '<=': operator.le,
+    '>=': operator.ge,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+def get_result_type(op, left_type, right_type):
+    """Determina el tipo de resultado para una operación binaria"""
+    if op in COMPARISON_OPERATORS:
+        return 'int'
+    if op == '%':
+        if left_type == 'float' or right_type == 'float':
+            raise Exception("Error semántico: El operador % requiere operandos enteros")
+        return 'int'
+    # Reglas de promoción de tipos
+    if left_type == 'float' or right_type == 'float':
+        return 'float'
+    elif op == '/' and left_type == 'int' and right_type == 'int':
+        # División de enteros produce flotante según las reglas especificadas
+        return 'float'
+    else:
+        return 'int'
+
+def get_operand_type(op, left_type, right_type):
+    """Tipo al que se convierten los operandos antes de operar"""
+    if op in COMPARISON_OPERATORS:
+        # Se compara como float si alguno de los dos lo es
+        return 'float' if 'float' in (left_type, right_type) else 'int'
+    return get_result_type(op, left_type, right_type)
+
+def assigned_names(node):
+    """Variables que una instrucción puede modificar"""
+    if isinstance(node, (Assign, Read)):
+        return {node.name}
+    if isinstance(node, For):
+        names = {node.name}
+        for statement in node.body:
+            names |= assigned_names(statement)
+        return names
+    return set()
+
+def statement_expressions(node):
+    """Expresiones que evalúa una instrucción, incluidas las de un cuerpo de for"""
+    if isinstance(node, Assign):
+        yield node.expr
+    elif isinstance(node, Print):
+        for arg in node.args:
+            if not isinstance(arg, Str):
+                yield arg
+    elif isinstance(node, For):
+        yield node.start
+        yield node.end
+        for statement in node.body:
+            yield from statement_expressions(statement)
+
+def to_float32(value):
+    """Redondea un valor a float de 32 bits como lo hace RV32F"""
+    return struct.unpack('f', struct.pack('f', value))[0]
+
+def to_int32(value):
+    """Reduce un entero a 32 bits con signo (desbordamiento como en RV32I)"""
+    value &= 0xFFFFFFFF
+    return value - 0x100000000 if value & 0x80000000 else value
+
+def convert_constant(value, current_type, target_type):
+    """Convierte una constante como fcvt.s.w / fcvt.w.s (rtz); None si no se puede"""
+    if target_type == 'float':
+        # Los literales float también se redondean a 32 bits al cargarse
+        try:
+            return to_float32(float(value))
+        except OverflowError:
+            return None
+    if current_type == target_type:
+        return value
+    if target_type == 'int' and math.isfinite(value):
+        return max(-2**31, min(2**31 - 1, math.trunc(value)))
+    return None
+
+def fold_binary(op, left, left_type, right, right_type):
+    """
+    Calcula en tiempo de compilación left op right con las reglas de
+    get_result_type y la aritmética de 32 bits de RISC-V. Devuelve None si
+    el resultado depende de la ejecución (división entre cero, inf o nan).
+    """
+    result_type = get_result_type(op, left_type, right_type)
+    operand_type = get_operand_type(op, left_type, right_type)
+    left = convert_constant(left, left_type, operand_type)
+    right = convert_constant(right, right_type, operand_type)
+    if left is None or right is None:
+        return None
+    if op in COMPARISON_OPERATORS:
+        value = int(COMPARISON_OPERATORS[op](left, right))
+    elif op == '%' and right != 0:
+        # Resto con el signo del dividendo, como rem
+        quotient = abs(left) // abs(right)
+        value = left - right * (quotient if (left < 0) == (right < 0) else -quotient)
+    elif op == '+':
+        value = left + right
+    elif op == '-':
+        value = left - right
+    elif op == '*':
+        value = left * right
+    elif op == '/' and result_type == 'float' and right != 0:
+        value = left / right
+    else:
+        # División o resto entre cero; int / int no ocurre (produce float)
+        return None
+    
+    if result_type == 'int':
+        return to_int32(value)
+    try:
+        value = to_float32(value)
+    except OverflowError:
+        return None
+    return value if math.isfinite(value) else None
+
+class ConstantFolder:
+    """
+    Plegado y propagación de constantes sobre el AST. Reemplaza las
+    operaciones entre literales por su resultado y las variables cuyo
+    valor se conoce por un literal. Los nodos originales no se modifican,
+    porque la compilación incremental los reutiliza.
+    """
+
+    def __init__(self, symbol_table):
+        self.symbol_table = symbol_table
+        self.constants = {}     # Variable -> (valor, tipo) conocido
+        # Huella del diccionario (xor de sus entradas) para comparar estados
+        self.fingerprint = 0
+        # Si es una lista, registra los cambios (variable, entrada)
+        self.log = None
+
+    def set(self, name, entry):
+        """Cambia el valor conocido de una variable (None si es desconocido)"""
+        old = self.constants.get(name)
+        if self._key(name, old) == self._key(name, entry):
+            return
+        if old is not None:
+            self.fingerprint ^= hash(self._key(name, old))
+        if entry is None:
+            del self.constants[name]
+        else:
+            self.constants[name] = entry
+            self.fingerprint ^= hash(self._key(name, entry))
+        if self.log is not None:
+            self.log.append((name, entry))
+
+    def _key(self, name, entry):
+        """Clave de una entrada que distingue 0.0 de -0.0"""
+        if entry is None:
+            return None
+        value, type_name = entry
+        if type_name == 'float':
+            value = struct.pack('f', value)
+        return (name, value, type_name)
+
+    def apply(self, changes):
+        """Repite cambios registrados por otra compilación"""
+        for name, entry in changes:
+            self.set(name, entry)
+
+    def fold(self, node):
+        """Pliega una instrucción y actualiza los valores conocidos"""
+        if isinstance(node, Assign):
+            expr = self.fold_expr(node.expr)
+            var_type = self.symbol_table.lookup(node.name)['type']
+            entry = None
+            if isinstance(expr, Num) and var_type in ('int', 'float'):
+                value = convert_constant(expr.value, expr.type, var_type)
+                if value is not None:
+                    expr = Num(value, expr.line)
+                    entry = (value, var_type)
+            self.set(node.name, entry)
+            return node if expr is node.expr else Assign(node.name, expr, node.line)
+        if isinstance(node, Read):
+            self.set(node.name, None)
+            return node
+        if isinstance(node, Print):
+            args = [self.fold_expr(arg) for arg in node.args]
+            return Print(args, node.newline, node.line)
+        if isinstance(node, For):
+            start = self.fold_expr(node.start)
+            # El valor final se evalúa después de asignar el inicial
+            var_type = self.symbol_table.lookup(node.name)['type']
+            entry = None
+            if isinstance(start, Num) and var_type in ('int', 'float'):
+                value = convert_constant(start.value, start.type, var_type)
+                if value is not None:
+                    entry = (value, var_type)
+            self.set(node.name, entry)
+            end = self.fold_expr(node.end)
+            # Lo que se modifica en el cuerpo no se conoce al entrar ni al salir
+            assigned = assigned_names(node)
+            for name in assigned:
+                self.set(name, None)
+            body = [self.fold(statement) for statement in node.body]
+            for name in assigned:
+                self.set(name, None)
+            return For(node.name, start, end, body, node.line)
+        return node
+
+    def fold_expr(self, node):
+        """Pliega una expresión; devuelve el mismo nodo si no cambia"""
+        if isinstance(node, Var):
+            entry = self.constants.get(node.name)
+            if entry is not None:
+                return Num(entry[0], node.line)
+            return node
+        if isinstance(node, BinOp):
+            left = self.fold_expr(node.left)
+            right = self.fold_expr(node.right)
+            if isinstance(left, Num) and isinstance(right, Num):
+                value = fold_binary(node.op, left.value, left.type, right.value, right.type)
+                if value is not None:
+                    return Num(value, node.line)
+            if left is node.left and right is node.right:
+                return node
+            return BinOp(node.op, left, right, node.line)
+        if isinstance(node, UnaryOp):
+            operand = self.fold_expr(node.operand)
+            if isinstance(operand, Num):
+                value = -operand.value
+                return Num(to_int32(value) if operand.type == 'int' else value, node.line)
+            return node if operand is node.operand else UnaryOp(node.op, operand, node.line)
+        if isinstance(node, MathCall):
+            # sin/cos/tan se dejan a la biblioteca para no cambiar su redondeo
+            arg = self.fold_expr(node.arg)
+            return node if arg is node.arg else MathCall(node.func, arg, node.line)
+        return node
+
+# Poder de enlace de los operadores binarios: a mayor número, mayor
+# precedencia. Todos asocian por la izquierda.
+BINDING_POWERS = {
+    TokenType.EQUALS: 10,
+    TokenType.NOT_EQUALS: 10,
+    TokenType.LESS: 20,
+    TokenType.LESS_EQUAL: 20,
+    TokenType.GREATER: 20,
+    TokenType.GREATER_EQUAL: 20,
+    TokenType.PLUS: 30,
+    TokenType.MINUS: 30,
+    TokenType.TIMES: 40,
+    TokenType.DIVIDE: 40,
+    TokenType.MOD: 40,
+}
+
+# Operadores prefijos: enlazan más fuerte que cualquier binario
+PREFIX_BINDING_POWERS = {
+    TokenType.MINUS: 50,
+}
 
 class Parser:
-    """Analizador sintáctico para el compilador"""
+    """Analizador sintáctico: construye el AST del programa"""
     
-    def __init__(self, lexer):
+    def __init__(self, lexer, max_errors=1):
         self.lexer = lexer
         self.current_token = self.lexer.get_next_token()
         self.symbol_table = SymbolTable()
-        self.code_generator = CodeGenerator(self.symbol_table)
+        # Errores a reunir antes de detenerse. Con 1 se lanza el primero tal
+        # cual; con más se recupera en modo pánico y al final se lanza una
+        # excepción con la lista completa en su atributo errors
+        self.max_errors = max_errors
+        self.errors = []
     
     def error(self, expected_type=None):
         token_str = f"'{self.current_token.value}'" if self.current_token.value else self.current_token.type.name
@@ -320,6 +1070,84 @@ class Parser:
         else:
             raise Exception(f"Error de sintaxis: Token inesperado {token_str} en línea {self.current_token.line}")
     
+    def recover(self, error, start_token):
+        """
+        Registra un error y salta tokens hasta un punto seguro para seguir
+        analizando. Los errores léxicos detienen el análisis: el lexer no
+        puede continuar después de ellos.
+        """
+        if str(error).startswith('Error léxico'):
+            self.stop(error)
+        self.record(error)
+        self.synchronize(start_token)
+    
+    def stop(self, error):
+        """Agrega un error léxico a los ya reunidos y detiene el análisis"""
+        if self.max_errors <= 1:
+            raise error
+        self.errors.append(error)
+        raise self.collected_errors()
+    
+    def advance(self):
+        """
+        Pasa al siguiente token mientras se recupera de un error. Si el lexer
+        falla, el error léxico se agrega a los anteriores en vez de
+        reemplazarlos.
+        """
+        try:
+            self.current_token = self.lexer.get_next_token()
+        except Exception as e:
+            self.stop(e)
+    
+    def record(self, error):
+        """Agrega un error a la lista; lanza si se alcanza el límite"""
+        if self.max_errors <= 1:
+            raise error
+        if not hasattr(error, 'line'):
+            # Errores semánticos: la línea del token actual
+            error.line = self.current_token.line
+        self.errors.append(error)
+        if len(self.errors) >= self.max_errors:
+            self.errors.append(Exception(f"Demasiados errores ({self.max_errors}): análisis "
+                                         f"detenido en línea {self.current_token.line}"))
+            raise self.collected_errors()
+    
+    def synchronize(self, start_token):
+        """
+        Modo pánico: salta tokens hasta después de un ';', o hasta un '}',
+        'var' o 'end'. Un bloque { } que empieza mientras se salta se
+        descarta completo, y en un for roto no cuenta el ';' de su cabecera,
+        así no quedan sueltos el resto de la cabecera ni su '}'.
+        """
+        depth = 0
+        # Avanzar al menos un token si el error fue en el primero
+        skip = self.current_token is start_token
+        header = start_token.type == TokenType.FOR
+        while True:
+            token_type = self.current_token.type
+            if token_type in (TokenType.EOF, TokenType.END):
+                return
+            if not skip and depth == 0 and token_type in (TokenType.RBRACE, TokenType.VAR):
+                return
+            skip = False
+            self.advance()
+            if token_type == TokenType.LBRACE:
+                depth += 1
+            elif token_type == TokenType.RBRACE and depth:
+                depth -= 1
+                if depth == 0:
+                    return
+            elif token_type == TokenType.RPAREN and header:
+                header = False
+            elif token_type == TokenType.SEMICOLON and depth == 0 and not header:
+                return
+    
+    def collected_errors(self):
+        """Excepción con todos los errores reunidos en su atributo errors"""
+        error = Exception(str(self.errors[0]))
+        error.errors = list(self.errors)
+        return error
+    
     def eat(self, token_type):
         """Consume el token actual si coincide con el tipo esperado"""
         if self.current_token.type == token_type:
@@ -331,35 +1159,53 @@ class Parser:
         """
         program : declaration_list statement_list END DOT
         """
-        # Sección inicial del código ensamblador
-        self.code_generator.emit_program_header()
+        line = self.current_token.line
         
         # Procesar declaraciones de variables
-        self.declaration_list()
+        declarations = self.declaration_list()
         
         # Procesar instrucciones
-        self.statement_list()
+        statements = self.statement_list()
+        while self.current_token.type == TokenType.RBRACE and self.max_errors > 1:
+            # '}' sin abrir: registrarlo y seguir con las instrucciones
+            try:
+                self.error(TokenType.END)
+            except Exception as e:
+                self.record(e)
+            self.advance()
+            statements += self.statement_list()
         
         # Fin del programa
-        self.eat(TokenType.END)
-        self.eat(TokenType.DOT)
-        
-        # Sección final del código ensamblador
-        self.code_generator.emit_program_footer()
+        try:
+            self.eat(TokenType.END)
+            self.eat(TokenType.DOT)
+        except Exception as e:
+            if self.max_errors <= 1:
+                raise
+            self.errors.append(e)
+        if self.errors:
+            raise self.collected_errors()
         
-        return self.code_generator.get_code()
+        return Program(declarations, statements, line)
     
     def declaration_list(self):
         """
         declaration_list : (variable_declaration)*
         """
+        declarations = []
         while self.current_token.type == TokenType.VAR:
-            self.variable_declaration()
+            start_token = self.current_token
+            try:
+                declarations.append(self.variable_declaration())
+            except Exception as e:
+                self.recover(e, start_token)
+        return declarations
     
     def variable_declaration(self):
         """
         variable_declaration : VAR TYPE IDENTIFIER SEMICOLON
         """
+        line = self.current_token.line
         self.eat(TokenType.VAR)
         
         type_token = self.current_token
@@ -372,13 +1218,21 @@ class Parser:
         self.symbol_table.add_variable(var_name, type_token.value)
         
         self.eat(TokenType.SEMICOLON)
+        
+        return VarDecl(var_name, type_token.value, line)
     
     def statement_list(self):
         """
         statement_list : (statement)*
         """
-        while self.current_token.type not in (TokenType.END, TokenType.EOF):
-            self.statement()
+        statements = []
+        while self.current_token.type not in (TokenType.END, TokenType.EOF, TokenType.RBRACE):
+            start_token = self.current_token
+            try:
+                statements.append(self.statement())
+            except Exception as e:
+                self.recover(e, start_token)
+        return statements
     
     def statement(self):
         """
@@ -389,15 +1243,15 @@ class Parser:
                   | for_statement
         """
         if self.current_token.type == TokenType.IDENTIFIER:
-            self.assignment_statement()
+            return self.assignment_statement()
         elif self.current_token.type == TokenType.READ:
-            self.read_statement()
+            return self.read_statement()
         elif self.current_token.type == TokenType.PRINT:
-            self.print_statement()
+            return self.print_statement()
         elif self.current_token.type == TokenType.PRINTLN:
-            self.println_statement()
+            return self.println_statement()
         elif self.current_token.type == TokenType.FOR:
-            self.for_statement()
+            return self.for_statement()
         else:
             self.error()
     
@@ -405,27 +1259,26 @@ class Parser:
         """
         assignment_statement : IDENTIFIER ASSIGN expr SEMICOLON
         """
+        line = self.current_token.line
         var_name = self.current_token.value
         self.eat(TokenType.IDENTIFIER)
         
         # Verificar que la variable esté declarada
-        var_info = self.symbol_table.lookup(var_name)
+        self.symbol_table.lookup(var_name)
         
         self.eat(TokenType.ASSIGN)
         
-        # Evaluar la expresión y obtener su tipo y registro temporal
-        expr_result = self.expr()
-        
-        # Generar código para la asignación
-        self.code_generator.emit_assignment(var_name, var_info['register'], var_info['type'],
-                                          expr_result['register'], expr_result['type'])
+        expr = self.expr()
         
         self.eat(TokenType.SEMICOLON)
+        
+        return Assign(var_name, expr, line)
     
     def read_statement(self):
         """
         read_statement : READ LPAREN IDENTIFIER RPAREN SEMICOLON
         """
+        line = self.current_token.line
         self.eat(TokenType.READ)
         self.eat(TokenType.LPAREN)
         
@@ -433,87 +1286,71 @@ class Parser:
         self.eat(TokenType.IDENTIFIER)
         
         # Verificar que la variable esté declarada
-        var_info = self.symbol_table.lookup(var_name)
-        
-        # Generar código para la lectura
-        self.code_generator.emit_read(var_name, var_info['register'], var_info['type'])
+        self.symbol_table.lookup(var_name)
         
         self.eat(TokenType.RPAREN)
         self.eat(TokenType.SEMICOLON)
+        
+        return Read(var_name, line)
     
     def print_statement(self):
         """
         print_statement : PRINT LPAREN print_args RPAREN SEMICOLON
         """
+        line = self.current_token.line
         self.eat(TokenType.PRINT)
         self.eat(TokenType.LPAREN)
         
         args = self.print_args()
         
-        # Generar código para la impresión
-        self.code_generator.emit_print(args)
-        
         self.eat(TokenType.RPAREN)
         self.eat(TokenType.SEMICOLON)
+        
+        return Print(args, False, line)
     
     def println_statement(self):
         """
         println_statement : PRINTLN LPAREN print_args RPAREN SEMICOLON
         """
+        line = self.current_token.line
         self.eat(TokenType.PRINTLN)
         self.eat(TokenType.LPAREN)
         
         args = self.print_args()
         
-        # Generar código para la impresión con salto de línea
-        self.code_generator.emit_println(args)
-        
         self.eat(TokenType.RPAREN)
         self.eat(TokenType.SEMICOLON)
+        
+        return Print(args, True, line)
     
     def print_args(self):
         """
         print_args : (STRING | expr) (COMMA (STRING | expr))*
         """
-        args = []
-        
-        # Primera expresión o cadena
-        if self.current_token.type == TokenType.STRING:
-            args.append({
-                'type': 'string',
-                'value': self.current_token.value
-            })
-            self.eat(TokenType.STRING)
-        else:
-            expr_result = self.expr()
-            args.append({
-                'type': expr_result['type'],
-                'register': expr_result['register']
-            })
+        args = [self.print_arg()]
         
         # Expresiones o cadenas adicionales
         while self.current_token.type == TokenType.COMMA:
             self.eat(TokenType.COMMA)
-            
-            if self.current_token.type == TokenType.STRING:
-                args.append({
-                    'type': 'string',
-                    'value': self.current_token.value
-                })
-                self.eat(TokenType.STRING)
-            else:
-                expr_result = self.expr()
-                args.append({
-                    'type': expr_result['type'],
-                    'register': expr_result['register']
-                })
+            args.append(self.print_arg())
         
         return args
     
+    def print_arg(self):
+        """
+        print_arg : STRING | expr
+        """
+        token = self.current_token
+        if token.type == TokenType.STRING:
+            self.eat(TokenType.STRING)
+            return Str(token.value, token.line)
+        return self.expr()
+    
     def for_statement(self):
         """
         for_statement : FOR LPAREN IDENTIFIER ASSIGN expr SEMICOLON expr RPAREN LBRACE statement_list RBRACE
         """
+        line = self.current_token.line
         self.eat(TokenType.FOR)
         self.eat(TokenType.LPAREN)
         
@@ -522,148 +1359,258 @@ class Parser:
         self.eat(TokenType.IDENTIFIER)
         
         # Verificar que la variable esté declarada
-        var_info = self.symbol_table.lookup(var_name)
+        self.symbol_table.lookup(var_name)
         
         self.eat(TokenType.ASSIGN)
         
         # Valor inicial
         start_expr = self.expr()
         
-        # Generar código para la asignación inicial
-        self.code_generator.emit_assignment(var_name, var_info['register'], var_info['type'],
-                                          start_expr['register'], start_expr['type'])
-        
         self.eat(TokenType.SEMICOLON)
         
         # Valor final
         end_expr = self.expr()
         
-        # Generar etiquetas para el bucle
-        loop_start_label = self.code_generator.get_new_label("for_start")
-        loop_end_label = self.code_generator.get_new_label("for_end")
-        
-        # Generar código para el inicio del bucle
-        self.code_generator.emit_for_start(loop_start_label, var_name, var_info['register'], 
-                                         var_info['type'], end_expr['register'], end_expr['type'],
-                                         loop_end_label)
-        
         self.eat(TokenType.RPAREN)
         self.eat(TokenType.LBRACE)
         
         # Cuerpo del bucle
-        self.statement_list()
-        
-        # Generar código para el final del bucle
-        self.code_generator.emit_for_end(loop_start_label, var_name, var_info['register'], 
-                                       var_info['type'])
+        body = self.statement_list()
         
         self.eat(TokenType.RBRACE)
         
-        # Emitir etiqueta de fin de bucle
-        self.code_generator.emit_label(loop_end_label)
+        return For(var_name, start_expr, end_expr, body, line)
     
     def expr(self):
         """
-        expr : term ((PLUS | MINUS) term)*
-        """
-        result = self.term()
+        expr    : prefix* primary (BINOP prefix* primary)*
+        prefix  : MINUS | LPAREN | (SIN | COS | TAN) LPAREN
+        primary : NUMBER | IDENTIFIER
+        (cada prefijo que abre un paréntesis se cierra con su RPAREN)
         
-        while self.current_token.type in (TokenType.PLUS, TokenType.MINUS):
-            token = self.current_token
-            if token.type == TokenType.PLUS:
-                self.eat(TokenType.PLUS)
-                term_result = self.term()
-                result = self.code_generator.emit_binary_op('+', result, term_result)
-            elif token.type == TokenType.MINUS:
-                self.eat(TokenType.MINUS)
-                term_result = self.term()
-                result = self.code_generator.emit_binary_op('-', result, term_result)
-        
-        return result
-    
-    def term(self):
+        Análisis por precedencia de operadores (Pratt) con pilas explícitas
+        en lugar de una función por nivel: la profundidad de los paréntesis
+        no consume la pila de Python. La precedencia sale de BINDING_POWERS y
+        PREFIX_BINDING_POWERS, así que un operador nuevo solo necesita su
+        entrada en la tabla (y su código en CodeGenerator).
         """
-        term : factor ((TIMES | DIVIDE) factor)*
-        """
-        result = self.factor()
+        operands = []
+        # Operadores pendientes: (poder de enlace derecho, token, aridad).
+        # Los paréntesis y las llamadas son marcas de aridad 0 y poder 0,
+        # que solo se cierran con RPAREN.
+        operators = []
+        binding_powers = BINDING_POWERS
+        next_token = self.lexer.get_next_token
         
-        while self.current_token.type in (TokenType.TIMES, TokenType.DIVIDE):
+        while True:
+            # Posición de operando: prefijos, aperturas de paréntesis y primarios
             token = self.current_token
-            if token.type == TokenType.TIMES:
-                self.eat(TokenType.TIMES)
-                factor_result = self.factor()
-                result = self.code_generator.emit_binary_op('*', result, factor_result)
-            elif token.type == TokenType.DIVIDE:
-                self.eat(TokenType.DIVIDE)
-                factor_result = self.factor()
-                result = self.code_generator.emit_binary_op('/', result, factor_result)
-        
-        return result
-    
-    def factor(self):
-        """
-        factor : NUMBER
-               | IDENTIFIER
-               | LPAREN expr RPAREN
-               | (SIN | COS | TAN) LPAREN expr RPAREN
-        """
-        token = self.current_token
-        
-        if token.type == TokenType.NUMBER:
-            self.eat(TokenType.NUMBER)
-            # Determinar el tipo del número
-            type_name = 'float' if isinstance(token.value, float) else 'int'
-            # Generar código para cargar el número
-            temp_var = self.symbol_table.get_temp_var(type_name)
-            self.code_generator.emit_load_constant(temp_var['register'], token.value, type_name)
-            return {'type': type_name, 'register': temp_var['register']}
-            
-        elif token.type == TokenType.IDENTIFIER:
-            var_name = token.value
-            self.eat(TokenType.IDENTIFIER)
-            # Verificar que la variable esté declarada
-            var_info = self.symbol_table.lookup(var_name)
-            return {'type': var_info['type'], 'register': var_info['register']}
-            
-        elif token.type == TokenType.LPAREN:
-            self.eat(TokenType.LPAREN)
-            result = self.expr()
-            self.eat(TokenType.RPAREN)
-            return result
-            
-        elif token.type in (TokenType.SIN, TokenType.COS, TokenType.TAN):
-            func_type = token.type
-            func_name = token.value
-            
-            if func_type == TokenType.SIN:
-                self.eat(TokenType.SIN)
-            elif func_type == TokenType.COS:
-                self.eat(TokenType.COS)
-            elif func_type == TokenType.TAN:
-                self.eat(TokenType.TAN)
-                
-            self.eat(TokenType.LPAREN)
-            arg_result = self.expr()
-            self.eat(TokenType.RPAREN)
-            
-            # Verificar que el argumento sea de tipo float
-            if arg_result['type'] != 'float':
-                raise Exception(f"Error semántico: La función {func_name} requiere un argumento de tipo float")
-            
-            # Generar código para la función matemática
-            temp_var = self.symbol_table.get_temp_var('float')
-            self.code_generator.emit_math_function(func_name, arg_result['register'], temp_var['register'])
+            token_type = token.type
+            if token_type == TokenType.NUMBER:
+                self.current_token = next_token()
+                operands.append(Num(token.value, token.line))
+            elif token_type == TokenType.IDENTIFIER:
+                self.current_token = next_token()
+                # Verificar que la variable esté declarada
+                var_info = self.symbol_table.lookup(token.value)
+                operands.append(Var(token.value, var_info['type'], token.line))
+            elif token_type in PREFIX_BINDING_POWERS:
+                self.current_token = next_token()
+                operators.append((PREFIX_BINDING_POWERS[token_type], token, 1))
+                continue
+            elif token_type == TokenType.LPAREN:
+                self.current_token = next_token()
+                operators.append((0, token, 0))
+                continue
+            elif token_type in (TokenType.SIN, TokenType.COS, TokenType.TAN):
+                self.current_token = next_token()
+                self.eat(TokenType.LPAREN)
+                operators.append((0, token, 0))
+                continue
+            else:
+                self.error()
             
-            return {'type': 'float', 'register': temp_var['register']}
+            # Posición de operador: se reducen los operadores que enlazan
+            # más fuerte que el siguiente y se cierran los paréntesis
+            while True:
+                token = self.current_token
+                power = binding_powers.get(token.type, 0)
+                while operators and power < operators[-1][0]:
+                    self.reduce(operands, operators.pop())
+                if power:
+                    # Asociatividad por la izquierda: el operando derecho enlaza más
+                    self.current_token = next_token()
+                    operators.append((power + 1, token, 2))
+                    break
+                if not operators:
+                    return operands.pop()
+                self.eat(TokenType.RPAREN)
+                _, opener, _ = operators.pop()
+                if opener.type != TokenType.LPAREN:
+                    # Verificar que el argumento sea de tipo float
+                    arg = operands.pop()
+                    if arg.type != 'float':
+                        raise Exception(f"Error semántico: La función {opener.value} requiere un argumento de tipo float")
+                    operands.append(MathCall(opener.value, arg, opener.line))
+    
+    def reduce(self, operands, entry):
+        """Aplica un operador pendiente a los operandos del tope de la pila"""
+        _, token, arity = entry
+        if arity == 2:
+            right = operands.pop()
+            operands.append(BinOp(token.value, operands.pop(), right, token.line))
+            return
+        operand = operands.pop()
+        if isinstance(operand, Num):
+            # Un literal negativo se guarda como literal
+            value = -operand.value
+            operands.append(Num(to_int32(value) if operand.type == 'int' else value, token.line))
         else:
-            self.error()
+            operands.append(UnaryOp(token.value, operand, token.line))
+
+class ValueTable:
+    """
+    Numeración de valores dentro de un bloque básico. Recuerda qué temporal
+    tiene ya el valor de una expresión (o la conversión de un registro a
+    otro tipo) para reutilizarlo en las sentencias siguientes, hasta que se
+    reasigne alguna de las variables de las que depende o empiece otro
+    bloque. Los temporales recordados quedan fijados en la tabla de símbolos.
+    """
+
+    LIMIT = 16             # Valores recordados como máximo
+
+    def __init__(self, symbol_table):
+        self.symbol_table = symbol_table
+        self.values = {}       # Clave -> (resultado, registros de variables que lee)
+        self.depends = {}      # Temporal recordado -> registros de variables que lee
+        self.keys = {}         # id(nodo) -> (clave, dependencias) en la instrucción actual
+        self.reused = 0        # Valores reutilizados
+
+    def key(self, node):
+        """Clave del valor de una expresión y los registros de variables que lee"""
+        if isinstance(node, Num):
+            value = struct.pack('f', node.value) if node.type == 'float' else node.value
+            return ('num', node.type, value), frozenset()
+        if isinstance(node, Var):
+            register = self.symbol_table.lookup(node.name)['register']
+            return ('var', register), frozenset([register])
+        memo = self.keys.get(id(node))
+        if memo is not None:
+            return memo
+        if isinstance(node, BinOp):
+            left, left_depends = self.key(node.left)
+            right, right_depends = self.key(node.right)
+            memo = (node.op, left, right), left_depends | right_depends
+        elif isinstance(node, UnaryOp):
+            operand, operand_depends = self.key(node.operand)
+            memo = ('neg', operand), operand_depends
+        else:
+            arg, arg_depends = self.key(node.arg)
+            memo = (node.func, arg), arg_depends
+        self.keys[id(node)] = memo
+        return memo
+
+    def lookup(self, key):
+        """Resultado ya calculado para la clave, o None"""
+        entry = self.values.get(key)
+        if entry is None:
+            return None
+        self.reused += 1
+        return entry[0]
+
+    def remember(self, key, depends, result):
+        """Recuerda el temporal que tiene el valor de la clave"""
+        register = result['register']
+        if register[2:3] != 't' or register in self.depends:
+            # Variables, registros reservados y valores ya recordados
+            return
+        if len(self.values) >= self.LIMIT:
+            self.forget(next(iter(self.values)))
+        self.values[key] = (result, depends)
+        self.depends[register] = depends
+        self.symbol_table.pin(register)
+
+    def conversion_key(self, register, type_name):
+        """Clave y dependencias de convertir un registro estable, o None"""
+        if register[2:3] == 'v':
+            return ('convert', type_name, register), frozenset([register])
+        depends = self.depends.get(register)
+        if depends is None:
+            return None
+        # También depende del temporal, que se reutiliza al olvidarlo
+        return ('convert', type_name, register), depends | {register}
+
+    def forget(self, key):
+        """Olvida un valor y libera su temporal"""
+        result, _ = self.values.pop(key)
+        register = result['register']
+        del self.depends[register]
+        self.symbol_table.unpin(register)
+        self.invalidate(register)
+
+    def invalidate(self, register):
+        """Olvida los valores que leen una variable que acaba de cambiar"""
+        for key in [key for key, (_, depends) in self.values.items() if register in depends]:
+            if key in self.values:
+                self.forget(key)
+
+    def clear(self):
+        """Empieza un bloque básico nuevo"""
+        while self.values:
+            self.forget(next(iter(self.values)))
+
+# Polinomios minimax de sin y cos en [-π/4, π/4] para cada nivel de
+# precisión de --inline-math: coeficientes en z = r² de
+# sin r = r + r·z·P(z) y cos r = 1 + z·Q(z), ajustados con el algoritmo de
+# Remez. Error máximo aproximado: nivel 1 6e-4, nivel 2 2e-6 y nivel 3 el
+# redondeo de precisión simple (tan: 7e-4, 3e-6 y 5e-7 relativo), para
+# |x| < TRIG_DOMAIN. Fuera de ese dominio, o con x infinito o NaN, sin,
+# cos y tan en línea devuelven NaN.
+TRIG_POLYNOMIALS = {
+    1: ((-1.624279154e-01,),
+        (-4.997763071e-01, 4.048893586e-02)),
+    2: ((-1.666339038e-01, 8.163281920e-03),
+        (-4.999989478e-01, 4.165629458e-02, -1.359782314e-03)),
+    3: ((-1.666665461e-01, 8.332160762e-03, -1.951528319e-04),
+        (-4.999999973e-01, 4.166662332e-02, -1.388676379e-03, 2.439045071e-05)),
+}
+# π/2 como suma de dos flotantes: k·π/2 se resta en dos pasos sin perder bits
+PI_2_HIGH = 1.5707963705062866
+PI_2_LOW = -4.371138828673793e-08
+# Mayor |x| con esos errores: más allá, k = x·2/π redondeado a precisión
+# simple se aleja del cuadrante correcto, primero se pierde precisión y
+# desde unos 10^7 el resultado ya no tiene sentido
+TRIG_DOMAIN = 1.0e5
 
 class CodeGenerator:
     """Generador de código ensamblador RISC-V"""
     
-    def __init__(self, symbol_table):
+    def __init__(self, symbol_table, peephole=False, fold=False, optimize_loops=False,
+                 unroll=1, cse=False, dead_stores=False, inline_math=0, sink=None):
         self.symbol_table = symbol_table
+        # Plegado y propagación de constantes opcional, por instrucción
+        self.folder = ConstantFolder(symbol_table) if fold else None
+        # Sacar cálculos invariantes de los bucles y reducir multiplicaciones
+        self.optimize_loops = optimize_loops
+        # Expresiones ya calculadas antes del bucle: id(nodo) -> resultado
+        self.precomputed = {}
+        # Copias del cuerpo por vuelta en los for con número de vueltas conocido
+        self.unroll = unroll
+        # Reutilizar valores ya calculados dentro de un bloque básico
+        self.values = ValueTable(symbol_table) if cse else None
+        # Optimizador de mirilla opcional, aplicado en get_code
+        self.peephole = PeepholeOptimizer() if peephole else None
+        # Eliminación de almacenes muertos opcional, aplicada en get_code
+        self.dead_stores = DeadStoreEliminator() if dead_stores else None
+        # Nivel de los polinomios de sin/cos/tan en línea (0: llamar a libm)
+        self.inline_math = inline_math
+        # Destino del ensamblador final: None (get_code devuelve un str), una
+        # lista de líneas o un objeto con write, como un archivo abierto
+        self.sink = sink
+        # Instrucciones del último código entregado por get_code
+        self.instruction_count = 0
         self.code = []
+        # Sección .data aparte, se agrega al final después de .text
         self.data_section = []
         self.label_count = 0
         self.string_count = 0
@@ -684,6 +1631,9 @@ class CodeGenerator:
     
     def emit_label(self, label):
         """Emite una etiqueta en el código"""
+        if self.values is not None:
+            # Una etiqueta empieza un bloque básico: se llega desde otro lado
+            self.values.clear()
         self.emit(f"{label}:")
     
     def emit_program_header(self):
@@ -691,34 +1641,508 @@ class CodeGenerator:
         self.emit(".text")
         self.emit(".globl main")
         self.emit("main:")
-        # Guardar el registro de retorno
-        self.emit("    addi sp, sp, -4")
-        self.emit("    sw ra, 0(sp)")
+        # Reservar el marco y guardar ra; el tamaño lo decide RegisterAllocator
+        self.emit(FRAME_ENTER)
     
     def emit_program_footer(self):
         """Emite el pie del programa ensamblador"""
-        # Cargar el registro de retorno
-        self.emit("    lw ra, 0(sp)")
-        self.emit("    addi sp, sp, 4")
+        # Restaurar los registros guardados y liberar el marco
+        self.emit(FRAME_EXIT)
         # Salir del programa
         self.emit("    li a7, 10")  # Syscall número 10 (exit)
         self.emit("    ecall")
+    
+    def get_code(self, timer=None):
+        """
+        Asigna los registros físicos y obtiene el código ensamblador generado.
+        Con un PassTimer mide por separado la mirilla, los almacenes muertos,
+        la asignación de registros y la sección de datos. Con un sink escribe
+        ahí el código por bloques, sin armar el texto completo, y lo devuelve.
+        """
+        code = self.code
+        
+        # Cargar 0.0 y 1.0 en sus registros reservados si se usan
+        reserved = [register for register in (FLOAT_ZERO_REGISTER, FLOAT_ONE_REGISTER)
+                    if any(register in line for line in code)]
+        if reserved:
+            code = self.load_reserved(code, reserved)
+        
+        if self.peephole:
+            with timed_phase(timer, 'mirilla 1') as info:
+                code = self.peephole.optimize(code)
+                info['instrucciones'] = count_instructions(code)
+        if self.dead_stores:
+            with timed_phase(timer, 'almacenes muertos') as info:
+                code = self.dead_stores.optimize(code)
+                info['instrucciones'] = count_instructions(code)
+        with timed_phase(timer, 'registros') as info:
+            code = RegisterAllocator().allocate(code, reserved)
+            info['instrucciones'] = count_instructions(code)
+        if self.peephole:
+            with timed_phase(timer, 'mirilla 2') as info:
+                code = self.peephole.optimize(code, allocated=True)
+                info['instrucciones'] = count_instructions(code)
         
         # Sección de datos
-        if self.data_section:
-            self.emit("")
-            self.emit(".data")
-            for data in self.data_section:
-                self.emit(data)
+        with timed_phase(timer, 'datos'):
+            data = self.data_section
+            if data:
+                code, data = self.pool_constants(code, data)
+                data = ["", ".data"] + data
+            self.instruction_count = count_instructions(code)
+            if self.sink is None:
+                code.extend(data)
+                return "\n".join(code)
+            write_lines(self.sink, itertools.chain(code, data))
+            return self.sink
     
-    def get_code(self):
-        """Obtiene el código ensamblador generado"""
-        return "\n".join(self.code)
+    def load_reserved(self, code, reserved):
+        """Carga 0.0 y 1.0 en sus registros reservados (los de reserved) al entrar a main"""
+        start = code.index(FRAME_ENTER) + 1
+        setup = ["    # Constantes 0.0 y 1.0 en registros reservados"]
+        if FLOAT_ZERO_REGISTER in reserved:
+            setup.append(f"    fmv.s.x {FLOAT_ZERO_REGISTER}, zero")
+        if FLOAT_ONE_REGISTER in reserved:
+            setup.append("    li t0, 0x3f800000")       # Bits de 1.0 en IEEE 754
+            setup.append(f"    fmv.s.x {FLOAT_ONE_REGISTER}, t0")
+        return code[:start] + setup + code[start:]
     
-    def add_string_to_data(self, string):
-        """Añade una cadena literal al segmento .data y devuelve su etiqueta"""
-        label = f"string_{self.string_count}"
-        self.string_count += 1
+    def allocate_fragment(self, code, homes):
+        """
+        Pasa las líneas de una instrucción de nivel superior por la mirilla,
+        los almacenes muertos y RegisterAllocator con cada variable en su
+        posición fija de homes. Devuelve las líneas, cuántas instrucciones
+        son, los registros callee-saved que usan y cuántas posiciones de la
+        pila necesitan (contando las de las variables).
+        """
+        reserved = [register for register in (FLOAT_ZERO_REGISTER, FLOAT_ONE_REGISTER)
+                    if any(register in line for line in code)]
+        if self.peephole:
+            code = self.peephole.optimize(code)
+        if self.dead_stores:
+            # Las variables pueden leerse en las instrucciones siguientes
+            variables = {name for line in code for name in VIRTUAL_REGISTER_REGEX.findall(line)
+                         if name[2] == 'v'}
+            code = self.dead_stores.optimize(code, variables)
+        allocator = RegisterAllocator(homes)
+        code = allocator.allocate(code, reserved)
+        if self.peephole:
+            code = self.peephole.optimize(code, allocated=True)
+        return code, count_instructions(code), allocator.saved, allocator.slots
+    
+    def get_fragments_code(self, header, fragments, footer, homes):
+        """
+        Arma el programa con las instrucciones ya asignadas: header y footer
+        son las líneas virtuales del encabezado y el pie, y fragments los
+        resultados de allocate_fragment de cada instrucción. El marco reserva
+        las posiciones de todas las variables y guarda los registros que usó
+        alguna. La sección de datos no pasa por pool_constants.
+        """
+        frame = RegisterAllocator(homes)
+        saved = set()
+        for _, _, registers, slots in fragments:
+            saved.update(registers)
+            frame.slots = max(frame.slots, slots)
+        frame.saved = [register for register in frame.SAVE_ORDER if register in saved]
+        reserved = saved & {FLOAT_ZERO_REGISTER, FLOAT_ONE_REGISTER}
+        if reserved:
+            header = self.load_reserved(header, reserved)
+        header = frame.expand_frame(header)
+        footer = frame.expand_frame(footer)
+        self.instruction_count = (count_instructions(header) + count_instructions(footer)
+                                  + sum(fragment[1] for fragment in fragments))
+        code = list(itertools.chain(header, *(fragment[0] for fragment in fragments), footer))
+        if self.data_section:
+            code += ["", ".data"] + self.data_section
+        return "\n".join(code)
+    
+    def pool_constants(self, code, data):
+        """
+        Deja una sola entrada de .data por valor: las etiquetas repetidas de
+        flotantes y cadenas se cambian por la primera con el mismo contenido
+        """
+        labels = {}            # Contenido -> primera etiqueta
+        renamed = {}
+        pooled = []
+        for entry in data:
+            label, _, content = entry.partition(': ')
+            if content.startswith('.space'):
+                # Los búferes de lectura no se comparten
+                pooled.append(entry)
+                continue
+            first = labels.setdefault(content, label)
+            if first == label:
+                pooled.append(entry)
+            else:
+                renamed[label] = first
+        
+        if renamed:
+            for index, line in enumerate(code):
+                if line.startswith('    la '):
+                    target, _, label = line[7:].partition(', ')
+                    if label in renamed:
+                        code[index] = f"    la {target}, {renamed[label]}"
+        return code, pooled
+    
+    def generate(self, program, timer=None):
+        """Genera el código ensamblador recorriendo el AST del programa"""
+        with timed_phase(timer, 'generación') as info:
+            self.emit_program_header()
+            for statement in program.statements:
+                self.generate_statement(statement)
+            self.emit_program_footer()
+            info['instrucciones'] = count_instructions(self.code)
+        return self.get_code(timer)
+    
+    def visit(self, node):
+        """Genera el código de un nodo según su clase"""
+        if self.precomputed:
+            result = self.precomputed.get(id(node))
+            if result is not None:
+                return result
+        if self.values is not None and (isinstance(node, (BinOp, UnaryOp, MathCall))
+                                        or isinstance(node, Num) and node.type == 'float'):
+            return self.visit_value(node)
+        return getattr(self, 'visit_' + node.__class__.__name__)(node)
+    
+    def visit_value(self, node):
+        """Reutiliza el temporal que ya tiene el valor de la expresión"""
+        key, depends = self.values.key(node)
+        result = self.values.lookup(key)
+        if result is None:
+            result = getattr(self, 'visit_' + node.__class__.__name__)(node)
+            self.values.remember(key, depends, result)
+        return result
+    
+    def generate_statement(self, node):
+        """Genera una instrucción de nivel superior, plegando sus constantes"""
+        if self.folder:
+            node = self.folder.fold(node)
+        if self.values is not None:
+            self.values.keys.clear()
+        self.visit_statement(node)
+    
+    def visit_statement(self, node):
+        """Genera una sentencia y libera sus temporales al terminar"""
+        mark = self.symbol_table.temp_mark()
+        try:
+            self.visit(node)
+        except Exception as e:
+            # Anotar la línea de la sentencia más interna para el diagnóstico
+            if not hasattr(e, 'line'):
+                e.line = node.line
+            raise
+        self.symbol_table.release_temps(mark)
+    
+    def visit_Assign(self, node):
+        """Genera el código de una asignación"""
+        var_info = self.symbol_table.lookup(node.name)
+        expr_result = self.visit(node.expr)
+        self.emit_assignment(node.name, var_info['register'], var_info['type'],
+                             expr_result['register'], expr_result['type'])
+    
+    def visit_Read(self, node):
+        """Genera el código de una lectura"""
+        var_info = self.symbol_table.lookup(node.name)
+        self.emit_read(node.name, var_info['register'], var_info['type'])
+    
+    def visit_Print(self, node):
+        """Genera el código de print o println"""
+        args = []
+        for arg in node.args:
+            if isinstance(arg, Str):
+                args.append({'type': 'string', 'value': arg.value})
+            else:
+                args.append(self.visit(arg))
+        
+        if node.newline:
+            self.emit_println(args)
+        else:
+            self.emit_print(args)
+    
+    def visit_For(self, node):
+        """Genera el código de un bucle for"""
+        var_info = self.symbol_table.lookup(node.name)
+        
+        # Asignación inicial
+        start_result = self.visit(node.start)
+        self.emit_assignment(node.name, var_info['register'], var_info['type'],
+                             start_result['register'], start_result['type'])
+        
+        # Con número de vueltas conocido, el bucle desenrollado hace los
+        # bloques completos y un bucle normal hace las vueltas restantes
+        blocks, remainder = 0, None
+        count = self.trip_count(node) if self.unroll > 1 else None
+        if count is not None:
+            blocks, remainder = divmod(count, self.unroll)
+        
+        # Valor final
+        if remainder != 0:
+            end_result = self.visit(node.end)
+            if isinstance(node.end, Var) and node.end.name in assigned_names(node):
+                # El fin se evalúa una sola vez: copiar la variable que el bucle cambia
+                end_copy = self.symbol_table.get_temp_var(end_result['type'])
+                self.emit_assignment(node.end.name, end_copy['register'], end_copy['type'],
+                                     end_result['register'], end_result['type'])
+                end_result = end_copy
+        
+        # Cálculos que se hacen una sola vez antes del bucle
+        hoisted = []
+        increments = []
+        if self.optimize_loops:
+            assigned = assigned_names(node)
+            self.emit_invariants(node, assigned, hoisted)
+            increments = self.emit_induction_variables(node, var_info, hoisted)
+        
+        if blocks:
+            self.emit_unrolled_loop(node, var_info, blocks, increments)
+        
+        if remainder != 0:
+            # Generar etiquetas para el bucle
+            loop_start_label = self.get_new_label("for_start")
+            loop_end_label = self.get_new_label("for_end")
+            
+            self.emit_for_start(loop_start_label, node.name, var_info['register'],
+                                var_info['type'], end_result['register'], end_result['type'],
+                                loop_end_label)
+            
+            # Cuerpo del bucle
+            for statement in node.body:
+                self.visit_statement(statement)
+            
+            self.emit_for_end(loop_start_label, node.name, var_info['register'],
+                              var_info['type'], increments)
+            self.emit_label(loop_end_label)
+        
+        for expr in hoisted:
+            del self.precomputed[id(expr)]
+    
+    def trip_count(self, node):
+        """Número de vueltas de un for entero con límites literales, o None"""
+        start, end = node.start, node.end
+        if not (isinstance(start, Num) and isinstance(end, Num)
+                and start.type == 'int' and end.type == 'int'):
+            return None
+        # Con fin igual al máximo entero el bucle nunca termina
+        if end.value >= 2**31 - 1:
+            return None
+        if self.symbol_table.lookup(node.name)['type'] != 'int':
+            return None
+        for statement in node.body:
+            if node.name in assigned_names(statement):
+                return None
+        return max(0, end.value - start.value + 1)
+    
+    def emit_unrolled_loop(self, node, var_info, blocks, increments):
+        """
+        Emite un bucle que da blocks vueltas con self.unroll copias del cuerpo
+        cada una, así la comparación y el salto se hacen una vez por bloque
+        """
+        register = var_info['register']
+        # Último valor de la variable con el que empieza un bloque completo
+        limit = self.symbol_table.get_temp_var('int')['register']
+        self.emit_load_constant(limit, node.start.value + (blocks - 1) * self.unroll, 'int')
+        
+        loop_start_label = self.get_new_label("for_start")
+        loop_end_label = self.get_new_label("for_end")
+        self.emit(f"    # Bucle desenrollado {self.unroll} veces")
+        self.emit_for_start(loop_start_label, node.name, register, 'int', limit, 'int',
+                            loop_end_label)
+        for copy in range(self.unroll):
+            if copy:
+                self.emit(f"    # Incrementar {node.name}")
+                self.emit_for_increment(register, 'int', increments)
+            for statement in node.body:
+                self.visit_statement(statement)
+        self.emit_for_end(loop_start_label, node.name, register, 'int', increments)
+        self.emit_label(loop_end_label)
+    
+    def emit_induction_variables(self, node, var_info, hoisted):
+        """
+        Cambia cada i * c del cuerpo (i la variable entera del bucle, c una
+        constante) por una variable derivada que empieza en inicio * c y
+        aumenta c en cada vuelta. Devuelve los pares (registro, c).
+        """
+        if var_info['type'] != 'int':
+            return []
+        body_assigned = set()
+        for statement in node.body:
+            body_assigned |= assigned_names(statement)
+        if node.name in body_assigned:
+            return []
+        
+        derived = {}           # Constante -> resultado
+        for statement in node.body:
+            for expr in statement_expressions(statement):
+                for product in self._find_products(expr, node.name):
+                    step = product.left.value if isinstance(product.left, Num) else product.right.value
+                    if step not in derived:
+                        self.emit(f"    # Variable de inducción {node.name} * {step}")
+                        derived[step] = self.emit_binary_op('*', var_info,
+                                                            self.visit(Num(step)))
+                    self.precomputed[id(product)] = derived[step]
+                    hoisted.append(product)
+        return [(result['register'], step) for step, result in derived.items()]
+    
+    def _find_products(self, expr, name):
+        """Productos name * constante entera dentro de una expresión"""
+        if isinstance(expr, BinOp):
+            if expr.op == '*' and expr.type == 'int':
+                left, right = expr.left, expr.right
+                if ((isinstance(left, Var) and left.name == name and isinstance(right, Num))
+                        or (isinstance(right, Var) and right.name == name
+                            and isinstance(left, Num))):
+                    yield expr
+                    return
+            yield from self._find_products(expr.left, name)
+            yield from self._find_products(expr.right, name)
+        elif isinstance(expr, UnaryOp):
+            yield from self._find_products(expr.operand, name)
+        elif isinstance(expr, MathCall):
+            yield from self._find_products(expr.arg, name)
+    
+    def emit_invariants(self, node, assigned, hoisted):
+        """Calcula antes del bucle las subexpresiones que no cambian en él"""
+        invariants = []
+        for statement in node.body:
+            for expr in statement_expressions(statement):
+                if (self._find_invariants(expr, assigned, invariants)
+                        and self._worth_hoisting(expr)):
+                    invariants.append(expr)
+        if invariants:
+            self.emit(f"    # Cálculos invariantes del bucle con {node.name}")
+        for expr in invariants:
+            self.precomputed[id(expr)] = self.visit(expr)
+            hoisted.append(expr)
+    
+    def _find_invariants(self, expr, assigned, invariants):
+        """
+        Indica si expr no lee variables modificadas en el bucle. Si no lo es,
+        agrega a invariants sus partes invariantes máximas que vale la pena
+        calcular una sola vez.
+        """
+        if id(expr) in self.precomputed:
+            # Ya calculada antes de un bucle exterior
+            return True
+        if isinstance(expr, Num):
+            return True
+        if isinstance(expr, Var):
+            return expr.name not in assigned
+        if isinstance(expr, BinOp):
+            children = (expr.left, expr.right)
+        elif isinstance(expr, UnaryOp):
+            children = (expr.operand,)
+        else:
+            children = (expr.arg,)
+        found = []
+        flags = [self._find_invariants(child, assigned, found) for child in children]
+        if all(flags):
+            return True
+        for child, flag in zip(children, flags):
+            if flag and self._worth_hoisting(child):
+                invariants.append(child)
+        invariants.extend(found)
+        return False
+    
+    def _worth_hoisting(self, expr):
+        """Una subexpresión invariante ahorra instrucciones si no es trivial"""
+        if id(expr) in self.precomputed or isinstance(expr, Var):
+            return False
+        if isinstance(expr, Num):
+            # Los float (salvo 0.0 y 1.0) se cargan de memoria en cada vuelta
+            return expr.type == 'float' and expr.value not in (0.0, 1.0)
+        return True
+    
+    def visit_Num(self, node):
+        """Carga un número literal en un registro temporal"""
+        if node.type == 'float' and node.value in (0.0, 1.0) and math.copysign(1.0, node.value) > 0:
+            # 0.0 y 1.0 ya están en registros reservados
+            register = FLOAT_ZERO_REGISTER if node.value == 0.0 else FLOAT_ONE_REGISTER
+            return {'type': 'float', 'register': register}
+        temp_var = self.symbol_table.get_temp_var(node.type)
+        self.emit_load_constant(temp_var['register'], node.value, node.type)
+        return {'type': node.type, 'register': temp_var['register']}
+    
+    def visit_Var(self, node):
+        """Devuelve el registro de una variable"""
+        var_info = self.symbol_table.lookup(node.name)
+        return {'type': var_info['type'], 'register': var_info['register']}
+    
+    def visit_BinOp(self, node):
+        """Genera el código de una operación binaria"""
+        if self.optimize_loops and (isinstance(node.left, Num) or isinstance(node.right, Num)):
+            result = self.reduce_strength(node)
+            if result is not None:
+                return result
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        return self.emit_binary_op(node.op, left, right)
+    
+    def reduce_strength(self, node):
+        """
+        Cambia la multiplicación entera por una constante por desplazamientos y
+        sumas, y la división entre una potencia de dos por una multiplicación
+        por su inverso (exacto). Devuelve None si no aplica.
+        """
+        operand, constant = node.left, node.right
+        if node.op == '*' and isinstance(operand, Num):
+            operand, constant = constant, operand
+        if not isinstance(constant, Num) or isinstance(operand, Num):
+            return None
+        
+        if node.op == '/' and constant is node.right:
+            mantissa, exponent = math.frexp(abs(constant.value))
+            if mantissa != 0.5 or not -125 <= exponent <= 127:
+                return None
+            left = self.visit(operand)
+            return self.emit_binary_op('*', left, self.visit(Num(to_float32(1.0 / constant.value))))
+        
+        if node.op != '*' or constant.type != 'int' or constant.value <= 0:
+            return None
+        left = self.visit(operand)
+        if left['type'] != 'int':
+            return self.emit_binary_op('*', left, self.visit(constant))
+        value = constant.value
+        if value == 1:
+            return left
+        register = self.symbol_table.get_temp_var('int')['register']
+        if value & (value - 1) == 0:
+            self.emit(f"    slli {register}, {left['register']}, {value.bit_length() - 1}")
+        elif (value - 1) & (value - 2) == 0:
+            self.emit(f"    slli {register}, {left['register']}, {(value - 1).bit_length() - 1}")
+            self.emit(f"    add {register}, {register}, {left['register']}")
+        elif (value + 1) & value == 0:
+            self.emit(f"    slli {register}, {left['register']}, {value.bit_length()}")
+            self.emit(f"    sub {register}, {register}, {left['register']}")
+        else:
+            # La constante va en un temporal: RegisterAllocator puede usar t0
+            # para recargar un operando guardado en la pila
+            factor = self.symbol_table.get_temp_var('int')['register']
+            self.emit(f"    li {factor}, {value}")
+            self.emit(f"    mul {register}, {left['register']}, {factor}")
+        return {'type': 'int', 'register': register}
+    
+    def visit_UnaryOp(self, node):
+        """Genera el código del menos unario"""
+        operand = self.visit(node.operand)
+        temp_var = self.symbol_table.get_temp_var(operand['type'])
+        if operand['type'] == 'float':
+            self.emit(f"    fneg.s {temp_var['register']}, {operand['register']}")
+        else:
+            self.emit(f"    neg {temp_var['register']}, {operand['register']}")
+        return {'type': operand['type'], 'register': temp_var['register']}
+    
+    def visit_MathCall(self, node):
+        """Genera el código de una llamada a sin, cos o tan"""
+        arg_result = self.visit(node.arg)
+        temp_var = self.symbol_table.get_temp_var('float')
+        self.emit_math_function(node.func, arg_result['register'], temp_var['register'])
+        return {'type': 'float', 'register': temp_var['register']}
+    
+    def add_string_to_data(self, string):
+        """Añade una cadena literal al segmento .data y devuelve su etiqueta"""
+        label = f"string_{self.string_count}"
+        self.string_count += 1
         # Escapar comillas dobles en la cadena
         escaped_string = string.replace('"', '\\"')
         self.emit_data(f'{label}: .string "{escaped_string}"')
@@ -728,7 +2152,7 @@ class CodeGenerator:
         """Emite código para cargar una constante en un registro"""
         if type_name == 'float':
             # Cargar un flotante a un registro de punto flotante
-            if value == 0.0:
+            if value == 0.0 and math.copysign(1.0, value) > 0:
                 self.emit(f"    fmv.s.x {register}, zero")
             else:
                 # Añadir el flotante al segmento .data
@@ -736,8 +2160,9 @@ class CodeGenerator:
                 self.label_count += 1
                 self.emit_data(f"{label}: .float {value}")
                 # Cargar el flotante desde memoria
-                self.emit(f"    la t0, {label}")
-                self.emit(f"    flw {register}, 0(t0)")
+                address = self.symbol_table.get_temp_var('int')['register']
+                self.emit(f"    la {address}, {label}")
+                self.emit(f"    flw {register}, 0({address})")
         elif type_name == 'int':
             # Cargar un entero a un registro de entero
             self.emit(f"    li {register}, {value}")
@@ -745,6 +2170,8 @@ class CodeGenerator:
     
     def emit_assignment(self, var_name, var_register, var_type, expr_register, expr_type):
         """Emite código para una asignación"""
+        if self.values is not None:
+            self.values.invalidate(var_register)
         # Convertir tipo si es necesario
         if var_type == expr_type:
             # Mismos tipos, copiar directamente
@@ -768,6 +2195,8 @@ class CodeGenerator:
     
     def emit_read(self, var_name, var_register, var_type):
         """Emite código para una instrucción read"""
+        if self.values is not None:
+            self.values.invalidate(var_register)
         if var_type == 'int':
             # read(int_var)
             self.emit(f"    # Lectura de entero para {var_name}")
@@ -865,27 +2294,42 @@ class CodeGenerator:
         elif var_type == 'float':
             # Para comparaciones de punto flotante, necesitamos usar fle.s
             self.emit(f"    # Comparar {var_name} <= fin")
-            self.emit(f"    fle.s t0, {var_register}, {end_reg}")
-            self.emit(f"    beqz t0, {loop_end_label}")
+            condition = self.symbol_table.get_temp_var('int')['register']
+            self.emit(f"    fle.s {condition}, {var_register}, {end_reg}")
+            self.emit(f"    beqz {condition}, {loop_end_label}")
     
-    def emit_for_end(self, loop_start_label, var_name, var_register, var_type):
-        """Emite código para el final de un bucle for"""
+    def emit_for_end(self, loop_start_label, var_name, var_register, var_type, increments=()):
+        """
+        Emite código para el final de un bucle for; increments son pares
+        (registro, paso) de variables de inducción derivadas
+        """
         self.emit(f"    # Incrementar {var_name} y volver al inicio del bucle")
+        self.emit_for_increment(var_register, var_type, increments)
+        self.emit(f"    j {loop_start_label}")
+    
+    def emit_for_increment(self, var_register, var_type, increments=()):
+        """Suma 1 a la variable del bucle y su paso a cada variable derivada"""
+        if self.values is not None:
+            self.values.invalidate(var_register)
+        for register, step in increments:
+            if -2048 <= step < 2048:
+                self.emit(f"    addi {register}, {register}, {step}")
+            else:
+                # Paso en un temporal, no en t0 (ver reduce_strength)
+                step_register = self.symbol_table.get_temp_var('int')['register']
+                self.emit(f"    li {step_register}, {step}")
+                self.emit(f"    add {register}, {register}, {step_register}")
         if var_type == 'int':
             self.emit(f"    addi {var_register}, {var_register}, 1")
         elif var_type == 'float':
-            # Cargar 1.0 y sumarlo
-            temp_label = f"float_one_{self.label_count}"
-            self.label_count += 1
-            self.emit_data(f"{temp_label}: .float 1.0")
-            self.emit(f"    la t0, {temp_label}")
-            self.emit(f"    flw ft11, 0(t0)")
-            self.emit(f"    fadd.s {var_register}, {var_register}, ft11")
-        
-        self.emit(f"    j {loop_start_label}")
+            # Sumar 1.0, que está en un registro reservado
+            self.emit(f"    fadd.s {var_register}, {var_register}, {FLOAT_ONE_REGISTER}")
     
     def emit_binary_op(self, op, left, right):
         """Emite código para una operación binaria y devuelve el registro resultado"""
+        if op in COMPARISON_OPERATORS:
+            return self.emit_comparison(op, left, right)
+        
         # Determinar el tipo de resultado según las reglas de promoción
         result_type = self._get_result_type(op, left['type'], right['type'])
         
@@ -914,6 +2358,8 @@ class CodeGenerator:
                 self.emit(f"    sub {result_reg}, {left_reg}, {right_reg}")
             elif op == '*':
                 self.emit(f"    mul {result_reg}, {left_reg}, {right_reg}")
+            elif op == '%':
+                self.emit(f"    rem {result_reg}, {left_reg}, {right_reg}")
             elif op == '/':
                 # Para división de enteros que produce flotante
                 if self._get_result_type('/', 'int', 'int') == 'float':
@@ -928,115 +2374,1870 @@ class CodeGenerator:
         
         return {'type': result_type, 'register': result_reg}
     
+    def emit_comparison(self, op, left, right):
+        """Emite una comparación; el resultado entero es 1 si se cumple y 0 si no"""
+        operand_type = get_operand_type(op, left['type'], right['type'])
+        result_reg = self.symbol_table.get_temp_var('int')['register']
+        left_reg = self._ensure_type(left['register'], left['type'], operand_type)
+        right_reg = self._ensure_type(right['register'], right['type'], operand_type)
+        
+        if operand_type == 'float':
+            # a > b es b < a y a >= b es b <= a (falsas con nan, como en C)
+            if op in ('>', '>='):
+                left_reg, right_reg = right_reg, left_reg
+            instruction = {'<': 'flt.s', '>': 'flt.s', '<=': 'fle.s', '>=': 'fle.s'}.get(op, 'feq.s')
+            self.emit(f"    {instruction} {result_reg}, {left_reg}, {right_reg}")
+            if op == '!=':
+                self.emit(f"    xori {result_reg}, {result_reg}, 1")
+        elif op in ('==', '!='):
+            self.emit(f"    sub {result_reg}, {left_reg}, {right_reg}")
+            self.emit(f"    {'seqz' if op == '==' else 'snez'} {result_reg}, {result_reg}")
+        else:
+            # a > b es b < a; a <= b y a >= b son la negación de b < a y a < b
+            if op in ('>', '<='):
+                left_reg, right_reg = right_reg, left_reg
+            self.emit(f"    slt {result_reg}, {left_reg}, {right_reg}")
+            if op in ('<=', '>='):
+                self.emit(f"    xori {result_reg}, {result_reg}, 1")
+        
+        return {'type': 'int', 'register': result_reg}
+    
     def _get_result_type(self, op, left_type, right_type):
         """Determina el tipo de resultado para una operación binaria"""
-        # Reglas de promoción de tipos
-        if left_type == 'float' or right_type == 'float':
-            return 'float'
-        elif op == '/' and left_type == 'int' and right_type == 'int':
-            # División de enteros produce flotante según las reglas especificadas
-            return 'float'
-        else:
-            return 'int'
+        return get_result_type(op, left_type, right_type)
     
     def _ensure_type(self, reg, current_type, target_type):
         """Asegura que un valor esté en el tipo correcto, convirtiendo si es necesario"""
         if current_type == target_type:
             return reg
         
+        # Una variable o un valor recordado ya convertido en este bloque
+        conversion = None
+        if self.values is not None:
+            conversion = self.values.conversion_key(reg, target_type)
+        if conversion is not None:
+            result = self.values.lookup(conversion[0])
+            if result is not None:
+                return result['register']
+        
         # Convertir entre tipos
         if current_type == 'int' and target_type == 'float':
             # Convertir int a float
             temp_reg = self.symbol_table.get_temp_var('float')['register']
             self.emit(f"    fcvt.s.w {temp_reg}, {reg}")
-            return temp_reg
         elif current_type == 'float' and target_type == 'int':
             # Convertir float a int
             temp_reg = self.symbol_table.get_temp_var('int')['register']
             self.emit(f"    fcvt.w.s {temp_reg}, {reg}, rtz")
-            return temp_reg
         else:
             raise Exception(f"Error semántico: No se puede convertir de {current_type} a {target_type}")
+        if conversion is not None:
+            self.values.remember(conversion[0], conversion[1],
+                                 {'type': target_type, 'register': temp_reg})
+        return temp_reg
     
     def emit_math_function(self, func_name, arg_reg, result_reg):
         """Emite código para una función matemática (sin, cos, tan)"""
-        # Cargar la dirección de la función
+        if self.inline_math:
+            self.emit_inline_math(func_name, arg_reg, result_reg)
+            return
         self.emit(f"    # Llamada a función matemática {func_name}")
         
-        # Guardar registros que se usan durante la llamada
-        self.emit(f"    addi sp, sp, -8")
-        self.emit(f"    sw ra, 0(sp)")
-        self.emit(f"    fsw {arg_reg}, 4(sp)")
-        
-        # Mover el argumento al registro fa0
+        # La llamada destruye los registros temporales (caller-saved);
+        # RegisterAllocator pone en registros s/fs o en la pila los valores
+        # que siguen vivos después de ella, y ra se restaura al salir de main
         self.emit(f"    fmv.s fa0, {arg_reg}")
-        
-        # Llamar a la función de la librería matemática
         self.emit(f"    call {func_name}")
-        
-        # Mover el resultado al registro destino
         self.emit(f"    fmv.s {result_reg}, fa0")
+    
+    def emit_inline_math(self, func_name, arg_reg, result_reg):
+        """
+        Emite sin, cos o tan sin llamadas ni pila, solo con RV32F y enteros.
+        Reduce el argumento a x = k·π/2 + r con r en [-π/4, π/4], evalúa los
+        polinomios de sin r y cos r, y el cuadrante k elige con máscaras de
+        bits cuál de los dos devolver y su signo, sin saltos. Con |x| fuera
+        de TRIG_DOMAIN, infinito o NaN el resultado es NaN, también sin saltos.
+        """
+        sin_coefs, cos_coefs = TRIG_POLYNOMIALS[self.inline_math]
+        table = (2 / math.pi, PI_2_HIGH, PI_2_LOW, 1.0, TRIG_DOMAIN) + sin_coefs + cos_coefs
+        label = self.get_new_label('trig')
+        self.emit_data(f"{label}: .float {', '.join(str(value) for value in table)}")
+        
+        def temp(type_name='float'):
+            return self.symbol_table.get_temp_var(type_name)['register']
+        
+        def load(index):
+            # Las constantes se cargan justo antes de usarlas
+            register = temp()
+            self.emit(f"    flw {register}, {4 * index}({base})")
+            return register
+        
+        def polynomial(z, first, count):
+            # Horner: c[n-1] + z·(... + z·c[last])
+            acc = load(first + count - 1)
+            for index in range(first + count - 2, first - 1, -1):
+                coef = load(index)
+                result = temp()
+                self.emit(f"    fmadd.s {result}, {z}, {acc}, {coef}")
+                acc = result
+            return acc
+        
+        self.emit(f"    # {func_name} en línea (polinomios de nivel {self.inline_math})")
+        base = temp('int')
+        self.emit(f"    la {base}, {label}")
+        
+        # k = x·2/π redondeado al par más cercano; r = x - k·π/2
+        scaled, k, partial, r, z = (temp() for _ in range(5))
+        quadrant = temp('int')
+        self.emit(f"    fmul.s {scaled}, {arg_reg}, {load(0)}")
+        self.emit(f"    fcvt.w.s {quadrant}, {scaled}, rne")
+        self.emit(f"    fcvt.s.w {k}, {quadrant}")
+        self.emit(f"    fnmsub.s {partial}, {k}, {load(1)}, {arg_reg}")
+        self.emit(f"    fnmsub.s {r}, {k}, {load(2)}, {partial}")
+        self.emit(f"    fmul.s {z}, {r}, {r}")
+        
+        # Máscara de todos unos si |x| no es menor que TRIG_DOMAIN (o es NaN)
+        magnitude = temp()
+        inside, outside = temp('int'), temp('int')
+        self.emit(f"    fabs.s {magnitude}, {arg_reg}")
+        self.emit(f"    flt.s {inside}, {magnitude}, {load(4)}")
+        self.emit(f"    addi {outside}, {inside}, -1")
+        
+        def guard(bits):
+            # Fuera del dominio los bits pasan a 0x7fffffff, un NaN positivo
+            nan_bits, sign_bit, guarded = (temp('int') for _ in range(3))
+            self.emit(f"    or {nan_bits}, {bits}, {outside}")
+            self.emit(f"    slli {sign_bit}, {outside}, 31")
+            self.emit(f"    xor {guarded}, {nan_bits}, {sign_bit}")
+            return guarded
+        
+        # sin r = r + r·z·P(z) y cos r = 1 + z·Q(z)
+        p = polynomial(z, 5, len(sin_coefs))
+        rz, sin_r = temp(), temp()
+        self.emit(f"    fmul.s {rz}, {r}, {z}")
+        self.emit(f"    fmadd.s {sin_r}, {rz}, {p}, {r}")
+        q = polynomial(z, 5 + len(sin_coefs), len(cos_coefs))
+        cos_r = temp()
+        self.emit(f"    fmadd.s {cos_r}, {z}, {q}, {load(3)}")
+        
+        if func_name == 'cos':
+            # cos x = sin(x + π/2): un cuadrante más
+            shifted = temp('int')
+            self.emit(f"    addi {shifted}, {quadrant}, 1")
+            quadrant = shifted
+        
+        # Con k impar se intercambian sin r y cos r: máscara de todos unos
+        odd, mask, sin_bits, cos_bits, diff, swap = (temp('int') for _ in range(6))
+        self.emit(f"    andi {odd}, {quadrant}, 1")
+        self.emit(f"    neg {mask}, {odd}")
+        self.emit(f"    fmv.x.s {sin_bits}, {sin_r}")
+        self.emit(f"    fmv.x.s {cos_bits}, {cos_r}")
+        self.emit(f"    xor {diff}, {sin_bits}, {cos_bits}")
+        self.emit(f"    and {swap}, {diff}, {mask}")
         
-        # Restaurar registros
-        self.emit(f"    lw ra, 0(sp)")
-        self.emit(f"    flw {arg_reg}, 4(sp)")
-        self.emit(f"    addi sp, sp, 8")
+        if func_name == 'tan':
+            # tan x = sin r / cos r, o -cos r / sin r con k impar
+            numerator, denominator, sign, signed = (temp('int') for _ in range(4))
+            self.emit(f"    xor {numerator}, {sin_bits}, {swap}")
+            self.emit(f"    xor {denominator}, {cos_bits}, {swap}")
+            self.emit(f"    slli {sign}, {odd}, 31")
+            self.emit(f"    xor {signed}, {numerator}, {sign}")
+            fnumerator, fdenominator = temp(), temp()
+            self.emit(f"    fmv.s.x {fnumerator}, {guard(signed)}")
+            self.emit(f"    fmv.s.x {fdenominator}, {denominator}")
+            self.emit(f"    fdiv.s {result_reg}, {fnumerator}, {fdenominator}")
+        else:
+            # Los cuadrantes 2 y 3 cambian el signo
+            bits, half, sign, signed = (temp('int') for _ in range(4))
+            self.emit(f"    xor {bits}, {sin_bits}, {swap}")
+            self.emit(f"    andi {half}, {quadrant}, 2")
+            self.emit(f"    slli {sign}, {half}, 30")
+            self.emit(f"    xor {signed}, {bits}, {sign}")
+            self.emit(f"    fmv.s.x {result_reg}, {guard(signed)}")
+
+class PeepholeOptimizer:
+    """
+    Optimizador de mirilla (peephole) sobre la lista de instrucciones del
+    generador. Cada regla recibe el código y devuelve el código nuevo; se
+    pueden agregar reglas con add_rule. removed cuenta las instrucciones
+    eliminadas y stats las eliminadas por cada regla.
+    """
+
+    # Temporales del generador y el registro auxiliar t0: nunca se leen
+    # después de redefinirse, así que su vida se ve en orden lineal
+    TEMP_REGEX = re.compile(r'%[if]t\d+|\bt0\b')
+    MOVES = ('mv', 'fmv.s')
+    LOADS = frozenset(['li', 'la', 'lw', 'flw', 'fmv.s.x', 'mv', 'fmv.s'])
+
+    def __init__(self):
+        # Reglas sobre registros virtuales (antes de asignar registros)
+        self.rules = [self.merge_moves, self.remove_redundant_moves,
+                      self.remove_dead_loads, self.remove_repeated_syscall_loads]
+        # Reglas sobre registros físicos (después de asignar registros)
+        self.allocated_rules = [self.remove_redundant_moves]
+        self.removed = 0
+        self.stats = {}
+
+    def add_rule(self, rule, allocated=False):
+        """Agrega una regla: función que recibe y devuelve la lista de instrucciones"""
+        (self.allocated_rules if allocated else self.rules).append(rule)
+
+    def optimize(self, code, allocated=False):
+        """Aplica las reglas en orden y acumula las instrucciones eliminadas"""
+        for rule in self.allocated_rules if allocated else self.rules:
+            before = len(code)
+            code = rule(code)
+            removed = before - len(code)
+            self.removed += removed
+            self.stats[rule.__name__] = self.stats.get(rule.__name__, 0) + removed
+        return code
+
+    def _split(self, line):
+        """Devuelve (mnemónico, operandos) de una instrucción, o None"""
+        stripped = line.strip()
+        if not stripped or stripped[0] in '#.' or stripped.endswith(':'):
+            return None
+        mnemonic, _, rest = stripped.partition(' ')
+        return mnemonic, [operand.strip() for operand in rest.split(',')] if rest else []
+
+    def _defines(self, mnemonic, operands):
+        """Indica si el primer operando es el destino de la instrucción"""
+        return (bool(operands) and mnemonic not in RegisterAllocator.USE_ONLY
+                and mnemonic not in ('j', 'call'))
+
+    def merge_moves(self, code):
+        """
+        Une una instrucción que escribe un temporal con el mv siguiente que
+        lo copia: 'li %it0, 5' + 'mv %iv0, %it0' -> 'li %iv0, 5'
+        """
+        live_after = self._temps_live_after(code)
+        result = []
+        pending = None          # (índice en result, operandos) de la última definición
+        for index, line in enumerate(code):
+            parts = self._split(line)
+            if parts is None:
+                if line.strip().endswith(':'):
+                    pending = None
+                result.append(line)
+                continue
+            mnemonic, operands = parts
+            if (pending is not None and mnemonic in self.MOVES and len(operands) == 2
+                    and operands[1] == pending[1][0] and operands[1][:3] in ('%it', '%ft')
+                    and operands[1] not in live_after[index]):
+                position, defined = pending
+                definition = self._split(result[position])
+                result[position] = self._format(definition[0], [operands[0]] + definition[1][1:])
+                pending = None
+                continue
+            pending = (len(result), operands) if self._defines(mnemonic, operands) else None
+            result.append(line)
+        return result
+
+    def _format(self, mnemonic, operands):
+        """Arma una línea de instrucción"""
+        return f"    {mnemonic} {', '.join(operands)}"
+
+    def _temps_live_after(self, code):
+        """Para cada línea, los temporales que se leen después sin redefinirse"""
+        live = set()
+        live_after = [None] * len(code)
+        for index in range(len(code) - 1, -1, -1):
+            live_after[index] = frozenset(live)
+            parts = self._split(code[index])
+            if parts is None:
+                continue
+            mnemonic, operands = parts
+            if self._defines(mnemonic, operands):
+                live.discard(operands[0])
+                operands = operands[1:]
+            for operand in operands:
+                live.update(self.TEMP_REGEX.findall(operand))
+        return live_after
+
+    def remove_redundant_moves(self, code):
+        """Quita 'mv x, x' y el segundo de 'mv a, b' + 'mv b, a'"""
+        result = []
+        previous = None
+        for line in code:
+            parts = self._split(line)
+            if parts is not None and parts[0] in self.MOVES and len(parts[1]) == 2:
+                target, source = parts[1]
+                if target == source or previous == (parts[0], source, target):
+                    continue
+                previous = (parts[0], target, source)
+            elif parts is not None or line.strip().endswith(':'):
+                previous = None
+            result.append(line)
+        return result
+
+    def remove_dead_loads(self, code):
+        """Quita cargas y copias a temporales que no se leen después"""
+        live = set()
+        kept = []
+        for line in reversed(code):
+            parts = self._split(line)
+            if parts is not None:
+                mnemonic, operands = parts
+                if self._defines(mnemonic, operands):
+                    target = operands[0]
+                    if (mnemonic in self.LOADS and self.TEMP_REGEX.fullmatch(target)
+                            and target not in live):
+                        continue
+                    live.discard(target)
+                    operands = operands[1:]
+                for operand in operands:
+                    live.update(self.TEMP_REGEX.findall(operand))
+            kept.append(line)
+        kept.reverse()
+        return kept
+
+    def remove_repeated_syscall_loads(self, code):
+        """Quita 'li a7, N' cuando a7 ya vale N (las syscalls no lo cambian)"""
+        result = []
+        a7 = None
+        for line in code:
+            parts = self._split(line)
+            if parts is None:
+                if line.strip().endswith(':'):
+                    a7 = None           # Puede llegarse desde un salto
+            else:
+                mnemonic, operands = parts
+                if mnemonic == 'li' and operands[0] == 'a7':
+                    if operands[1] == a7:
+                        continue
+                    a7 = operands[1]
+                elif mnemonic == 'call' or (operands and operands[0] == 'a7'
+                                            and self._defines(mnemonic, operands)):
+                    a7 = None
+            result.append(line)
+        return result
+
+class DeadStoreEliminator:
+    """
+    Eliminación de almacenes muertos por vivacidad (liveness) sobre el código
+    con registros virtuales, antes de asignar registros. Arma el grafo de
+    flujo de los bloques básicos (etiquetas, saltos y ramas, incluidas las
+    etiquetas locales 1f/1b), calcula los registros vivos a la salida de cada
+    bloque y quita las instrucciones que solo escriben un registro que nadie
+    lee después: asignaciones que se sobrescriben antes de leerse, cálculos
+    que no se usan y la copia del resultado de una llamada que se descarta.
+    Las llamadas, syscalls, stores y saltos se conservan siempre. removed
+    cuenta las instrucciones eliminadas y stats las eliminadas por función.
+    """
+
+    # Registros que se siguen: los virtuales y el auxiliar t0
+    REGISTER_REGEX = re.compile(r'%[if][vt]\d+|\bt0\b')
+    # Instrucciones con efectos además de escribir su destino
+    SIDE_EFFECTS = frozenset(['call', 'ecall', 'j', 'jal', 'jalr', 'ret'])
+
+    def __init__(self):
+        self.removed = 0
+        self.stats = {}
+
+    def optimize(self, code, live_out=frozenset()):
+        """
+        Quita las instrucciones muertas hasta que no quede ninguna. live_out
+        son los registros que se leen después del código (las variables, si
+        es solo un fragmento del programa)
+        """
+        while True:
+            dead = self._dead_instructions(code, live_out)
+            if not dead:
+                return code
+            function = None
+            globals_ = set()
+            for index, line in enumerate(code):
+                stripped = line.strip()
+                if stripped.startswith('.globl '):
+                    globals_.add(stripped[7:].strip())
+                elif stripped.endswith(':') and stripped[:-1] in globals_:
+                    function = stripped[:-1]
+                elif index in dead:
+                    self.stats[function] = self.stats.get(function, 0) + 1
+            self.removed += len(dead)
+            code = [line for index, line in enumerate(code) if index not in dead]
+
+    def _parse(self, line):
+        """Devuelve (mnemónico, operandos, destino, leídos) de una instrucción, o None"""
+        stripped = line.strip()
+        if not stripped or stripped[0] in '#.' or stripped[-1] == ':':
+            return None
+        mnemonic, _, operands = stripped.partition(' ')
+        target = None
+        read = operands
+        if operands and mnemonic not in RegisterAllocator.USE_ONLY and mnemonic not in self.SIDE_EFFECTS:
+            target, _, read = operands.partition(',')
+            target = target.strip()
+            if not self.REGISTER_REGEX.fullmatch(target):
+                # Escribe un registro físico (a0, a7, fa0...): no se sigue
+                target = None
+        return mnemonic, operands, target, set(self.REGISTER_REGEX.findall(read))
+
+    def _dead_instructions(self, code, live_out=frozenset()):
+        """Índices de las instrucciones cuyo destino no se lee después"""
+        # Bloques básicos: [índices de instrucciones, destinos de salto, sigue al siguiente]
+        blocks = []
+        labels = {}            # Etiqueta -> bloque
+        local_labels = {}      # Etiqueta numérica -> ([índices de línea], [bloques])
+        parsed = {}
+        block = None
+        for index, line in enumerate(code):
+            stripped = line.strip()
+            if stripped.endswith(':') and not stripped.startswith('#'):
+                label = stripped[:-1]
+                if block is None or block[0]:
+                    block = [[], [], True]
+                    blocks.append(block)
+                if label.isdigit():
+                    positions, numbers = local_labels.setdefault(label, ([], []))
+                    positions.append(index)
+                    numbers.append(len(blocks) - 1)
+                else:
+                    labels[label] = len(blocks) - 1
+                continue
+            instruction = self._parse(line)
+            if instruction is None:
+                continue
+            if block is None:
+                block = [[], [], True]
+                blocks.append(block)
+            parsed[index] = instruction
+            block[0].append(index)
+            mnemonic, operands = instruction[0], instruction[1]
+            if mnemonic == 'j' or mnemonic in RegisterAllocator.USE_ONLY and mnemonic[0] == 'b':
+                block[1].append((index, operands.rpartition(',')[2].strip()))
+                block[2] = mnemonic != 'j'
+                block = None
+
+        # Sucesores de cada bloque
+        successors = []
+        for number, (_, targets, falls_through) in enumerate(blocks):
+            succs = [number + 1] if falls_through and number + 1 < len(blocks) else []
+            for index, label in targets:
+                if label[:-1].isdigit() and label[-1] in 'fb':
+                    # 1f es la siguiente etiqueta 1: y 1b la anterior
+                    positions, numbers = local_labels.get(label[:-1], ([], []))
+                    position = bisect.bisect(positions, index) - (label[-1] == 'b')
+                    target = numbers[position] if 0 <= position < len(numbers) else None
+                else:
+                    target = labels.get(label)
+                if target is None:
+                    # Destino desconocido: suponer que todo puede leerse allí
+                    return set()
+                succs.append(target)
+            successors.append(succs)
+
+        # Registros leídos antes de escribirse (gen) y escritos (kill) por bloque
+        gen = []
+        kill = []
+        for indices, _, _ in blocks:
+            block_gen = set()
+            block_kill = set()
+            for index in reversed(indices):
+                _, _, target, uses = parsed[index]
+                if target is not None:
+                    block_gen.discard(target)
+                    block_kill.add(target)
+                block_gen |= uses
+            gen.append(block_gen)
+            kill.append(block_kill)
+
+        # Vivos a la salida de cada bloque, iterando hasta el punto fijo
+        predecessors = [[] for _ in blocks]
+        for number, succs in enumerate(successors):
+            for succ in succs:
+                predecessors[succ].append(number)
+        # Lo que sigue al código solo se alcanza pasando del último bloque
+        exit_live = [set() for _ in blocks]
+        if blocks and blocks[-1][2]:
+            exit_live[-1] = set(live_out)
+        live_in = [set() for _ in blocks]
+        live_out = [set() for _ in blocks]
+        worklist = list(range(len(blocks)))
+        pending = set(worklist)
+        while worklist:
+            number = worklist.pop()
+            pending.discard(number)
+            out = set(exit_live[number])
+            for succ in successors[number]:
+                out |= live_in[succ]
+            live_out[number] = out
+            new_in = gen[number] | (out - kill[number])
+            if new_in != live_in[number]:
+                live_in[number] = new_in
+                for pred in predecessors[number]:
+                    if pred not in pending:
+                        pending.add(pred)
+                        worklist.append(pred)
+
+        # Recorrido hacia atrás de cada bloque con los vivos a su salida
+        dead = set()
+        for number, (indices, _, _) in enumerate(blocks):
+            live = set(live_out[number])
+            for index in reversed(indices):
+                _, _, target, uses = parsed[index]
+                if target is not None:
+                    if target not in live:
+                        dead.add(index)
+                        continue
+                    live.discard(target)
+                live |= uses
+        return dead
+
+# Registros virtuales que emite CodeGenerator: %iv3 es la variable entera 3,
+# %ft0 el temporal flotante 0. RegisterAllocator los cambia por registros físicos.
+VIRTUAL_REGISTER_REGEX = re.compile(r'%[if][vt]\d+')
+
+# Marcas de entrada y salida del marco de main; RegisterAllocator las
+# sustituye por la reserva de pila y el guardado de registros
+FRAME_ENTER = "    # marco: entrada"
+FRAME_EXIT = "    # marco: salida"
+
+# Registros callee-saved reservados para las constantes 0.0 y 1.0; se
+# cargan una vez al entrar a main si el programa los usa
+FLOAT_ZERO_REGISTER = 'fs10'
+FLOAT_ONE_REGISTER = 'fs11'
+
+class LiveInterval:
+    """Intervalo de vida de un registro virtual (índices de instrucción)"""
+    __slots__ = ('start', 'end', 'kind', 'is_var', 'crosses_call', 'register', 'slot')
+
+    def __init__(self, start, kind, is_var):
+        self.start = start
+        self.end = start
+        self.kind = kind            # 'i' entero, 'f' flotante
+        self.is_var = is_var
+        self.crosses_call = False
+        self.register = None
+        self.slot = None            # Posición en la pila si se hizo spill
+
+class RegisterAllocator:
+    """
+    Asignación de registros por barrido lineal (linear scan) sobre los
+    intervalos de vida de los registros virtuales. Cuando no quedan registros
+    libres, el intervalo que termina más tarde se guarda en la pila (spill)
+    en una posición relativa a sp.
+
+    Con homes (registro virtual de cada variable -> posición en la pila) las
+    variables no se asignan: viven siempre en su posición y solo los
+    temporales reciben registros. El código de cada instrucción de nivel
+    superior queda así independiente del resto y IncrementalCompiler puede
+    asignar solo las que cambian.
+    """
+
+    # Registros que el generador usa directamente y no se asignan:
+    # t0 (direcciones y comparaciones), a0/a1/a7/fa0 (syscalls y llamadas),
+    # fs10/fs11 (constantes 0.0 y 1.0). t1, t2, ft9 y ft10 son para los spills.
+    CALLER_SAVED = {
+        'i': ['t3', 't4', 't5', 't6', 'a2', 'a3', 'a4', 'a5', 'a6'],
+        'f': [f'ft{i}' for i in range(9)] + [f'fa{i}' for i in range(1, 8)],
+    }
+    CALLEE_SAVED = {
+        'i': [f's{i}' for i in range(12)],
+        'f': [f'fs{i}' for i in range(10)],
+    }
+    SCRATCH = {'i': ('t1', 't2'), 'f': ('ft9', 'ft10')}
+    # Con homes cada registro callee-saved tiene un lugar fijo en el marco, así
+    # los desplazamientos no dependen de cuáles se guardan
+    SAVE_ORDER = CALLEE_SAVED['i'] + CALLEE_SAVED['f'] + [FLOAT_ZERO_REGISTER, FLOAT_ONE_REGISTER]
+
+    # Instrucciones cuyos operandos solo se leen
+    USE_ONLY = frozenset(['sw', 'fsw', 'beq', 'bne', 'blt', 'bge', 'ble', 'bgt',
+                          'beqz', 'bnez', 'blez', 'bgez', 'bltz', 'bgtz'])
+
+    def __init__(self, homes=None):
+        self.intervals = []
+        self.operands = {}     # índice de línea -> [(intervalo, es_definición)]
+        self.saved = []        # Registros callee-saved usados, a guardar en el marco
+        self.homes = homes
+        # Los temporales que no caben en registros van después de las variables
+        self.slots = len(homes) if homes else 0
+
+    def allocate(self, code, preserve=()):
+        """
+        Devuelve una copia del código con registros físicos y el marco de
+        main; preserve son registros callee-saved usados fuera del asignador
+        """
+        self._build_intervals(code)
+        self._scan()
+        self.saved.extend(preserve)
+        return self._rewrite(code)
+
+    def expand_frame(self, code):
+        """
+        Sustituye las marcas del marco de un código sin registros virtuales,
+        con los registros guardados y las posiciones ya fijadas en saved y
+        slots
+        """
+        return self._rewrite(code)
+
+    def _build_intervals(self, code):
+        """Calcula los intervalos de vida, extendidos sobre los bucles"""
+        current = {}           # Nombre virtual -> intervalo actual
+        labels = {}
+        loops = []             # (inicio, salto de regreso)
+        calls = []
+        intervals = self.intervals
+        use_only = self.USE_ONLY
+        homes = self.homes
+
+        for index, line in enumerate(code):
+            if '%' not in line:
+                stripped = line.strip()
+                if stripped.endswith(':'):
+                    labels[stripped[:-1]] = index
+                elif stripped.startswith('j '):
+                    target = labels.get(stripped[2:].strip())
+                    if target is not None:
+                        loops.append((target, index))
+                elif stripped.startswith('call '):
+                    calls.append(index)
+                continue
+
+            mnemonic, _, operands = line.lstrip().partition(' ')
+            names = VIRTUAL_REGISTER_REGEX.findall(line)
+            # El primer operando es el destino, salvo en saltos y stores
+            defines = mnemonic not in use_only and operands.startswith('%')
+            ops = []
+            ops_names = names[1:] if defines else names
+            for name in ops_names:
+                interval = current.get(name)
+                if interval is None:
+                    # Lectura antes de cualquier escritura (variable sin inicializar)
+                    interval = current[name] = LiveInterval(index, name[1], name[2] == 'v')
+                    if homes is not None and interval.is_var:
+                        interval.slot = homes[name]
+                    intervals.append(interval)
+                interval.end = index
+                ops.append((interval, False))
+            if defines:
+                name = names[0]
+                # Cada definición de un temporal empieza un intervalo nuevo,
+                # salvo si también lo lee (addi %it0, %it0, 4)
+                interval = current.get(name) if name[2] == 'v' or name in ops_names else None
+                if interval is None:
+                    interval = current[name] = LiveInterval(index, name[1], name[2] == 'v')
+                    if homes is not None and interval.is_var:
+                        interval.slot = homes[name]
+                    intervals.append(interval)
+                interval.end = index
+                ops.insert(0, (interval, True))
+            self.operands[index] = ops
+
+        # Un valor vivo al volver al inicio de un bucle debe vivir en todo el
+        # bucle: las variables que lo tocan y los temporales definidos antes
+        by_start = sorted(loops)
+        loop_starts = [start for start, _ in by_start]
+        # Los bucles están anidados: a una variable solo le importan los más
+        # externos, que quedan como rangos disjuntos y ordenados
+        outer = []
+        for start, end in by_start:
+            if outer and start <= outer[-1][1]:
+                if end > outer[-1][1]:
+                    outer[-1] = (outer[-1][0], end)
+                continue
+            outer.append((start, end))
+        outer_starts = [start for start, _ in outer]
+        outer_ends = [end for _, end in outer]
+        for interval in intervals:
+            if interval.is_var:
+                low = bisect.bisect_left(outer_ends, interval.start)
+                high = bisect.bisect_right(outer_starts, interval.end)
+                if low < high:
+                    interval.start = min(interval.start, outer_starts[low])
+                    interval.end = max(interval.end, outer_ends[high - 1])
+            else:
+                low = bisect.bisect_right(loop_starts, interval.start)
+                high = bisect.bisect_right(loop_starts, interval.end)
+                for _, end in by_start[low:high]:
+                    interval.end = max(interval.end, end)
+
+            # Las llamadas destruyen los registros caller-saved
+            position = bisect.bisect_right(calls, interval.start)
+            interval.crosses_call = position < len(calls) and calls[position] < interval.end
+
+        intervals.sort(key=lambda interval: interval.start)
+
+    def _scan(self):
+        """Recorre los intervalos por inicio asignando registros o posiciones de pila"""
+        caller = {kind: registers[::-1] for kind, registers in self.CALLER_SAVED.items()}
+        callee = {kind: registers[::-1] for kind, registers in self.CALLEE_SAVED.items()}
+        callee_set = {register for registers in self.CALLEE_SAVED.values()
+                      for register in registers}
+        saved = set()
+        active = []            # Intervalos con registro, ordenados por fin
+        spilled = []           # Intervalos en la pila, ordenados por fin
+        free_slots = []        # (fin del último dueño, posición)
+
+        for interval in self.intervals:
+            if interval.slot is not None:
+                # Variable en su posición fija (homes)
+                continue
+            # Liberar lo que ya terminó; un intervalo que acaba donde empieza
+            # otro puede compartir registro porque se lee antes de escribir
+            while active and active[0].end <= interval.start:
+                done = active.pop(0)
+                pool = callee if done.register in callee_set else caller
+                pool[done.kind].append(done.register)
+            while spilled and spilled[0].end <= interval.start:
+                done = spilled.pop(0)
+                free_slots.append((done.end, done.slot))
+
+            kind = interval.kind
+            if not interval.crosses_call and caller[kind]:
+                interval.register = caller[kind].pop()
+            elif callee[kind]:
+                interval.register = callee[kind].pop()
+            else:
+                # Quitar el registro al intervalo activo que termina más tarde
+                victim = None
+                for other in reversed(active):
+                    if other.kind == kind and (other.register in callee_set
+                                               or not interval.crosses_call):
+                        victim = other
+                        break
+                if victim is not None and victim.end > interval.end:
+                    interval.register = victim.register
+                    victim.register = None
+                    active.remove(victim)
+                    self._spill(victim, spilled, free_slots)
+                else:
+                    self._spill(interval, spilled, free_slots)
+                    continue
+
+            if interval.register in callee_set:
+                saved.add(interval.register)
+            bisect.insort(active, interval, key=lambda other: other.end)
+
+        self.saved = [register for kind in ('i', 'f')
+                      for register in self.CALLEE_SAVED[kind] if register in saved]
+
+    def _spill(self, interval, spilled, free_slots):
+        """Asigna una posición de la pila a un intervalo"""
+        # Un intervalo desalojado empezó antes: solo puede usar una posición
+        # que ya estaba libre desde su inicio
+        for position in range(len(free_slots) - 1, -1, -1):
+            if free_slots[position][0] <= interval.start:
+                interval.slot = free_slots.pop(position)[1]
+                break
+        else:
+            interval.slot = self.slots
+            self.slots += 1
+        bisect.insort(spilled, interval, key=lambda other: other.end)
+
+    def _stack_access(self, op, register, offset):
+        """Carga o guarda un registro en sp+offset"""
+        if offset < 2048:
+            return [f"    {op} {register}, {offset}(sp)"]
+        # Desplazamiento fuera del inmediato de 12 bits
+        return [f"    li t0, {offset}", "    add t0, t0, sp", f"    {op} {register}, 0(t0)"]
+
+    def _rewrite(self, code):
+        """Sustituye los registros virtuales y expande las marcas del marco"""
+        # Marco: ra, registros callee-saved y posiciones de spill, alineado a 16
+        order = self.saved if self.homes is None else self.SAVE_ORDER
+        base = 4 * (1 + len(order))
+        size = (base + 4 * self.slots + 15) // 16 * 16
+        saves = [('fsw' if register.startswith('f') else 'sw', register, 4 * (1 + i))
+                 for i, register in enumerate(order) if register in self.saved]
+        store = {'i': 'sw', 'f': 'fsw'}
+        load = {'i': 'lw', 'f': 'flw'}
+        scratch = self.SCRATCH
+
+        result = []
+        for index, line in enumerate(code):
+            ops = self.operands.get(index)
+            if ops is None:
+                if line == FRAME_ENTER:
+                    if size < 2048:
+                        result.append(f"    addi sp, sp, -{size}")
+                    else:
+                        result.append(f"    li t0, {size}")
+                        result.append("    sub sp, sp, t0")
+                    result.append("    sw ra, 0(sp)")
+                    for op, register, offset in saves:
+                        result.append(f"    {op} {register}, {offset}(sp)")
+                elif line == FRAME_EXIT:
+                    result.append("    lw ra, 0(sp)")
+                    for op, register, offset in saves:
+                        result.append(f"    {'flw' if op == 'fsw' else 'lw'} {register}, {offset}(sp)")
+                    if size < 2048:
+                        result.append(f"    addi sp, sp, {size}")
+                    else:
+                        result.append(f"    li t0, {size}")
+                        result.append("    add sp, sp, t0")
+                else:
+                    result.append(line)
+                continue
+
+            stores = []
+            loaded = {}
+            used = {'i': 0, 'f': 0}
+            # Primero se cargan los operandos leídos que están en la pila
+            for interval, is_definition in ops:
+                if interval.slot is None or is_definition or interval in loaded:
+                    continue
+                kind = interval.kind
+                register = scratch[kind][used[kind]]
+                used[kind] += 1
+                loaded[interval] = register
+                result.extend(self._stack_access(load[kind], register,
+                                                 base + 4 * interval.slot))
+            # El destino puede reutilizar el registro de un operando leído
+            for interval, is_definition in ops:
+                if interval.slot is None or not is_definition:
+                    continue
+                register = loaded.setdefault(interval, scratch[interval.kind][0])
+                stores.extend(self._stack_access(store[interval.kind], register,
+                                                 base + 4 * interval.slot))
+            names = [loaded[interval] if interval.slot is not None else interval.register
+                     for interval, _ in ops]
+            names = iter(names)
+            result.append(VIRTUAL_REGISTER_REGEX.sub(lambda match: next(names), line))
+            result.extend(stores)
+        return result
+
+class CompiledItem:
+    """Declaración o instrucción de nivel superior ya compilada"""
+
+    __slots__ = ('start', 'end', 'node', 'declaration', 'state', 'state_after',
+                 'code_start', 'code_end', 'data_start', 'data_end', 'constants', 'dirty',
+                 'fragment')
+
+    def __init__(self, start, end, node, declaration, state, state_after,
+                 code_start, code_end, data_start, data_end, constants=()):
+        self.start = start              # Índice de su primer token
+        self.end = end                  # Índice del token siguiente al último
+        self.node = node                # Nodo del AST
+        self.declaration = declaration  # True si es una declaración de variable
+        self.state = state              # Estado del compilador antes de compilarla
+        self.state_after = state_after  # Estado del compilador después
+        self.code_start = code_start    # Líneas de código que emitió
+        self.code_end = code_end
+        self.data_start = data_start    # Entradas de .data que emitió
+        self.data_end = data_end
+        self.constants = constants      # Cambios en las constantes conocidas
+        self.dirty = False              # Tocada por una edición
+        self.fragment = None            # Su código con registros (allocate_fragment)
+
+class IncrementalCompiler:
+    """
+    Compilación incremental para editores: conserva los tokens y los límites
+    de las declaraciones e instrucciones de nivel superior, vuelve a analizar
+    solo la región dañada por cada edición y reutiliza el AST de las
+    instrucciones que no cambiaron, y también su código generado si el estado
+    del compilador antes de ellas es el mismo.
+    """
+
+    def __init__(self, code, peephole=False, fold=False, optimize_loops=False, unroll=1,
+                 dead_stores=False, inline_math=0):
+        self.text = code
+        self.peephole = peephole
+        self.dead_stores = dead_stores
+        self.inline_math = inline_math
+        self.fold = fold
+        self.optimize_loops = optimize_loops
+        self.unroll = unroll
+        self.items = []
+        self.tokens = None
+        self.starts = []   # Desplazamiento inicial de cada token
+        self.ends = []     # Desplazamiento final de cada token
+        # Tokens iniciales que no cambiaron desde la última compilación correcta
+        self._clean_tokens = 0
+        # Resultado de la última compilación correcta
+        self._code = []
+        self._data = []
+        self._symbols = []
+        self._instruction_count = 0
+
+    def _lex_all(self):
+        """Analiza léxicamente todo el texto"""
+        self.items = []
+        self.tokens, self.starts, self.ends = self._lex_from(0, 1)
+
+    def _lex_from(self, pos, line, resync=None):
+        """
+        Analiza desde pos; si resync(start) devuelve un índice de token
+        antiguo, se detiene ahí y devuelve también ese índice
+        """
+        lexer = RegexLexer(self.text, pos, line)
+        tokens, starts, ends = [], [], []
+        while True:
+            token = lexer.get_next_token()
+            if resync is not None:
+                index = resync(lexer.start)
+                if index is not None:
+                    return tokens, starts, ends, index, token.line
+            tokens.append(token)
+            starts.append(lexer.start)
+            ends.append(lexer.pos)
+            if token.type == TokenType.EOF:
+                if resync is not None:
+                    return tokens, starts, ends, len(self.tokens), token.line
+                return tokens, starts, ends
+
+    def edit(self, offset, deleted, inserted):
+        """
+        Aplica una edición (desplazamiento, longitud borrada, texto insertado)
+        y devuelve el CompileResult del programa resultante
+        """
+        if offset < 0 or deleted < 0 or offset + deleted > len(self.text):
+            raise Exception(f"Error: edición fuera del texto ({offset}, {deleted})")
+
+        self.text = self.text[:offset] + inserted + self.text[offset + deleted:]
+        if self.tokens is not None:
+            try:
+                self._relex(offset, deleted, len(inserted))
+            except Exception:
+                # El error se reporta al volver a analizar todo el texto
+                self.tokens = None
+        return self.compile()
+
+    def _relex(self, offset, deleted, inserted):
+        """Vuelve a analizar solo los tokens afectados por la edición"""
+        delta = inserted - deleted
+        edit_end = offset + inserted
+        old_starts = self.starts
+
+        # Reiniciar al final del último token que termina antes de la edición
+        first = bisect.bisect_left(self.ends, offset)
+        restart = self.ends[first - 1] if first > 0 else 0
+
+        def resync(start):
+            # Tras la edición, el texto a partir de un inicio de token antiguo
+            # es idéntico, así que el resto de tokens no cambia
+            if start < edit_end:
+                return None
+            index = bisect.bisect_left(old_starts, start - delta, first)
+            if index < len(old_starts) and old_starts[index] == start - delta:
+                return index
+            return None
+
+        tokens, starts, ends, last, line = self._lex_from(
+            restart, self.text.count('\n', 0, restart) + 1, resync)
+
+        # Sustituir los tokens dañados y desplazar los posteriores
+        if last < len(self.tokens):
+            line_delta = line - self.tokens[last].line
+            if line_delta:
+                for token in itertools.islice(self.tokens, last, None):
+                    token.line += line_delta
+        self.tokens[first:last] = tokens
+        tail = first + len(tokens)
+        self.starts[first:] = starts + [start + delta for start in self.starts[last:]]
+        self.ends[first:] = ends + [end + delta for end in self.ends[last:]]
+
+        # Invalidar las instrucciones que tocan los tokens reemplazados
+        self._clean_tokens = min(self._clean_tokens, first)
+        shift = tail - last
+        items = self.items
+        low = bisect.bisect_right(items, first, key=lambda item: item.end)
+        high = low
+        while high < len(items) and items[high].start < last:
+            high += 1
+        # Las que empiezan antes conservan un límite válido, pero deben recompilarse
+        damaged = [item for item in items[low:high] if item.start < first]
+        for item in damaged:
+            item.dirty = True
+        if shift:
+            for item in itertools.islice(items, high, None):
+                item.start += shift
+                item.end += shift
+        items[low:high] = damaged
+
+    def compile(self):
+        """
+        Compila el programa reutilizando las instrucciones sin cambios y
+        devuelve un CompileResult, como Compiler.build. Tras un error se
+        conservan los resultados de la última compilación correcta para la
+        siguiente edición.
+        """
+        start = time.perf_counter()
+        result = CompileResult()
+        try:
+            result.assembly = self._compile()
+            result.stats['instrucciones'] = self._instruction_count
+        except Exception as e:
+            result = CompileResult(diagnostics=[Diagnostic.from_exception(e)])
+        result.stats['segundos'] = time.perf_counter() - start
+        return result
+
+    def _compile(self):
+        """Compila el programa y devuelve el código ensamblador; lanza los errores"""
+        if self.tokens is None:
+            # Primera compilación o error léxico anterior: analizar todo el texto
+            try:
+                self._lex_all()
+            except Exception:
+                self.tokens = None
+                raise
+
+        stream = TokenStream(self.tokens)
+        parser = Parser(stream)
+        table = parser.symbol_table
+        generator = CodeGenerator(table, self.peephole, self.fold, self.optimize_loops,
+                                  self.unroll, dead_stores=self.dead_stores,
+                                  inline_math=self.inline_math)
+        folder = generator.folder
+        tokens = self.tokens
+        old_items = self.items
+        old_code, old_data, old_symbols = self._code, self._data, self._symbols
+
+        # Prefijo de instrucciones sin cambios: restaurar el estado tras él
+        count = bisect.bisect_right(old_items, self._clean_tokens, key=lambda item: item.end)
+        pos = old_items[count - 1].end if count else 0
+
+        items = old_items[:count]
+        if items:
+            last = items[-1]
+            generator.code = old_code[:last.code_end]
+            generator.data_section = old_data[:last.data_end]
+            table.symbols = dict(old_symbols[:last.state_after[1]])
+            self._restore_state(table, generator, last.state_after)
+            if folder:
+                for item in items:
+                    folder.apply(item.constants)
+            declarations = last.state_after[0]
+            in_declarations = last.declaration
+        else:
+            generator.emit_program_header()
+            declarations = 0       # Huella de las declaraciones vistas
+            in_declarations = True
+
+        shifts = []                # Desplazamientos de las marcas reutilizadas
+        index = count
+        try:
+            # Como en Parser.statement_list, un '}' sin abrir termina las instrucciones
+            while tokens[pos].type not in (TokenType.END, TokenType.EOF, TokenType.RBRACE):
+                is_declaration = in_declarations and tokens[pos].type == TokenType.VAR
+                state = self._state_key(table, generator, declarations)
+
+                while index < len(old_items) and old_items[index].start < pos:
+                    index += 1
+                if index < len(old_items):
+                    item = old_items[index]
+                    if (item.start == pos and not item.dirty and item.state == state
+                            and item.declaration == is_declaration):
+                        # El resto coincide con la compilación anterior: copiarlo
+                        end = index
+                        while (end < len(old_items) and not old_items[end].dirty
+                               and old_items[end].start == pos):
+                            pos = old_items[end].end
+                            end += 1
+                        last = old_items[end - 1]
+                        shifts.append((index, end, len(generator.code) - item.code_start,
+                                       len(generator.data_section) - item.data_start))
+                        generator.code.extend(old_code[item.code_start:last.code_end])
+                        generator.data_section.extend(old_data[item.data_start:last.data_end])
+                        table.symbols.update(old_symbols[state[1]:last.state_after[1]])
+                        self._restore_state(table, generator, last.state_after)
+                        if folder:
+                            for item in itertools.islice(old_items, index, end):
+                                folder.apply(item.constants)
+                        declarations = last.state_after[0]
+                        in_declarations = last.declaration
+                        items.extend(old_items[index:end])
+                        index = end
+                        continue
+
+                # Compilar la declaración o instrucción
+                code_start = len(generator.code)
+                data_start = len(generator.data_section)
+                node = None
+                if index < len(old_items):
+                    item = old_items[index]
+                    if (item.start == pos and not item.dirty and not item.declaration
+                            and not is_declaration and item.state[0] == declarations):
+                        # Mismos tokens y declaraciones: reutilizar el AST
+                        node = item.node
+                        end = item.end
+                if node is None:
+                    stream.pos = pos
+                    parser.current_token = stream.get_next_token()
+                    if is_declaration:
+                        node = parser.variable_declaration()
+                        declarations = hash((declarations, node.name, node.type_name))
+                    else:
+                        node = parser.statement()
+                    end = stream.pos - 1
+                constants = ()
+                if not is_declaration:
+                    if folder:
+                        folder.log = []
+                    generator.generate_statement(node)
+                    if folder:
+                        constants = tuple(folder.log)
+                in_declarations = is_declaration
+
+                items.append(CompiledItem(pos, end, node, is_declaration, state,
+                                          self._state_key(table, generator, declarations),
+                                          code_start, len(generator.code),
+                                          data_start, len(generator.data_section),
+                                          constants))
+                pos = end
+
+            # Fin del programa
+            stream.pos = pos
+            parser.current_token = stream.get_next_token()
+            parser.eat(TokenType.END)
+            parser.eat(TokenType.DOT)
+            footer_start = len(generator.code)
+            generator.emit_program_footer()
+        except Exception as e:
+            # Errores semánticos del parser: la línea del token actual
+            if not hasattr(e, 'line'):
+                e.line = parser.current_token.line
+            raise
+
+        for start, end, code_shift, data_shift in shifts:
+            if not code_shift and not data_shift:
+                continue
+            for item in itertools.islice(old_items, start, end):
+                item.code_start += code_shift
+                item.code_end += code_shift
+                item.data_start += data_shift
+                item.data_end += data_shift
+        self.items = items
+        self._clean_tokens = len(tokens)
+        self._code = generator.code
+        self._data = generator.data_section
+        self._symbols = list(table.symbols.items())
+
+        # Asignar registros solo a las instrucciones nuevas: con las variables
+        # en posiciones fijas, las demás conservan su código ya asignado
+        variables = [info['register'] for info in table.symbols.values()
+                     if info['register'] and info['register'][0] == '%']
+        homes = {register: slot for slot, register in enumerate(variables)}
+        fragments = []
+        for item in items:
+            if item.declaration:
+                continue
+            if item.fragment is None:
+                item.fragment = generator.allocate_fragment(
+                    generator.code[item.code_start:item.code_end], homes)
+            fragments.append(item.fragment)
+        header_end = items[0].code_start if items else footer_start
+        code = generator.get_fragments_code(generator.code[:header_end], fragments,
+                                            generator.code[footer_start:], homes)
+        self._instruction_count = generator.instruction_count
+        return code
+
+    def _state_key(self, table, generator, declarations):
+        """Estado del compilador del que depende el código de una instrucción"""
+        return (declarations, len(table.symbols), table.int_reg_idx, table.float_reg_idx,
+                generator.label_count, generator.string_count,
+                generator.folder.fingerprint if generator.folder else 0)
+
+    def _restore_state(self, table, generator, state):
+        """Restablece los contadores guardados en una clave de estado"""
+        (_, _, table.int_reg_idx, table.float_reg_idx,
+         generator.label_count, generator.string_count, _) = state
+        # Entre instrucciones no hay temporales vivos y un pool vacío entrega
+        # los mismos nombres que uno con todos los temporales liberados
+        table.reset_temps()
+
+class PassTimer:
+    """
+    Mide cada fase de la compilación: tiempo, memoria pico de tracemalloc
+    y los tokens o instrucciones que produce. Las fases con el mismo nombre
+    se acumulan, así que sirve para varias compilaciones seguidas.
+    """
+    
+    def __init__(self, memory=True):
+        # Medir también la memoria (tracemalloc hace más lenta la compilación)
+        self.memory = memory
+        self.passes = {}
+    
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Mide el bloque como la fase name; los conteos se anotan en el diccionario que entrega"""
+        info = {}
+        started = False
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started = True
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield info
+        finally:
+            elapsed = time.perf_counter() - start
+            peak = 0
+            if self.memory:
+                peak = tracemalloc.get_traced_memory()[1] - baseline
+                if started:
+                    tracemalloc.stop()
+            record = self.passes.setdefault(name, {'segundos': 0.0, 'memoria_pico': 0,
+                                                   'veces': 0})
+            record['segundos'] += elapsed
+            record['memoria_pico'] = max(record['memoria_pico'], peak)
+            record['veces'] += 1
+            for key, value in info.items():
+                record[key] = record.get(key, 0) + value
+    
+    def reset(self):
+        self.passes = {}
+    
+    def to_json(self):
+        """Fases en formato JSON, en el orden en que se ejecutaron"""
+        return json.dumps([{'fase': name, **record} for name, record in self.passes.items()],
+                          ensure_ascii=False, indent=2)
+    
+    def report(self):
+        """Tabla de texto con una fila por fase y el total"""
+        total = sum(record['segundos'] for record in self.passes.values()) or 1e-9
+        lines = [f"{'fase':<17} {'tiempo (ms)':>12} {'%':>6} {'memoria (KB)':>13} "
+                 f"{'tokens':>9} {'instrucciones':>14}"]
+        for name, record in self.passes.items():
+            tokens = record.get('tokens', '')
+            instructions = record.get('instrucciones', '')
+            lines.append(f"{name:<17} {record['segundos'] * 1000:>12.2f} "
+                         f"{100 * record['segundos'] / total:>5.1f}% "
+                         f"{record['memoria_pico'] / 1024:>13.1f} {tokens:>9} {instructions:>14}")
+        lines.append(f"{'total':<17} {total * 1000:>12.2f} {100.0:>5.1f}%")
+        return "\n".join(lines)
+
+
+def timed_phase(timer, name):
+    """Fase medida por timer, o un contexto vacío si no se mide"""
+    return timer.phase(name) if timer else contextlib.nullcontext({})
+
+
+def count_instructions(code):
+    """Número de instrucciones en una lista de líneas de ensamblador"""
+    return sum(1 for line in code if line.startswith('    ') and not line.startswith('    #'))
+
+
+def write_lines(sink, lines, block=4096):
+    """
+    Escribe líneas de ensamblador en sink, una lista o un objeto con write,
+    de a block líneas: el texto queda igual que con "\n".join(lines)
+    """
+    if isinstance(sink, list):
+        sink.extend(lines)
+        return
+    lines = iter(lines)
+    separator = ""
+    while True:
+        chunk = list(itertools.islice(lines, block))
+        if not chunk:
+            break
+        sink.write(separator)
+        sink.write("\n".join(chunk))
+        separator = "\n"
+
+
+class Diagnostic:
+    """
+    Error de compilación con su fase y la línea del código fuente (o del
+    ensamblador, en los errores de ensamblado)
+    """
+    
+    __slots__ = ('kind', 'message', 'line')
+    
+    # Prefijo del mensaje -> fase que produjo el error
+    KINDS = {'Error léxico': 'léxico', 'Error de sintaxis': 'sintáctico',
+             'Error semántico': 'semántico', 'Error de ensamblado': 'ensamblado'}
+    
+    def __init__(self, kind, message, line=None):
+        self.kind = kind
+        self.message = message
+        self.line = line
+    
+    @classmethod
+    def from_exception(cls, error):
+        """Diagnóstico a partir de una excepción del compilador"""
+        message = str(error)
+        kind = next((kind for prefix, kind in cls.KINDS.items() if message.startswith(prefix)),
+                    'interno')
+        match = re.search(r'en línea (\d+)', message)
+        line = int(match.group(1)) if match else getattr(error, 'line', None)
+        return cls(kind, message, line)
+    
+    def to_dict(self):
+        return {'fase': self.kind, 'mensaje': self.message, 'linea': self.line}
+    
+    def __str__(self):
+        if self.line is not None and 'en línea' not in self.message:
+            return f"{self.message} en línea {self.line}"
+        return self.message
+    
+    def __repr__(self):
+        return f"Diagnostic({self.kind!r}, {self.message!r}, {self.line!r})"
+
+
+class CompileResult:
+    """
+    Resultado de una compilación: el código ensamblador, el objeto ELF si
+    se pidió, los diagnósticos y las estadísticas. ok dice si compiló sin
+    errores, sin tener que buscar el texto del error en la salida.
+    """
+    
+    __slots__ = ('assembly', 'binary', 'diagnostics', 'stats')
+    
+    def __init__(self, assembly=None, binary=None, diagnostics=None, stats=None):
+        self.assembly = assembly
+        self.binary = binary
+        self.diagnostics = diagnostics or []
+        # segundos, instrucciones, caché, mirilla_eliminadas...
+        self.stats = stats or {}
+    
+    @property
+    def ok(self):
+        return not self.diagnostics
+    
+    @property
+    def error(self):
+        """Mensaje del primer error, o None"""
+        return str(self.diagnostics[0]) if self.diagnostics else None
+    
+    def to_dict(self):
+        """Diagnósticos y estadísticas (sin el código) para guardar como JSON"""
+        return {'ok': self.ok, 'diagnosticos': [d.to_dict() for d in self.diagnostics],
+                'estadisticas': self.stats}
+
+
+class CompileCache:
+    """
+    Caché en disco de resultados de compilación. La clave es un hash del
+    código fuente, las opciones que cambian la salida y el propio
+    compilador, así que un cambio en cualquiera de ellos produce una
+    entrada nueva. Al superar el tamaño máximo se borran las entradas
+    usadas hace más tiempo (la fecha de modificación se renueva en cada
+    acierto).
+    """
+
+    # Opciones del compilador que cambian el código generado
+    OPTIONS = ('peephole', 'fold', 'optimize_loops', 'unroll', 'cse', 'dead_stores',
+               'inline_math')
+    _version = None
+
+    def __init__(self, directory, max_bytes=64 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # Tamaño ocupado en disco; se calcula la primera vez que se guarda
+        self.size = None
+
+    @classmethod
+    def compiler_version(cls):
+        """Hash del código del compilador y del ensamblador"""
+        if cls._version is None:
+            digest = hashlib.sha256()
+            directory = os.path.dirname(os.path.abspath(__file__))
+            for name in ('compiler.py', 'assembler.py'):
+                with open(os.path.join(directory, name), 'rb') as f:
+                    digest.update(f.read())
+            cls._version = digest.hexdigest()
+        return cls._version
+
+    def hasher(self, compiler, kind):
+        """Hash inicial de una clave con la versión y las opciones del compilador"""
+        digest = hashlib.sha256(self.compiler_version().encode())
+        options = ','.join(f"{name}={getattr(compiler, name)!r}" for name in self.OPTIONS)
+        digest.update(f"{kind};{options};".encode())
+        return digest
+
+    def key(self, compiler, code, kind='s'):
+        """Clave de un código fuente compilado con las opciones de compiler"""
+        digest = self.hasher(compiler, kind)
+        digest.update(code.encode('utf-8'))
+        return digest.hexdigest() + '.' + kind
+
+    def file_key(self, compiler, path, kind='s'):
+        """Clave de un archivo fuente, leyéndolo por bloques"""
+        digest = self.hasher(compiler, kind)
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 16), b''):
+                digest.update(block)
+        return digest.hexdigest() + '.' + kind
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def load(self, key):
+        """CompileResult guardado con la clave, o None"""
+        data = self.get(key)
+        if data is None:
+            return None
+        if key.endswith('.o'):
+            return CompileResult(binary=data, stats={'caché': True})
+        return CompileResult(assembly=data.decode('utf-8'), stats={'caché': True})
+
+    def store(self, key, result):
+        """Guarda el ensamblador (o el objeto, con claves .o) de un resultado correcto"""
+        if key.endswith('.o'):
+            self.put(key, result.binary)
+        else:
+            self.put(key, result.assembly.encode('utf-8'))
+
+    def get(self, key):
+        """Devuelve el contenido guardado (bytes) o None, y cuenta el acierto o fallo"""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def put(self, key, data):
+        """Guarda una entrada y libera espacio si se supera el tamaño máximo"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Escribir a un temporal y renombrar, por si otro proceso lee a la vez
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, 'wb') as f:
+            f.write(data)
+        # Al reemplazar una entrada solo cambia la diferencia de tamaño
+        try:
+            previous = os.stat(path).st_size
+        except FileNotFoundError:
+            previous = 0
+        os.replace(temporary, path)
+        if self.size is None:
+            self.size = sum(size for _, size, _ in self._entries())
+        else:
+            self.size += len(data) - previous
+        if self.size > self.max_bytes:
+            self.evict()
+
+    def _entries(self):
+        """(último uso, tamaño, ruta) de cada entrada en disco"""
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for bucket in os.scandir(self.directory):
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                if entry.name.endswith('.tmp'):
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def evict(self):
+        """Borra las entradas menos usadas hasta quedar en el 90% del máximo"""
+        entries = sorted(self._entries())
+        self.size = sum(size for _, size, _ in entries)
+        limit = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if self.size <= limit:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            self.size -= size
+
 
 class Compiler:
     """Clase principal del compilador"""
     
-    def __init__(self):
-        pass
+    def __init__(self, lexer='char', token_buffer=False, peephole=False, fold=False,
+                 optimize_loops=False, unroll=1, cse=False, cache=None, time_passes=False,
+                 max_errors=20, dead_stores=False, inline_math=0):
+        # Motor léxico por defecto ('char', 'regex' o 'stream')
+        self.lexer = lexer
+        # Analizar primero todos los tokens a un búfer columnar compacto
+        self.token_buffer = token_buffer
+        # Aplicar el optimizador de mirilla al código generado
+        self.peephole = peephole
+        # Plegar y propagar constantes antes de generar código
+        self.fold = fold
+        # Mover cálculos invariantes fuera de los bucles y reducir operaciones
+        self.optimize_loops = optimize_loops
+        # Factor de desenrollado de los for con número de vueltas conocido
+        self.unroll = unroll
+        # Reutilizar subexpresiones comunes dentro de cada bloque básico
+        self.cse = cse
+        # Quitar las instrucciones que escriben valores que nunca se leen
+        self.dead_stores = dead_stores
+        # Calcular sin, cos y tan en línea con polinomios de este nivel (1-3)
+        self.inline_math = inline_math
+        # Instrucciones eliminadas por el optimizador en la última compilación
+        self.peephole_removed = 0
+        # Instrucciones muertas eliminadas en la última compilación, por función
+        self.dead_stores_removed = {}
+        # Instrucciones del código generado en la última compilación
+        self.instruction_count = 0
+        # Valores reutilizados por la eliminación de subexpresiones comunes
+        self.cse_reused = 0
+        # Caché en disco (CompileCache o directorio); con un acierto no se
+        # actualizan las estadísticas anteriores
+        if isinstance(cache, str):
+            cache = CompileCache(cache)
+        self.cache = cache
+        # Medición por fases (PassTimer) de las compilaciones, o None
+        self.timer = PassTimer() if time_passes else None
+        # Errores de sintaxis a reunir en una pasada antes de detenerse
+        self.max_errors = max_errors
+    
+    def build(self, code, binary=False, lexer=None, sink=None):
+        """
+        Compila el código fuente y devuelve un CompileResult con el
+        ensamblador, el objeto ELF si binary, los diagnósticos y las
+        estadísticas. No lanza excepciones por errores del programa.
+        Con un sink (archivo abierto, búfer o lista de líneas) el ensamblador
+        se escribe ahí a medida que sale y result.assembly queda en None.
+        """
+        return self._build(code, None, binary, lexer or self.lexer, sink)
+    
+    def build_file(self, path, binary=False, sink=None):
+        """Como build, leyendo el archivo fuente por bloques"""
+        return self._build(None, path, binary, 'stream', sink)
     
-    def compile(self, code):
+    def build_to(self, output_file, code=None, path=None, binary=False):
+        """
+        Compila code (o el archivo path) y escribe el ensamblador (o el
+        objeto, si binary) en output_file. Se escribe en un archivo temporal
+        que reemplaza a output_file solo si la compilación es correcta; el
+        resultado vuelve sin el código.
+        """
+        partial = output_file + '.tmp'
+        with open(partial, 'wb' if binary else 'w') as f:
+            sink = None if binary else f
+            if path:
+                result = self.build_file(path, binary, sink)
+            else:
+                result = self.build(code, binary, sink=sink)
+            if result.ok and binary:
+                with timed_phase(self.timer, 'salida'):
+                    f.write(result.binary)
+        if result.ok:
+            os.replace(partial, output_file)
+        else:
+            os.remove(partial)
+        result.assembly = result.binary = None
+        return result
+    
+    def compile(self, code, lexer=None):
         """Compila el código fuente y devuelve el código ensamblador"""
+        result = self.build(code, lexer=lexer)
+        return result.assembly if result.ok else f"Error de compilación: {result.error}"
+    
+    def compile_file(self, path):
+        """
+        Compila un archivo fuente leyéndolo por bloques, sin cargarlo completo
+        en memoria, y devuelve el código ensamblador
+        """
+        result = self.build_file(path)
+        return result.assembly if result.ok else f"Error de compilación: {result.error}"
+    
+    def compile_binary(self, code, lexer=None):
+        """
+        Compila el código fuente y ensambla el resultado a un objeto ELF32
+        reubicable para RV32IMF; lanza una excepción si algo falla
+        """
+        result = self.build(code, binary=True, lexer=lexer)
+        if not result.ok:
+            raise Exception(f"Error de compilación: {result.error}")
+        return result.binary
+    
+    def _build(self, code, path, binary, lexer, sink=None):
+        """Compila code (o el archivo path) consultando antes la caché"""
+        start = time.perf_counter()
+        kind = 'o' if binary else 's'
+        key = None
+        result = CompileResult()
         try:
-            # Inicializar el lexer
-            lexer = Lexer(code)
-            
-            # Inicializar el parser
-            parser = Parser(lexer)
+            if self.cache:
+                with timed_phase(self.timer, 'caché'):
+                    if path:
+                        key = self.cache.file_key(self, path, kind)
+                    else:
+                        key = self.cache.key(self, code, kind)
+                    cached = self.cache.load(key)
+                if cached is not None:
+                    if sink is not None and not binary:
+                        write_lines(sink, cached.assembly.split("\n"))
+                        cached.assembly = None
+                    cached.stats['segundos'] = time.perf_counter() - start
+                    return cached
             
-            # Analizar y generar código
-            assembly_code = parser.program()
-            
-            return assembly_code
+            # Con caché o binary hace falta el texto completo
+            stream = sink if not binary and not key else None
+            if path:
+                with open(path, 'r') as source:
+                    result.assembly = self._compile_tokens(StreamingLexer(source), stream)
+            else:
+                result.assembly = self._compile_tokens(LEXERS[lexer](code), stream)
+            if stream is not None:
+                result.assembly = None
+            if binary:
+                with timed_phase(self.timer, 'ensamblado') as info:
+                    assembler = Assembler().assemble(result.assembly)
+                    result.binary = assembler.to_elf()
+                    info['instrucciones'] = len(assembler.listing)
         except Exception as e:
-            return f"Error de compilación: {str(e)}"
+            errors = getattr(e, 'errors', None) or [e]
+            result = CompileResult(diagnostics=[Diagnostic.from_exception(error)
+                                                for error in errors])
+        
+        if result.ok:
+            result.stats['instrucciones'] = self.instruction_count
+            if self.peephole:
+                result.stats['mirilla_eliminadas'] = self.peephole_removed
+            if self.cse:
+                result.stats['subexpresiones_reutilizadas'] = self.cse_reused
+            if self.dead_stores:
+                result.stats['almacenes_eliminados'] = dict(self.dead_stores_removed)
+            if key:
+                self.cache.store(key, result)
+            if sink is not None and not binary and result.assembly is not None:
+                write_lines(sink, result.assembly.split("\n"))
+                result.assembly = None
+        result.stats['segundos'] = time.perf_counter() - start
+        return result
+    
+    def incremental(self, code):
+        """
+        Inicia una sesión de compilación incremental sobre el código fuente.
+        No aplica cse: sus valores viven entre instrucciones y el estado
+        entre ellas debe poder restaurarse.
+        """
+        return IncrementalCompiler(code, self.peephole, self.fold, self.optimize_loops,
+                                   self.unroll, self.dead_stores, self.inline_math)
+    
+    def _compile_tokens(self, lexer, sink=None):
+        """Analiza los tokens del lexer y genera el código ensamblador"""
+        timer = self.timer
+        # Al medir las fases se analizan antes todos los tokens, para
+        # separar el tiempo del lexer del tiempo del parser
+        if self.token_buffer or timer:
+            with timed_phase(timer, 'léxico') as info:
+                lexer = TokenBuffer.from_lexer(lexer)
+                info['tokens'] = len(lexer)
+        
+        # Analizar el programa y construir el AST
+        with timed_phase(timer, 'sintáctico'):
+            parser = Parser(lexer, self.max_errors)
+            try:
+                program = parser.program()
+            except Exception as e:
+                # Errores semánticos del parser: la línea del token actual
+                if not hasattr(e, 'line'):
+                    e.line = parser.current_token.line
+                raise
+        
+        # Generar código recorriendo el AST
+        code_generator = CodeGenerator(parser.symbol_table, self.peephole, self.fold,
+                                       self.optimize_loops, self.unroll, self.cse,
+                                       self.dead_stores, self.inline_math, sink)
+        code = code_generator.generate(program, timer)
+        self.instruction_count = code_generator.instruction_count
+        if code_generator.peephole:
+            self.peephole_removed = code_generator.peephole.removed
+        if code_generator.values is not None:
+            self.cse_reused = code_generator.values.reused
+        if code_generator.dead_stores:
+            self.dead_stores_removed = code_generator.dead_stores.stats
+        return code
+
+
+def batch_sources(pattern):
+    """
+    Archivos fuente de un lote: los de un directorio (sin los .s y .o ya
+    generados) o los que coinciden con un patrón glob
+    """
+    if os.path.isdir(pattern):
+        paths = [os.path.join(pattern, name) for name in os.listdir(pattern)]
+        paths = [path for path in paths
+                 if os.path.isfile(path) and os.path.splitext(path)[1] not in ('.s', '.o')]
+    else:
+        paths = glob.glob(pattern, recursive=True)
+    return sorted(paths)
+
+
+def compile_batch_file(path, options, output_dir=None, binary=False):
+    """
+    Compila un archivo del lote y escribe su .s (o .o). Devuelve
+    (ruta, archivo de salida, CompileResult); el resultado vuelve sin el
+    código, ya escrito en disco, y los errores quedan en sus diagnósticos
+    para no detener el lote.
+    """
+    output_file = os.path.splitext(path)[0] + ('.o' if binary else '.s')
+    if output_dir:
+        output_file = os.path.join(output_dir, os.path.basename(output_file))
+    compiler = Compiler(**options)
+    try:
+        if compiler.lexer == 'stream':
+            result = compiler.build_to(output_file, path=path, binary=binary)
+        else:
+            with open(path, 'r') as f:
+                code = f.read()
+            result = compiler.build_to(output_file, code, binary=binary)
+    except OSError as e:
+        return path, output_file, CompileResult(diagnostics=[Diagnostic('interno', str(e))])
+    return path, output_file, result
+
+
+def compile_batch(paths, options, output_dir=None, binary=False, workers=None):
+    """
+    Compila los archivos en un conjunto de procesos del tamaño de los
+    núcleos disponibles y devuelve los resultados en orden a medida que
+    terminan. Los archivos se reparten en bloques para que el costo de
+    comunicar cada tarea no domine con programas pequeños.
+    """
+    workers = workers or os.cpu_count() or 1
+    arguments = (itertools.repeat(options), itertools.repeat(output_dir),
+                 itertools.repeat(binary))
+    if workers == 1 or len(paths) < 2:
+        yield from map(compile_batch_file, paths, *arguments)
+        return
+    chunksize = max(1, min(64, len(paths) // (workers * 4)))
+    with ProcessPoolExecutor(workers) as executor:
+        yield from executor.map(compile_batch_file, paths, *arguments, chunksize=chunksize)
+
+
+def run_batch(args, options):
+    """Compila un lote desde la línea de comandos con una línea de resumen por archivo"""
+    paths = batch_sources(args.input_file)
+    if not paths:
+        print(f"Error: no hay archivos fuente en {args.input_file}")
+        sys.exit(1)
+    if args.output_file:
+        os.makedirs(args.output_file, exist_ok=True)
+    
+    start = time.perf_counter()
+    failed = 0
+    hits = 0
+    for path, output_file, result in compile_batch(
+            paths, options, args.output_file, args.binary, args.jobs):
+        elapsed = result.stats['segundos'] * 1000
+        cached = result.stats.get('caché', False)
+        hits += cached
+        if result.ok:
+            origin = " (caché)" if cached else ""
+            print(f"{path}: ok {elapsed:.1f} ms{origin} -> {output_file}", flush=True)
+        else:
+            failed += 1
+            print(f"{path}: error {elapsed:.1f} ms: {result.error}", flush=True)
+    total = time.perf_counter() - start
+    print(f"Lote: {len(paths)} archivos, {len(paths) - failed} correctos, "
+          f"{failed} con errores en {total:.2f} s")
+    if options['cache']:
+        print(f"Caché: {hits} aciertos, {len(paths) - hits} fallos")
+    sys.exit(1 if failed else 0)
 
 
 def main():
     """Función principal"""
-    if len(sys.argv) < 2:
-        print("Uso: python compiler.py <archivo_fuente> [archivo_salida]")
+    arg_parser = argparse.ArgumentParser(
+        usage="python compiler.py <archivo_fuente> [archivo_salida] [opciones]")
+    arg_parser.add_argument('input_file')
+    arg_parser.add_argument('output_file', nargs='?')
+    arg_parser.add_argument('--lexer', choices=sorted(LEXERS), default='stream',
+                            help="motor de análisis léxico (por defecto: stream)")
+    arg_parser.add_argument('--token-buffer', action='store_true',
+                            help="almacenar los tokens en un búfer columnar antes de analizarlos")
+    arg_parser.add_argument('--peephole', action='store_true',
+                            help="aplicar el optimizador de mirilla al código generado")
+    arg_parser.add_argument('--fold', action='store_true',
+                            help="plegar y propagar constantes en tiempo de compilación")
+    arg_parser.add_argument('--optimize-loops', action='store_true',
+                            help="sacar cálculos invariantes de los bucles y reducir la fuerza de las operaciones")
+    arg_parser.add_argument('--unroll', type=int, default=1, metavar='N',
+                            help="desenrollar N veces los for con número de vueltas conocido (por defecto: 1)")
+    arg_parser.add_argument('--cse', action='store_true',
+                            help="reutilizar subexpresiones comunes dentro de cada bloque básico")
+    arg_parser.add_argument('--dead-stores', action='store_true',
+                            help="quitar las instrucciones que escriben valores que nunca se leen")
+    arg_parser.add_argument('--inline-math', type=int, choices=(1, 2, 3), default=0, metavar='NIVEL',
+                            help="calcular sin, cos y tan en línea con polinomios en vez de llamar "
+                                 "a libm; NIVEL 1-3 elige la precisión (3: precisión simple completa). "
+                                 "Para |x| >= 1e5, infinito o NaN devuelven NaN")
+    arg_parser.add_argument('--binary', action='store_true',
+                            help="ensamblar y guardar un objeto ELF (.o) en lugar del ensamblador")
+    arg_parser.add_argument('--batch', action='store_true',
+                            help="compilar todos los archivos de un directorio o patrón glob; "
+                                 "archivo_salida es entonces el directorio de salida")
+    arg_parser.add_argument('--jobs', type=int, default=None, metavar='N',
+                            help="procesos del modo --batch (por defecto: uno por núcleo)")
+    arg_parser.add_argument('--cache', metavar='DIR',
+                            help="reutilizar compilaciones anteriores guardadas en el directorio DIR")
+    arg_parser.add_argument('--cache-size', type=int, default=64, metavar='MB',
+                            help="tamaño máximo de la caché en disco (por defecto: 64 MB)")
+    arg_parser.add_argument('--max-errors', type=int, default=20, metavar='N',
+                            help="errores a reportar antes de detener el análisis (por defecto: 20)")
+    arg_parser.add_argument('--time-passes', action='store_true',
+                            help="mostrar tiempo, memoria pico, tokens e instrucciones de cada fase")
+    arg_parser.add_argument('--time-passes-json', metavar='ARCHIVO',
+                            help="guardar la medición por fases en ARCHIVO en formato JSON")
+    args = arg_parser.parse_args()
+    
+    cache = None
+    if args.cache:
+        cache = CompileCache(args.cache, args.cache_size * 1024 * 1024)
+    
+    if args.batch:
+        run_batch(args, dict(lexer=args.lexer, token_buffer=args.token_buffer,
+                             peephole=args.peephole, fold=args.fold,
+                             optimize_loops=args.optimize_loops, unroll=args.unroll,
+                             cse=args.cse, cache=cache, max_errors=args.max_errors,
+                             dead_stores=args.dead_stores, inline_math=args.inline_math))
         return
     
-    input_file = sys.argv[1]
+    input_file = args.input_file
     
     # Determinar archivo de salida
-    if len(sys.argv) >= 3:
-        output_file = sys.argv[2]
+    if args.output_file:
+        output_file = args.output_file
     else:
-        # Por defecto, usar el mismo nombre pero con extensión .s
-        output_file = input_file.rsplit('.', 1)[0] + '.s'
+        # Por defecto, usar el mismo nombre pero con extensión .s (o .o)
+        output_file = input_file.rsplit('.', 1)[0] + ('.o' if args.binary else '.s')
     
     try:
-        # Leer archivo de entrada
-        with open(input_file, 'r') as f:
-            source_code = f.read()
-        
-        # Compilar
-        compiler = Compiler()
-        assembly_code = compiler.compile(source_code)
+        compiler = Compiler(lexer=args.lexer, token_buffer=args.token_buffer,
+                            peephole=args.peephole, fold=args.fold,
+                            optimize_loops=args.optimize_loops, unroll=args.unroll,
+                            cse=args.cse, cache=cache, max_errors=args.max_errors,
+                            dead_stores=args.dead_stores, inline_math=args.inline_math,
+                            time_passes=args.time_passes or bool(args.time_passes_json))
+        # Compilar escribiendo el ensamblador en el archivo de salida a
+        # medida que se genera
+        if args.lexer == 'stream':
+            # Leer el archivo por bloques
+            result = compiler.build_to(output_file, path=input_file, binary=args.binary)
+        else:
+            # Leer archivo de entrada
+            with open(input_file, 'r') as f:
+                source_code = f.read()
+            result = compiler.build_to(output_file, source_code, binary=args.binary)
         
-        # Escribir archivo de salida
-        with open(output_file, 'w') as f:
-            f.write(assembly_code)
+        if not result.ok:
+            for diagnostic in result.diagnostics:
+                print(f"Error: {diagnostic}")
+            sys.exit(1)
         
-        print(f"Compilación exitosa. Código ensamblador guardado en {output_file}")
+        kind = "Objeto ELF" if args.binary else "Código ensamblador"
+        print(f"Compilación exitosa. {kind} guardado en {output_file}")
+        if args.peephole:
+            print(f"Optimizador de mirilla: {compiler.peephole_removed} instrucciones eliminadas")
+        if args.cse:
+            print(f"Subexpresiones comunes: {compiler.cse_reused} valores reutilizados")
+        if args.dead_stores:
+            removed = result.stats.get('almacenes_eliminados', {})
+            print("Almacenes muertos: " + (', '.join(f"{count} instrucciones eliminadas en {name}"
+                                                      for name, count in removed.items())
+                                           or "ninguno"))
+        if cache:
+            print(f"Caché: {cache.hits} aciertos, {cache.misses} fallos")
+        if args.time_passes:
+            print(compiler.timer.report())
+        if args.time_passes_json:
+            with open(args.time_passes_json, 'w') as f:
+                f.write(compiler.timer.to_json())
     except Exception as e:
         print(f"Error: {str(e)}")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,737 @@
+"""
+Representación intermedia (IR) de tres direcciones para Mini-C.
+
+IRBuilder baja el AST que construye el Parser de compiler.py a
+instrucciones de tres direcciones agrupadas en bloques básicos; cada for
+agrega su condición, su cuerpo y su salida al grafo de flujo de control
+(CFG). to_ssa pasa el IR a forma SSA (dominadores, fronteras de
+dominancia, funciones phi y renombrado) y sobre ella corren en tiempo
+lineal las pasadas fold_constants, eliminate_common_subexpressions y
+eliminate_dead_code. from_ssa cambia las phi por copias.
+
+Uso: python ir.py <programa.mc> [--no-ssa | --no-opt]
+"""
+
+import struct
+import sys
+
+from compiler import (Assign, BinOp, For, MathCall, Num, Parser, Print, Read, RegexLexer, Str,
+                      UnaryOp, Var, convert_constant, fold_binary, get_operand_type,
+                      get_result_type, to_int32)
+
+# Operaciones binarias; los operandos ya tienen el mismo tipo
+BINARY_OPERATIONS = frozenset(['+', '-', '*', '/', '%', '<', '>', '<=', '>=', '==', '!='])
+
+# Operaciones en las que el orden de los operandos no importa
+COMMUTATIVE_OPERATIONS = frozenset(['+', '*', '==', '!='])
+
+# Operaciones sin efectos: se pueden plegar, reutilizar o quitar si nadie
+# usa su resultado. read, print y los saltos nunca se quitan.
+PURE_OPERATIONS = BINARY_OPERATIONS | {'copy', 'neg', 'itof', 'ftoi', 'sin', 'cos', 'tan'}
+
+class Const:
+    """Constante: operando literal con su tipo"""
+
+    __slots__ = ('value', 'type')
+
+    def __init__(self, value, type_name):
+        self.value = value
+        self.type = type_name
+
+    def _key(self):
+        """Clave que distingue 0.0 de -0.0 y compara nan consigo mismo"""
+        if self.type == 'float':
+            return (self.type, struct.pack('f', self.value))
+        return (self.type, self.value)
+
+    def __eq__(self, other):
+        return isinstance(other, Const) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __str__(self):
+        if self.type == 'string':
+            return '"' + self.value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        return repr(self.value)
+
+    def __repr__(self):
+        return self.__str__()
+
+def zero(type_name):
+    """Valor inicial de una variable que se lee antes de asignarse"""
+    if type_name == 'string':
+        return Const('', type_name)
+    return Const(0.0 if type_name == 'float' else 0, type_name)
+
+class Instruction:
+    """
+    Instrucción de tres direcciones: dest = op args. Los operandos son
+    nombres (variables o temporales %N) o Const. En jump y branch, targets
+    son los bloques destino; en phi, el bloque de donde llega cada argumento.
+    """
+
+    __slots__ = ('op', 'dest', 'args', 'type', 'targets')
+
+    def __init__(self, op, dest=None, args=(), type_name=None, targets=()):
+        self.op = op
+        self.dest = dest
+        self.args = list(args)
+        self.type = type_name
+        self.targets = list(targets)
+
+    def __str__(self):
+        args = [str(arg) for arg in self.args]
+        if self.op == 'phi':
+            text = 'phi ' + ', '.join(f"[{block.label}: {arg}]"
+                                      for block, arg in zip(self.targets, args))
+        elif self.op == 'copy':
+            text = args[0]
+        elif self.op in BINARY_OPERATIONS:
+            text = f"{args[0]} {self.op} {args[1]}"
+        elif self.op in ('jump', 'branch'):
+            text = ' '.join([self.op, ', '.join(args + [block.label for block in self.targets])])
+        else:
+            text = ' '.join([self.op] + ([', '.join(args)] if args else []))
+        return f"{self.dest} = {text}" if self.dest is not None else text
+
+class BasicBlock:
+    """Bloque básico: instrucciones en secuencia que terminan en un salto"""
+
+    __slots__ = ('label', 'instructions', 'preds', 'succs')
+
+    def __init__(self, label):
+        self.label = label
+        self.instructions = []
+        self.preds = []
+        self.succs = []
+
+    def phis(self):
+        """Funciones phi al inicio del bloque"""
+        for instruction in self.instructions:
+            if instruction.op != 'phi':
+                return
+            yield instruction
+
+class Function:
+    """
+    Función en IR: lista de bloques básicos (el primero es la entrada), el
+    tipo de cada nombre y las variables del programa con su tipo
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.blocks = []
+        self.types = {}          # Nombre -> tipo
+        self.variables = {}      # Variable del programa -> tipo
+        self.temp_count = 0
+        self.ssa = False
+
+    def new_temp(self, type_name):
+        """Crea un temporal %N del tipo indicado"""
+        self.temp_count += 1
+        name = f"%{self.temp_count}"
+        self.types[name] = type_name
+        return name
+
+    def type_of(self, operand):
+        """Tipo de un operando"""
+        return operand.type if isinstance(operand, Const) else self.types[operand]
+
+    def link(self):
+        """Recalcula predecesores y sucesores a partir de los saltos"""
+        for block in self.blocks:
+            block.preds = []
+        for block in self.blocks:
+            block.succs = list(block.instructions[-1].targets)
+            for succ in block.succs:
+                succ.preds.append(block)
+
+    def instructions(self):
+        """Todas las instrucciones en orden de bloques"""
+        for block in self.blocks:
+            yield from block.instructions
+
+    def __str__(self):
+        lines = [f"función {self.name}:"]
+        for block in self.blocks:
+            preds = ', '.join(pred.label for pred in block.preds)
+            lines.append(f"{block.label}:" + (f"    # predecesores: {preds}" if preds else ''))
+            lines.extend(f"    {instruction}" for instruction in block.instructions)
+        return '\n'.join(lines)
+
+class IRBuilder:
+    """Baja el AST de un programa a IR de tres direcciones"""
+
+    def __init__(self, symbol_table):
+        self.symbol_table = symbol_table
+        self.function = None
+        self.block = None
+        self.label_count = 0
+
+    def build(self, program, name='main'):
+        """Construye la función con las instrucciones del programa"""
+        self.function = Function(name)
+        for var_name, info in self.symbol_table.symbols.items():
+            self.function.variables[var_name] = info['type']
+            self.function.types[var_name] = info['type']
+        self.block = self.new_block('entry')
+        for statement in program.statements:
+            self.lower_statement(statement)
+        self.emit('return')
+        self.function.link()
+        return self.function
+
+    def new_block(self, prefix, append=True):
+        """Crea un bloque; con append lo agrega al final de la función"""
+        label = prefix
+        if prefix != 'entry':
+            self.label_count += 1
+            label = f"{prefix}{self.label_count}"
+        block = BasicBlock(label)
+        if append:
+            self.function.blocks.append(block)
+        return block
+
+    def emit(self, op, dest=None, args=(), type_name=None, targets=()):
+        """Agrega una instrucción al bloque actual"""
+        instruction = Instruction(op, dest, args, type_name, targets)
+        self.block.instructions.append(instruction)
+        return instruction
+
+    def lower_statement(self, node):
+        """Baja una sentencia"""
+        if isinstance(node, Assign):
+            self.assign(node.name, self.lower_expr(node.expr))
+        elif isinstance(node, Read):
+            self.emit('read', node.name, (), self.function.variables[node.name])
+        elif isinstance(node, Print):
+            for arg in node.args:
+                if isinstance(arg, Str):
+                    self.emit('print', None, [Const(arg.value, 'string')])
+                else:
+                    self.emit('print', None, [self.lower_expr(arg)])
+            if node.newline:
+                self.emit('print', None, [Const('\n', 'string')])
+        elif isinstance(node, For):
+            self.lower_for(node)
+        else:
+            raise Exception(f"Error interno: sentencia {node.__class__.__name__} sin IR")
+
+    def lower_for(self, node):
+        """
+        for (v = inicio; fin) { cuerpo } queda como:
+            v = inicio; f = fin; jump for_start
+            for_start: c = v <= f; branch c, for_body, for_end
+            for_body: cuerpo; v = v + 1; jump for_start
+            for_end:
+        """
+        var_type = self.function.variables[node.name]
+        self.assign(node.name, self.lower_expr(node.start))
+        # El fin se evalúa una sola vez, después de asignar el inicio
+        end = self.lower_expr(node.end)
+        if not isinstance(end, Const) and end in self.function.variables:
+            end = self.copy(end)
+        compare_type = get_operand_type('<=', var_type, self.function.type_of(end))
+
+        start_block = self.new_block('for_start')
+        body_block = self.new_block('for_body')
+        # La salida va después de los bloques que agregue el cuerpo
+        end_block = self.new_block('for_end', append=False)
+        self.emit('jump', targets=[start_block])
+
+        self.block = start_block
+        condition = self.function.new_temp('int')
+        self.emit('<=', condition, [self.convert(node.name, var_type, compare_type),
+                                    self.convert(end, self.function.type_of(end), compare_type)],
+                  'int')
+        self.emit('branch', None, [condition], targets=[body_block, end_block])
+
+        # El cuerpo puede agregar bloques; el del final hace el incremento
+        self.block = body_block
+        for statement in node.body:
+            self.lower_statement(statement)
+        self.emit('+', node.name, [node.name, Const(1.0 if var_type == 'float' else 1, var_type)],
+                  var_type)
+        self.emit('jump', targets=[start_block])
+        self.function.blocks.append(end_block)
+        self.block = end_block
+
+    def lower_expr(self, node):
+        """Baja una expresión y devuelve el operando con su valor"""
+        if isinstance(node, Num):
+            return Const(node.value, node.type)
+        if isinstance(node, Var):
+            return node.name
+        if isinstance(node, BinOp):
+            left = self.lower_expr(node.left)
+            right = self.lower_expr(node.right)
+            left_type = self.function.type_of(left)
+            right_type = self.function.type_of(right)
+            # Las conversiones son explícitas: la operación recibe un solo tipo
+            operand_type = get_operand_type(node.op, left_type, right_type)
+            result_type = get_result_type(node.op, left_type, right_type)
+            left = self.convert(left, left_type, operand_type)
+            right = self.convert(right, right_type, operand_type)
+            return self.temp(node.op, [left, right], result_type)
+        if isinstance(node, UnaryOp):
+            operand = self.lower_expr(node.operand)
+            return self.temp('neg', [operand], self.function.type_of(operand))
+        if isinstance(node, MathCall):
+            arg = self.lower_expr(node.arg)
+            return self.temp(node.func, [arg], 'float')
+        raise Exception(f"Error interno: expresión {node.__class__.__name__} sin IR")
+
+    def temp(self, op, args, type_name):
+        """Emite una operación sobre un temporal nuevo y lo devuelve"""
+        dest = self.function.new_temp(type_name)
+        self.emit(op, dest, args, type_name)
+        return dest
+
+    def copy(self, operand):
+        """Copia un operando a un temporal"""
+        return self.temp('copy', [operand], self.function.type_of(operand))
+
+    def convert(self, operand, current_type, target_type):
+        """Convierte un operando al tipo indicado, como fcvt.s.w / fcvt.w.s rtz"""
+        if current_type == target_type:
+            return operand
+        if current_type == 'int' and target_type == 'float':
+            return self.temp('itof', [operand], 'float')
+        if current_type == 'float' and target_type == 'int':
+            return self.temp('ftoi', [operand], 'int')
+        raise Exception(f"Error semántico: No se puede convertir de {current_type} a {target_type}")
+
+    def assign(self, name, value):
+        """Asigna un operando a una variable"""
+        var_type = self.function.variables[name]
+        value = self.convert(value, self.function.type_of(value), var_type)
+        last = self.block.instructions[-1] if self.block.instructions else None
+        if (last is not None and isinstance(value, str) and last.dest == value
+                and value.startswith('%')):
+            # El temporal recién calculado pasa a ser la variable
+            del self.function.types[value]
+            last.dest = name
+        else:
+            self.emit('copy', name, [value], var_type)
+
+def compute_dominators(function):
+    """
+    Dominador inmediato de cada bloque alcanzable (algoritmo de Cooper,
+    Harvey y Kennedy sobre el orden posterior inverso). Devuelve
+    (idom, orden) con la entrada como su propio dominador.
+    """
+    entry = function.blocks[0]
+    # Orden posterior con una pila explícita
+    order = []
+    visited = {entry}
+    stack = [(entry, iter(entry.succs))]
+    while stack:
+        block, succs = stack[-1]
+        succ = next(succs, None)
+        if succ is None:
+            order.append(block)
+            stack.pop()
+        elif succ not in visited:
+            visited.add(succ)
+            stack.append((succ, iter(succ.succs)))
+    order.reverse()
+    index = {block: position for position, block in enumerate(order)}
+
+    idom = {entry: entry}
+    changed = True
+    while changed:
+        changed = False
+        for block in order[1:]:
+            new_idom = None
+            for pred in block.preds:
+                if pred not in idom:
+                    continue
+                if new_idom is None:
+                    new_idom = pred
+                    continue
+                # Intersección: subir por los dominadores hasta coincidir
+                finger1, finger2 = pred, new_idom
+                while finger1 is not finger2:
+                    while index[finger1] > index[finger2]:
+                        finger1 = idom[finger1]
+                    while index[finger2] > index[finger1]:
+                        finger2 = idom[finger2]
+                new_idom = finger1
+            if idom.get(block) is not new_idom:
+                idom[block] = new_idom
+                changed = True
+    return idom, order
+
+def dominator_tree(idom, order):
+    """Hijos de cada bloque en el árbol de dominadores"""
+    children = {block: [] for block in order}
+    for block in order[1:]:
+        children[idom[block]].append(block)
+    return children
+
+def dominance_frontiers(idom, order):
+    """Frontera de dominancia de cada bloque"""
+    frontiers = {block: set() for block in order}
+    for block in order:
+        preds = [pred for pred in block.preds if pred in idom]
+        if len(preds) < 2:
+            continue
+        for pred in preds:
+            runner = pred
+            while runner is not idom[block]:
+                frontiers[runner].add(block)
+                runner = idom[runner]
+    return frontiers
+
+def remove_unreachable(function):
+    """Quita los bloques a los que no se llega desde la entrada"""
+    reachable = {function.blocks[0]}
+    stack = [function.blocks[0]]
+    while stack:
+        for succ in stack.pop().succs:
+            if succ not in reachable:
+                reachable.add(succ)
+                stack.append(succ)
+    removed = [block for block in function.blocks if block not in reachable]
+    if not removed:
+        return 0
+    function.blocks = [block for block in function.blocks if block in reachable]
+    for block in function.blocks:
+        for phi in block.phis():
+            kept = [(pred, arg) for pred, arg in zip(phi.targets, phi.args) if pred in reachable]
+            phi.targets = [pred for pred, _ in kept]
+            phi.args = [arg for _, arg in kept]
+    function.link()
+    return sum(len(block.instructions) for block in removed)
+
+def to_ssa(function):
+    """
+    Pasa la función a forma SSA: coloca funciones phi en la frontera de
+    dominancia iterada de los bloques que asignan cada variable y renombra
+    cada asignación a una versión nueva (x.1, x.2...). Una variable que se
+    lee sin asignarse vale 0, como al iniciar el programa.
+    """
+    remove_unreachable(function)
+    idom, order = compute_dominators(function)
+    frontiers = dominance_frontiers(idom, order)
+    children = dominator_tree(idom, order)
+
+    # Colocación de phi
+    definitions = {name: set() for name in function.variables}
+    for block in order:
+        for instruction in block.instructions:
+            if instruction.dest in definitions:
+                definitions[instruction.dest].add(block)
+    for name, blocks in definitions.items():
+        placed = set()
+        worklist = list(blocks)
+        while worklist:
+            block = worklist.pop()
+            for frontier in frontiers[block]:
+                if frontier in placed:
+                    continue
+                placed.add(frontier)
+                frontier.instructions.insert(0, Instruction(
+                    'phi', name, [name] * len(frontier.preds), function.variables[name],
+                    frontier.preds))
+                if frontier not in blocks:
+                    worklist.append(frontier)
+
+    # Renombrado en preorden del árbol de dominadores, con pila explícita
+    versions = {name: 0 for name in function.variables}
+    current = {name: [] for name in function.variables}
+
+    def read(name):
+        if isinstance(name, str) and name in current:
+            stack = current[name]
+            return stack[-1] if stack else zero(function.variables[name])
+        return name
+
+    work = [(function.blocks[0], None)]
+    while work:
+        block, pushed = work.pop()
+        if pushed is not None:
+            # Salida del bloque: deshacer sus versiones
+            for name in pushed:
+                current[name].pop()
+            continue
+        pushed = []
+        for instruction in block.instructions:
+            if instruction.op != 'phi':
+                instruction.args = [read(arg) for arg in instruction.args]
+            name = instruction.dest
+            if name in current:
+                versions[name] += 1
+                version = f"{name}.{versions[name]}"
+                function.types[version] = function.variables[name]
+                instruction.dest = version
+                current[name].append(version)
+                pushed.append(name)
+        for succ in block.succs:
+            for phi in succ.phis():
+                # Cada arco del predecesor aporta la versión vigente al salir
+                for position, pred in enumerate(phi.targets):
+                    if pred is block:
+                        base = phi.args[position]
+                        phi.args[position] = read(base)
+        work.append((block, pushed))
+        work.extend((child, None) for child in reversed(children[block]))
+    function.ssa = True
+    return function
+
+def def_use(function):
+    """Instrucción que define cada nombre e instrucciones que lo usan"""
+    definitions = {}
+    uses = {}
+    for instruction in function.instructions():
+        if instruction.dest is not None:
+            definitions[instruction.dest] = instruction
+        for arg in instruction.args:
+            if isinstance(arg, str):
+                uses.setdefault(arg, []).append(instruction)
+    return definitions, uses
+
+def evaluate(instruction):
+    """Valor constante de una instrucción con operandos constantes, o None"""
+    op, args = instruction.op, instruction.args
+    if op == 'phi':
+        values = {arg for arg in args if arg != instruction.dest}
+        if len(values) == 1:
+            value = values.pop()
+            return value if isinstance(value, Const) else None
+        return None
+    if op not in PURE_OPERATIONS or not all(isinstance(arg, Const) for arg in args):
+        return None
+    if op == 'copy':
+        return args[0]
+    if op in BINARY_OPERATIONS:
+        left, right = args
+        value = fold_binary(op, left.value, left.type, right.value, right.type)
+        if value is None:
+            return None
+        return Const(value, get_result_type(op, left.type, right.type))
+    value = args[0].value
+    if op == 'neg':
+        return Const(to_int32(-value) if instruction.type == 'int' else -value, instruction.type)
+    if op == 'itof':
+        value = convert_constant(value, 'int', 'float')
+    elif op == 'ftoi':
+        value = convert_constant(value, 'float', 'int')
+    else:
+        # sin/cos/tan se dejan a la biblioteca para no cambiar su redondeo
+        return None
+    return None if value is None else Const(value, instruction.type)
+
+def fold_constants(function):
+    """
+    Propagación y plegado de constantes sobre SSA con una lista de trabajo:
+    cada instrucción se revisa cuando uno de sus operandos pasa a ser
+    constante. Los branch con condición constante se vuelven jump y los
+    bloques que quedan inalcanzables se quitan. Devuelve las instrucciones
+    eliminadas.
+    """
+    removed = 0
+    while True:
+        definitions, uses = def_use(function)
+        constants = {}
+        worklist = list(definitions.values())
+        while worklist:
+            instruction = worklist.pop()
+            if instruction.dest in constants:
+                continue
+            value = evaluate(instruction)
+            if value is None:
+                continue
+            constants[instruction.dest] = value
+            for user in uses.get(instruction.dest, ()):
+                user.args = [value if arg == instruction.dest else arg for arg in user.args]
+                worklist.append(user)
+
+        folded_branch = False
+        for block in function.blocks:
+            block.instructions = [instruction for instruction in block.instructions
+                                  if instruction.dest not in constants]
+            last = block.instructions[-1]
+            if last.op == 'branch' and isinstance(last.args[0], Const):
+                taken = last.targets[0] if last.args[0].value else last.targets[1]
+                for target in last.targets:
+                    if target is not taken:
+                        for phi in target.phis():
+                            position = phi.targets.index(block)
+                            del phi.targets[position]
+                            del phi.args[position]
+                block.instructions[-1] = Instruction('jump', targets=[taken])
+                folded_branch = True
+        removed += len(constants)
+        if not folded_branch:
+            return removed
+        function.link()
+        removed += remove_unreachable(function)
+
+def _value_key(operand):
+    """Clave ordenable de un operando para normalizar operaciones conmutativas"""
+    return ('c',) + operand._key() if isinstance(operand, Const) else ('n', operand)
+
+def eliminate_common_subexpressions(function):
+    """
+    Numeración de valores sobre el árbol de dominadores: una operación pura
+    que repite otra ya calculada en un bloque dominador se reemplaza por su
+    resultado, y las copias y las phi triviales se propagan a sus usos.
+    Devuelve las instrucciones eliminadas.
+    """
+    idom, order = compute_dominators(function)
+    children = dominator_tree(idom, order)
+    replace = {}
+
+    def resolve(operand):
+        while isinstance(operand, str) and operand in replace:
+            operand = replace[operand]
+        return operand
+
+    available = {}
+    removed = 0
+    work = [(function.blocks[0], None)]
+    while work:
+        block, added = work.pop()
+        if added is not None:
+            # Salida del bloque: sus valores ya no dominan a los siguientes
+            for key in added:
+                del available[key]
+            continue
+        added = []
+        kept = []
+        for instruction in block.instructions:
+            instruction.args = [resolve(arg) for arg in instruction.args]
+            op, dest = instruction.op, instruction.dest
+            if op == 'copy':
+                replace[dest] = instruction.args[0]
+                removed += 1
+                continue
+            if op == 'phi':
+                values = {_value_key(arg): arg for arg in instruction.args if arg != dest}
+                if len(values) == 1:
+                    replace[dest] = values.popitem()[1]
+                    removed += 1
+                    continue
+            elif op in PURE_OPERATIONS:
+                args = instruction.args
+                if op in COMMUTATIVE_OPERATIONS:
+                    args = sorted(args, key=_value_key)
+                key = (op, instruction.type, tuple(_value_key(arg) for arg in args))
+                previous = available.get(key)
+                if previous is not None:
+                    replace[dest] = previous
+                    removed += 1
+                    continue
+                available[key] = dest
+                added.append(key)
+            kept.append(instruction)
+        block.instructions = kept
+        work.append((block, added))
+        work.extend((child, None) for child in reversed(children[block]))
+
+    # Los argumentos de las phi pueden venir de bloques que se visitaron después
+    for instruction in function.instructions():
+        instruction.args = [resolve(arg) for arg in instruction.args]
+    return removed
+
+def eliminate_dead_code(function):
+    """
+    Quita las operaciones puras y phi cuyo resultado no llega a ningún
+    read, print o salto, marcando desde ellos hacia atrás por las
+    definiciones. Devuelve las instrucciones eliminadas.
+    """
+    definitions, _ = def_use(function)
+    live = set()
+    worklist = [instruction for instruction in function.instructions()
+                if instruction.op not in PURE_OPERATIONS and instruction.op != 'phi']
+    live.update(id(instruction) for instruction in worklist)
+    while worklist:
+        for arg in worklist.pop().args:
+            definition = definitions.get(arg) if isinstance(arg, str) else None
+            if definition is not None and id(definition) not in live:
+                live.add(id(definition))
+                worklist.append(definition)
+    removed = 0
+    for block in function.blocks:
+        kept = [instruction for instruction in block.instructions if id(instruction) in live]
+        removed += len(block.instructions) - len(kept)
+        block.instructions = kept
+    return removed
+
+def optimize(function):
+    """Corre las pasadas sobre SSA y devuelve cuántas instrucciones quitó cada una"""
+    stats = {}
+    stats['plegado'] = fold_constants(function)
+    stats['subexpresiones'] = eliminate_common_subexpressions(function)
+    # La propagación de copias puede dejar nuevas constantes
+    stats['plegado'] += fold_constants(function)
+    stats['código muerto'] = eliminate_dead_code(function)
+    return stats
+
+def sequentialize(copies, function):
+    """
+    Ordena copias paralelas (dest, origen, tipo) como copias en secuencia:
+    primero las que escriben un nombre que ninguna otra lee; en un ciclo
+    (a = b, b = a) se guarda un valor en un temporal.
+    """
+    code = []
+    pending = [copy for copy in copies if copy[0] != copy[1]]
+    while pending:
+        sources = {source for _, source, _ in pending if isinstance(source, str)}
+        ready = [copy for copy in pending if copy[0] not in sources]
+        if ready:
+            code += [Instruction('copy', dest, [source], type_name)
+                     for dest, source, type_name in ready]
+            pending = [copy for copy in pending if copy[0] in sources]
+        else:
+            dest, _, type_name = pending[0]
+            temp = function.new_temp(type_name)
+            code.append(Instruction('copy', temp, [dest], type_name))
+            pending = [(other, temp if source == dest else source, other_type)
+                       for other, source, other_type in pending]
+    return code
+
+def from_ssa(function):
+    """Cambia las phi por copias al final de cada predecesor"""
+    for block in function.blocks:
+        phis = list(block.phis())
+        if not phis:
+            continue
+        for pred in block.preds:
+            # Las phi de un bloque se asignan todas a la vez
+            copies = [(phi.dest, phi.args[phi.targets.index(pred)], phi.type) for phi in phis]
+            pred.instructions[-1:-1] = sequentialize(copies, function)
+        block.instructions = block.instructions[len(phis):]
+    function.ssa = False
+    return function
+
+def build_ir(code, ssa=True, optimized=True):
+    """Analiza un programa Mini-C y devuelve su IR (en SSA y optimizado por omisión)"""
+    parser = Parser(RegexLexer(code))
+    program = parser.program()
+    function = IRBuilder(parser.symbol_table).build(program)
+    if ssa:
+        to_ssa(function)
+        if optimized:
+            optimize(function)
+    return function
+
+def main():
+    if len(sys.argv) < 2:
+        print("Uso: python ir.py <programa.mc> [--no-ssa | --no-opt]")
+        sys.exit(1)
+    with open(sys.argv[1], 'r') as f:
+        code = f.read()
+    options = sys.argv[2:]
+    function = build_ir(code, ssa='--no-ssa' not in options, optimized=False)
+    if function.ssa and '--no-opt' not in options:
+        stats = optimize(function)
+        print('# instrucciones eliminadas: ' + ', '.join(f"{name} {count}"
+                                                       for name, count in stats.items()))
+    print(function)
+
+
+if __name__ == "__main__":
+    main()
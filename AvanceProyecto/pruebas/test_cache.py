@@ -0,0 +1,41 @@
+"""
+Pruebas de la caché en disco (CompileCache).
+
+Uso: python -m unittest discover -s pruebas   (desde AvanceProyecto)
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+DIRECTORIO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRECTORIO)
+
+from compiler import CompileCache
+
+
+class TamanoTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.cache = CompileCache(self.directorio.name, max_bytes=1000)
+
+    def tearDown(self):
+        self.directorio.cleanup()
+
+    def en_disco(self):
+        return sum(size for _, size, _ in self.cache._entries())
+
+    def test_reemplazar_una_entrada(self):
+        self.cache.put('a' * 64, b'x' * 100)
+        self.cache.put('b' * 64, b'x' * 50)
+        for _ in range(20):
+            self.cache.put('a' * 64, b'x' * 100)
+        self.assertEqual(self.cache.size, 150)
+        self.cache.put('a' * 64, b'x' * 30)
+        self.assertEqual(self.cache.size, self.en_disco())
+
+
+if __name__ == "__main__":
+    unittest.main()
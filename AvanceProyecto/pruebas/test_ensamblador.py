@@ -0,0 +1,97 @@
+"""
+Pruebas de regresión del ensamblador (assembler.py).
+
+Ensamblan la salida de Compiler.build para programas fijos y comprueban
+con verify que al decodificar .text se obtiene el mismo texto que se
+ensambló, incluidos los saltos condicionales alargados y los la contra
+etiquetas de .data.
+
+Uso: python -m unittest discover -s pruebas   (desde AvanceProyecto)
+"""
+
+import os
+import sys
+import unittest
+
+DIRECTORIO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRECTORIO)
+
+from assembler import Assembler, verify
+from compiler import Compiler
+from test_registros import programa_grande
+
+SENCILLO = '''var int a;
+var int b;
+var float x;
+a = 7;
+b = a * 3 % 5 - -a;
+x = a / 2 + 0.25;
+for (a = 1; 4) {
+  b = b + a * a;
+  x = x * 1.5 - b;
+}
+println("a = ", a, " b = ", b, " x = ", x);
+end.
+'''
+
+# Cuerpo de más de 4 KiB: el salto de salida del for no alcanza con beq/bge
+CUERPO = '\n'.join(f"  x = x * 1.5 + y / 2.0 - sin(x) * {i}.5;" for i in range(150))
+BUCLE_LARGO = f'''var float x;
+var float y;
+var int i;
+x = 1.0;
+y = 2.0;
+for (i = 1; 3) {{
+{CUERPO}
+}}
+println("x = ", x);
+end.
+'''
+
+PROGRAMAS = {
+    'sencillo': SENCILLO,
+    'bucle largo': BUCLE_LARGO,
+    'marco grande': programa_grande("for (i = 1; 3) {\n  s = s + v650 * 11;\n}"),
+}
+
+OPCIONES = [dict(), dict(peephole=True, fold=True, cse=True),
+            dict(optimize_loops=True, unroll=2, dead_stores=True), dict(inline_math=2)]
+
+
+def ensamblar(codigo, **opciones):
+    resultado = Compiler(lexer='regex', **opciones).build(codigo)
+    if not resultado.ok:
+        raise AssertionError(resultado.error)
+    return Assembler().assemble(resultado.assembly)
+
+
+class VerificarTest(unittest.TestCase):
+
+    def test_codificacion(self):
+        for nombre, codigo in PROGRAMAS.items():
+            for opciones in OPCIONES:
+                with self.subTest(programa=nombre, **opciones):
+                    self.assertEqual(verify(ensamblar(codigo, **opciones)), [])
+
+    def test_saltos_largos(self):
+        listing = ensamblar(BUCLE_LARGO).listing
+        # Un salto largo es el salto contrario sobre un jal al destino
+        largos = [(salto, destino) for salto, destino in zip(listing, listing[1:])
+                  if salto.endswith(', 8') and destino.startswith('jal zero, ')]
+        self.assertTrue(largos)
+        for _, destino in largos:
+            self.assertGreaterEqual(abs(int(destino.rpartition(' ')[2])), 4096)
+
+    def test_la_contra_data(self):
+        assembler = ensamblar(SENCILLO)
+        datos = {simbolo for simbolo, (seccion, _) in assembler.symbols.items()
+                 if seccion == '.data'}
+        # Cada la deja una reubicación de su parte alta contra una etiqueta de .data
+        reubicadas = {simbolo for _, simbolo, _ in assembler.relocations}
+        self.assertTrue(datos)
+        self.assertTrue(datos & reubicadas)
+        self.assertIn('auipc', {texto.split()[0] for texto in assembler.listing})
+
+
+if __name__ == "__main__":
+    unittest.main()
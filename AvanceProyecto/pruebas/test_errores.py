@@ -0,0 +1,66 @@
+"""
+Pruebas de regresión de la recuperación de errores del Parser.
+
+Con max_errors mayor que 1 el Parser sigue después del primer error, pero
+el primer diagnóstico debe ser siempre el mismo que se obtiene con
+max_errors=1, aunque el lexer falle mientras se saltan tokens.
+
+Uso: python -m unittest discover -s pruebas   (desde AvanceProyecto)
+"""
+
+import os
+import random
+import sys
+import unittest
+
+DIRECTORIO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRECTORIO)
+sys.path.insert(0, os.path.join(DIRECTORIO, 'benchmarks'))
+
+from compiler import LEXERS, Compiler
+from generador import generar_programa
+
+# Texto que se inserta en programas válidos para romperlos
+CORRUPCIONES = ['"', '@', '#', '+', '}', '{', ';', ')', '(', 'var ', '']
+
+
+def diagnosticos(codigo, lexer, max_errors):
+    """Mensajes de los diagnósticos de compilar codigo"""
+    resultado = Compiler(lexer=lexer, max_errors=max_errors).build(codigo)
+    return [str(diagnostico) for diagnostico in resultado.diagnostics]
+
+
+class PrimerErrorTest(unittest.TestCase):
+    """El primer error reunido coincide con el de detenerse en el primero"""
+
+    def comparar(self, codigo):
+        for lexer in LEXERS:
+            with self.subTest(lexer=lexer, codigo=codigo):
+                primero = diagnosticos(codigo, lexer, 1)
+                todos = diagnosticos(codigo, lexer, 20)
+                self.assertEqual(todos[:1], primero)
+
+    def test_error_lexico_al_sincronizar(self):
+        # La cadena sin cerrar aparece mientras se saltan tokens del error en '+'
+        codigo = 'var int a;\na = 1 + + 2 "oops;\nb = 2;\nend.'
+        self.comparar(codigo)
+        self.assertEqual(diagnosticos(codigo, 'regex', 20),
+                         ["Error de sintaxis: Token inesperado '+' en línea 2",
+                          "Error léxico: cadena sin cerrar en línea 2"])
+
+    def test_error_lexico_despues_de_llave_sin_abrir(self):
+        self.comparar('var int a;\na = 1;\n}\n@\nend.')
+
+    def test_programas_corrompidos(self):
+        for semilla in range(100):
+            rng = random.Random(semilla)
+            codigo = generar_programa(6, 2, 2, 15, semilla)
+            for _ in range(rng.randint(1, 3)):
+                posicion = rng.randrange(len(codigo))
+                codigo = (codigo[:posicion] + rng.choice(CORRUPCIONES)
+                          + codigo[posicion + rng.randint(0, 1):])
+            self.comparar(codigo)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+"""
+Pruebas de la compilación incremental (Compiler.incremental).
+
+Cada edición debe dar el mismo resultado que compilar el texto completo
+con Compiler.build: un programa que imprime lo mismo, o el mismo primer
+diagnóstico con su línea. Las variables viven en posiciones fijas de la
+pila, así que el ensamblador no es el mismo que el de build, pero sí el
+mismo que el de una sesión nueva sobre el texto editado.
+
+Uso: python -m unittest discover -s pruebas   (desde AvanceProyecto)
+"""
+
+import os
+import sys
+import unittest
+
+DIRECTORIO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRECTORIO)
+
+from compiler import Compiler, CompileResult
+from test_registros import ejecutar
+from mv1 import RiscVSimulator
+
+PROGRAMA = '''var int a;
+var float x;
+a = 1;
+x = 2.5;
+for (a = 1; 3) {
+  x = x * 2.0;
+}
+println(a, " ", x);
+end.
+'''
+
+
+def salida(resultado):
+    """Lo que imprime el ensamblador de un CompileResult"""
+    simulador = RiscVSimulator()
+    simulador.load_program(resultado.assembly)
+    simulador.run()
+    return ''.join(simulador.output)
+
+
+class EdicionTest(unittest.TestCase):
+
+    def editar(self, sesion, texto, anterior, nuevo, desde=0):
+        """Reemplaza anterior (buscado a partir de desde) por nuevo y compara con build"""
+        posicion = texto.index(anterior, desde)
+        resultado = sesion.edit(posicion, len(anterior), nuevo)
+        texto = texto[:posicion] + nuevo + texto[posicion + len(anterior):]
+        esperado = Compiler(max_errors=1).build(texto)
+        self.assertIsInstance(resultado, CompileResult)
+        self.assertEqual(resultado.ok, esperado.ok)
+        self.assertEqual([str(d) for d in resultado.diagnostics],
+                         [str(d) for d in esperado.diagnostics])
+        if resultado.ok:
+            self.assertEqual(salida(resultado), salida(esperado))
+            # Lo reutilizado coincide con lo que se asigna desde cero
+            self.assertEqual(resultado.assembly, Compiler().incremental(texto).compile().assembly)
+        return texto, resultado
+
+    def test_ediciones_correctas(self):
+        sesion = Compiler().incremental(PROGRAMA)
+        resultado = sesion.compile()
+        self.assertTrue(resultado.ok)
+        self.assertEqual(salida(resultado), ejecutar(PROGRAMA))
+        texto, _ = self.editar(sesion, PROGRAMA, "x = 2.5;", "x = 4.0;")
+        self.editar(sesion, texto, "3)", "5)")
+
+    def test_errores_con_linea(self):
+        sesion = Compiler().incremental(PROGRAMA)
+        sesion.compile()
+        casos = [("x = 2.5;", "b = 2;", 'semántico', 4),
+                 ("var float x;", "var int a;", 'semántico', 2),
+                 ("x * 2.0", "a % 2.0", 'semántico', 6),
+                 ("a = 1;", "a = ;", 'sintáctico', 3)]
+        for anterior, nuevo, fase, linea in casos:
+            with self.subTest(nuevo=nuevo):
+                texto, resultado = self.editar(sesion, PROGRAMA, anterior, nuevo)
+                diagnostico, = resultado.diagnostics
+                self.assertEqual((diagnostico.kind, diagnostico.line), (fase, linea))
+                self.assertIn(f"en línea {linea}", str(diagnostico))
+                # Deshacer en el mismo sitio: vuelve a compilar sin errores
+                texto, _ = self.editar(sesion, texto, nuevo, anterior, PROGRAMA.index(anterior))
+                self.assertEqual(texto, PROGRAMA)
+
+    def test_llave_sin_abrir(self):
+        # El '}' que sobra termina las instrucciones igual que en Parser.program
+        casos = [("for (a = 1; 3) {", "a = 3;"), ("println", "}\nprintln"), ("a = 1;", "a = 1; }")]
+        for anterior, nuevo in casos:
+            with self.subTest(nuevo=nuevo):
+                sesion = Compiler().incremental(PROGRAMA)
+                sesion.compile()
+                texto, resultado = self.editar(sesion, PROGRAMA, anterior, nuevo)
+                self.assertIn("Se esperaba END pero se encontró '}'", resultado.error)
+                self.assertEqual(resultado.error, Compiler().build(texto).error)
+
+    def test_error_lexico(self):
+        sesion = Compiler().incremental(PROGRAMA)
+        resultado = sesion.edit(PROGRAMA.index('" "'), 3, '"')
+        self.assertEqual(resultado.diagnostics[0].kind, 'léxico')
+        self.assertEqual(resultado.diagnostics[0].line, 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
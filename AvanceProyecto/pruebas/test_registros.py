@@ -0,0 +1,78 @@
+"""
+Pruebas de regresión de la asignación de registros.
+
+Compilan programas con muchas variables vivas a la vez, así que la mayoría
+queda en la pila con desplazamientos de 2048 o más, y comparan lo que
+imprime el simulador de mv/mv1.py con y sin las optimizaciones.
+
+Uso: python -m unittest discover -s pruebas   (desde AvanceProyecto)
+"""
+
+import os
+import sys
+import unittest
+
+DIRECTORIO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRECTORIO)
+sys.path.insert(0, os.path.join(os.path.dirname(DIRECTORIO), 'mv'))
+
+from compiler import Compiler
+from mv1 import RiscVSimulator
+
+VARIABLES = 700
+
+
+def programa_grande(cuerpo):
+    """Programa con VARIABLES variables vivas hasta el final alrededor de cuerpo"""
+    lineas = [f"var int v{i};" for i in range(VARIABLES)]
+    lineas += ["var int s;", "var int i;"]
+    lineas += [f"v{i} = {i};" for i in range(VARIABLES)]
+    lineas.append("s = 0;")
+    lineas.append(cuerpo)
+    lineas.append("println(s);")
+    for inicio in range(0, VARIABLES, 50):
+        lineas.append("println(" + ', '.join(f"v{i}" for i in range(inicio, inicio + 50)) + ");")
+    lineas.append("end.")
+    return '\n'.join(lineas)
+
+
+def ejecutar(codigo, **opciones):
+    """Compila con las opciones y devuelve lo que imprime el programa"""
+    resultado = Compiler(lexer='regex', **opciones).build(codigo)
+    if not resultado.ok:
+        raise AssertionError(resultado.error)
+    simulador = RiscVSimulator()
+    simulador.load_program(resultado.assembly)
+    simulador.run()
+    return ''.join(simulador.output)
+
+
+class MarcoGrandeTest(unittest.TestCase):
+    """Las constantes no deben ir en t0: el asignador lo usa para recargar de la pila"""
+
+    OPCIONES = [dict(optimize_loops=True),
+                dict(optimize_loops=True, peephole=True, dead_stores=True),
+                dict(optimize_loops=True, unroll=2)]
+
+    def comparar(self, cuerpo):
+        codigo = programa_grande(cuerpo)
+        esperado = ejecutar(codigo)
+        for opciones in self.OPCIONES:
+            with self.subTest(**opciones):
+                self.assertEqual(ejecutar(codigo, **opciones), esperado)
+
+    def test_producto_por_constante(self):
+        # reduce_strength: v650 * 11 sale del bucle como li + mul
+        self.comparar("for (i = 1; 3) {\n  s = s + v650 * 11;\n}")
+        self.assertTrue(ejecutar(programa_grande("s = v650 * 11;")).startswith("7150\n"))
+
+    def test_paso_grande_de_variable_de_induccion(self):
+        # emit_for_increment: paso de 5000, fuera del rango de addi
+        self.comparar("for (i = 1; 3) {\n  s = s + i * 5000 + v650;\n}")
+
+    def test_varias_constantes(self):
+        self.comparar("for (i = 1; 2) {\n  s = s + v699 * 3000 + v1 * 7;\n}")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+"""
+Pruebas de sin, cos y tan en línea (--inline-math).
+
+Uso: python -m unittest discover -s pruebas   (desde AvanceProyecto)
+"""
+
+import math
+import os
+import sys
+import unittest
+
+DIRECTORIO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRECTORIO)
+
+from compiler import TRIG_DOMAIN
+from test_registros import ejecutar
+
+FUNCIONES = {'sin': math.sin, 'cos': math.cos, 'tan': math.tan}
+
+# Infinito, -infinito, NaN y valores grandes fuera del dominio
+ESPECIALES = '''var float x;
+var float z;
+z = 0.0;
+x = 1.0 / z;
+println({f}(x));
+println({f}(0.0 - x));
+println({f}(x - x));
+println({f}(1000000000.0));
+println({f}(-3000000000.0));
+println({f}(100001.0));
+end.
+'''
+
+DENTRO = '''var float x;
+x = 0.1;
+println({f}(x), " ", {f}(-2.5), " ", {f}(99999.0), " ", {f}(-12345.6));
+end.
+'''
+
+
+class DominioTest(unittest.TestCase):
+
+    def test_fuera_del_dominio_es_nan(self):
+        for nivel in (1, 2, 3):
+            for funcion in FUNCIONES:
+                with self.subTest(funcion=funcion, nivel=nivel):
+                    salida = ejecutar(ESPECIALES.format(f=funcion), inline_math=nivel)
+                    self.assertTrue(all(math.isnan(float(linea)) for linea in salida.split()))
+
+    def test_dentro_del_dominio(self):
+        self.assertEqual(TRIG_DOMAIN, 1e5)
+        for funcion, referencia in FUNCIONES.items():
+            esperado = [float(valor) for valor in ejecutar(DENTRO.format(f=funcion)).split()]
+            obtenido = [float(valor) for valor in
+                        ejecutar(DENTRO.format(f=funcion), inline_math=3).split()]
+            with self.subTest(funcion=funcion):
+                for libm, polinomio in zip(esperado, obtenido):
+                    self.assertAlmostEqual(polinomio, libm, delta=1e-6 * max(1, abs(libm)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,40 +1,123 @@
 #Christian Lara
+import math
+import struct
+
+# Nombres ABI de los registros enteros y de punto flotante
+REGISTROS = ['zero', 'ra', 'sp', 'gp', 'tp', 't0', 't1', 't2', 's0', 's1',
+             'a0', 'a1', 'a2', 'a3', 'a4', 'a5', 'a6', 'a7',
+             's2', 's3', 's4', 's5', 's6', 's7', 's8', 's9', 's10', 's11',
+             't3', 't4', 't5', 't6']
+REGISTROS_FLOAT = (['ft0', 'ft1', 'ft2', 'ft3', 'ft4', 'ft5', 'ft6', 'ft7', 'fs0', 'fs1',
+                    'fa0', 'fa1', 'fa2', 'fa3', 'fa4', 'fa5', 'fa6', 'fa7',
+                    'fs2', 'fs3', 'fs4', 'fs5', 'fs6', 'fs7', 'fs8', 'fs9', 'fs10', 'fs11',
+                    'ft8', 'ft9', 'ft10', 'ft11'])
+
+# Funciones de biblioteca que se simulan en lugar de ejecutar un call
+FUNCIONES = {'sin': math.sin, 'cos': math.cos, 'tan': math.tan}
+
+
+def division_entera(a, b):
+    """Cociente truncado hacia cero, como div de RISC-V (b distinto de cero)"""
+    cociente = abs(a) // abs(b)
+    return cociente if (a < 0) == (b < 0) else -cociente
+
+
+def a_int32(valor):
+    """Ajusta un entero a 32 bits con signo"""
+    valor &= 0xFFFFFFFF
+    return valor - (1 << 32) if valor & 0x80000000 else valor
+
+
+def a_float32(valor):
+    """Redondea un flotante a precisión simple"""
+    try:
+        return struct.unpack('f', struct.pack('f', valor))[0]
+    except OverflowError:
+        return math.copysign(math.inf, valor)
+
+
 class RiscVSimulator:
     """Simulador simplificado de RISC-V que soporta un subconjunto básico de instrucciones."""
 
     def __init__(self):
         # Registros: x0-x31 (x0 siempre es 0)
         self.registers = [0] * 32
+        # Registros de punto flotante: f0-f31
+        self.float_registers = [0.0] * 32
         # Memoria (simulada como un diccionario para acceso eficiente)
         self.memory = {}
         # Contador de programa
         self.pc = 0
         # Diccionario de instrucciones
         self.instructions = {}
+        # Etiquetas locales numéricas (1:, 2:...) -> direcciones
+        self.local_labels = {}
+        # Dirección de inicio (main si el programa la define)
+        self.start = 0
         # Flag para controlar ejecución
         self.running = False
+        # Instrucciones ejecutadas en la última corrida
+        self.instruction_count = 0
+        # Salida de las llamadas al sistema y entradas para read
+        self.output = []
+        self.inputs = []
 
     def load_program(self, program):
         """Carga un programa en la memoria del simulador."""
         # Limpiamos el estado previo
         self.registers = [0] * 32
+        self.float_registers = [0.0] * 32
         self.memory = {}
         self.pc = 0
         self.instructions = {}
+        self.local_labels = {}
 
         # Procesamos el programa línea por línea
         address = 0
+        data_address = 0x10000000
+        in_data = False
         for line in program.strip().split('\n'):
             # Ignoramos líneas vacías y comentarios
             line = line.strip()
             if not line or line.startswith('#'):
                 continue
 
+            # Directivas de sección
+            if line in ('.text', '.data'):
+                in_data = line == '.data'
+                continue
+            if line.startswith('.globl') or line.startswith('.align'):
+                continue
+
+            # Segmento de datos: etiqueta: .tipo valor
+            if in_data:
+                label, directive = line.split(':', 1)
+                kind, _, value = directive.strip().partition(' ')
+                self.memory[label.strip()] = data_address
+                if kind == '.string':
+                    text = value.strip()[1:-1].replace('\\n', '\n').replace('\\"', '"')
+                    self.memory[data_address] = text
+                    data_address += (len(text) + 4) & ~3
+                elif kind == '.float':
+                    for item in value.split(','):
+                        self.memory[data_address] = a_float32(float(item))
+                        data_address += 4
+                elif kind == '.word':
+                    for item in value.split(','):
+                        self.memory[data_address] = int(item, 0)
+                        data_address += 4
+                elif kind == '.space':
+                    data_address += (int(value) + 3) & ~3
+                continue
+
             # Procesamos etiquetas
             if ':' in line:
                 label, instruction = line.split(':', 1)
                 label = label.strip()
-                self.memory[label] = address
+                if label.isdigit():
+                    self.local_labels.setdefault(label, []).append(address)
+                else:
+                    self.memory[label] = address
                 line = instruction.strip()
                 if not line:  # Si solo era una etiqueta, continuamos
                     continue
@@ -43,78 +126,119 @@ class RiscVSimulator:
             self.instructions[address] = line
             address += 4  # Cada instrucción ocupa 4 bytes en RISC-V
 
-    def run(self):
+        # El programa del compilador empieza en main
+        self.start = self.memory.get('main', 0)
+
+    def run(self, inputs=(), max_instructions=None):
         """Ejecuta el programa cargado."""
         self.running = True
-        self.pc = 0
+        self.pc = self.start
+        self.registers[2] = 0x7FFFFFF0  # sp en el tope de la pila
+        self.instruction_count = 0
+        self.output = []
+        self.inputs = list(inputs)
 
         while self.running and self.pc in self.instructions:
             instruction = self.instructions[self.pc]
             self.execute_instruction(instruction)
+            self.instruction_count += 1
+            if max_instructions is not None and self.instruction_count >= max_instructions:
+                raise RuntimeError(f"Se superó el límite de {max_instructions} instrucciones")
 
         return self.registers[10]  # Devuelve el valor en x10 (a0) como resultado
 
     def execute_instruction(self, instruction):
         """Ejecuta una instrucción individual."""
-        parts = instruction.split()
+        parts = instruction.replace(',', ' ').split()
         opcode = parts[0].lower()
+        args = parts[1:]
+        regs = self.registers
+        fregs = self.float_registers
 
         # Incrementamos el PC por defecto (algunas instrucciones lo modificarán)
         next_pc = self.pc + 4
 
         # Instrucciones aritméticas
-        if opcode == 'add':
-            rd, rs1, rs2 = self._parse_r_type(parts[1:])
-            self.registers[rd] = self.registers[rs1] + self.registers[rs2]
-
-        elif opcode == 'sub':
-            rd, rs1, rs2 = self._parse_r_type(parts[1:])
-            self.registers[rd] = self.registers[rs1] - self.registers[rs2]
-
-        elif opcode == 'addi':
-            rd, rs1, imm = self._parse_i_type(parts[1:])
-            self.registers[rd] = self.registers[rs1] + imm
-
-        # Operaciones lógicas
-        elif opcode == 'and':
-            rd, rs1, rs2 = self._parse_r_type(parts[1:])
-            self.registers[rd] = self.registers[rs1] & self.registers[rs2]
-
-        elif opcode == 'or':
-            rd, rs1, rs2 = self._parse_r_type(parts[1:])
-            self.registers[rd] = self.registers[rs1] | self.registers[rs2]
-
-        elif opcode == 'xor':
-            rd, rs1, rs2 = self._parse_r_type(parts[1:])
-            self.registers[rd] = self.registers[rs1] ^ self.registers[rs2]
+        if opcode in ('add', 'sub', 'mul', 'div', 'rem', 'and', 'or', 'xor', 'slt', 'sltu'):
+            rd, rs1, rs2 = self._parse_r_type(args)
+            a, b = regs[rs1], regs[rs2]
+            if opcode == 'add':
+                regs[rd] = a_int32(a + b)
+            elif opcode == 'sub':
+                regs[rd] = a_int32(a - b)
+            elif opcode == 'mul':
+                regs[rd] = a_int32(a * b)
+            elif opcode == 'div':
+                regs[rd] = -1 if b == 0 else a_int32(division_entera(a, b))
+            elif opcode == 'rem':
+                regs[rd] = a if b == 0 else a_int32(a - b * division_entera(a, b))
+            # Operaciones lógicas
+            elif opcode == 'and':
+                regs[rd] = a & b
+            elif opcode == 'or':
+                regs[rd] = a | b
+            elif opcode == 'xor':
+                regs[rd] = a ^ b
+            elif opcode == 'slt':
+                regs[rd] = int(a < b)
+            elif opcode == 'sltu':
+                regs[rd] = int((a & 0xFFFFFFFF) < (b & 0xFFFFFFFF))
+
+        elif opcode in ('addi', 'andi', 'ori', 'xori', 'slli', 'srli', 'srai', 'sltiu'):
+            rd, rs1, imm = self._parse_i_type(args)
+            a = regs[rs1]
+            if opcode == 'addi':
+                regs[rd] = a_int32(a + imm)
+            elif opcode == 'andi':
+                regs[rd] = a & imm
+            elif opcode == 'ori':
+                regs[rd] = a | imm
+            elif opcode == 'xori':
+                regs[rd] = a ^ imm
+            elif opcode == 'slli':
+                regs[rd] = a_int32(a << imm)
+            elif opcode == 'srli':
+                regs[rd] = (a & 0xFFFFFFFF) >> imm
+            elif opcode == 'srai':
+                regs[rd] = a >> imm
+            elif opcode == 'sltiu':
+                regs[rd] = int((a & 0xFFFFFFFF) < (imm & 0xFFFFFFFF))
 
         # Operaciones de memoria
         elif opcode == 'lw':
-            rd, offset, rs1 = self._parse_load(parts[1:])
-            address = self.registers[rs1] + offset
-            self.registers[rd] = self.memory.get(address, 0)
+            rd, offset, rs1 = self._parse_load(args)
+            address = regs[rs1] + offset
+            regs[rd] = self.memory.get(address, 0)
 
         elif opcode == 'sw':
-            rs2, offset, rs1 = self._parse_store(parts[1:])
-            address = self.registers[rs1] + offset
-            self.memory[address] = self.registers[rs2]
+            rs2, offset, rs1 = self._parse_store(args)
+            address = regs[rs1] + offset
+            self.memory[address] = regs[rs2]
 
-        # Saltos condicionales
-        elif opcode == 'beq':
-            rs1, rs2, label = self._parse_branch(parts[1:])
-            if self.registers[rs1] == self.registers[rs2]:
-                next_pc = self._resolve_label(label)
+        elif opcode == 'flw':
+            offset_base = args[1].split('(')
+            address = regs[self._parse_register(offset_base[1].strip(')'))] + int(offset_base[0])
+            fregs[self._parse_float_register(args[0])] = self.memory.get(address, 0.0)
 
-        elif opcode == 'bne':
-            rs1, rs2, label = self._parse_branch(parts[1:])
-            if self.registers[rs1] != self.registers[rs2]:
-                next_pc = self._resolve_label(label)
+        elif opcode == 'fsw':
+            offset_base = args[1].split('(')
+            address = regs[self._parse_register(offset_base[1].strip(')'))] + int(offset_base[0])
+            self.memory[address] = fregs[self._parse_float_register(args[0])]
 
-        elif opcode == 'blt':
-            rs1, rs2, label = self._parse_branch(parts[1:])
-            if self.registers[rs1] < self.registers[rs2]:
+        # Saltos condicionales
+        elif opcode in ('beq', 'bne', 'blt', 'bge', 'ble', 'bgt'):
+            rs1, rs2, label = self._parse_branch(args)
+            a, b = regs[rs1], regs[rs2]
+            if ((opcode == 'beq' and a == b) or (opcode == 'bne' and a != b)
+                    or (opcode == 'blt' and a < b) or (opcode == 'bge' and a >= b)
+                    or (opcode == 'ble' and a <= b) or (opcode == 'bgt' and a > b)):
                 next_pc = self._resolve_label(label)
 
+        elif opcode in ('beqz', 'bnez'):
+            value = regs[self._parse_register(args[0])]
+            if (value == 0) == (opcode == 'beqz'):
+                next_pc = self._resolve_label(args[1])
+
         # Saltos incondicionales
         elif opcode == 'j' or opcode == 'jal':
             label = parts[1]
@@ -123,28 +247,148 @@ class RiscVSimulator:
                 self.registers[1] = self.pc + 4  # ra = pc + 4
 
         elif opcode == 'jalr':
-            rd, offset, rs1 = self._parse_load(parts[1:])
+            rd, offset, rs1 = self._parse_load(args)
             self.registers[rd] = self.pc + 4
             next_pc = self.registers[rs1] + offset
 
+        elif opcode == 'call':
+            # Las funciones matemáticas se simulan: argumento y resultado en fa0
+            try:
+                fregs[10] = a_float32(FUNCIONES[args[0]](fregs[10]))
+            except ValueError:
+                fregs[10] = math.nan
+
         # Instrucciones especiales
         elif opcode == 'li':
-            rd = self._parse_register(parts[1])
-            imm = int(parts[2])
-            self.registers[rd] = imm
+            rd = self._parse_register(args[0])
+            imm = int(args[1], 0)
+            self.registers[rd] = a_int32(imm)
+
+        elif opcode == 'la':
+            self.registers[self._parse_register(args[0])] = self._resolve_label(args[1])
 
         elif opcode == 'mv':
-            rd = self._parse_register(parts[1])
-            rs = self._parse_register(parts[2])
+            rd = self._parse_register(args[0])
+            rs = self._parse_register(args[1])
             self.registers[rd] = self.registers[rs]
+        elif opcode in ('neg', 'seqz', 'snez'):
+            rd = self._parse_register(args[0])
+            valor = self.registers[self._parse_register(args[1])]
+            if opcode == 'neg':
+                self.registers[rd] = a_int32(-valor)
+            else:
+                self.registers[rd] = int((valor == 0) == (opcode == 'seqz'))
+
+        # Extensión F: punto flotante de precisión simple
+        elif opcode in ('fadd.s', 'fsub.s', 'fmul.s', 'fdiv.s', 'fmin.s', 'fmax.s',
+                        'fsgnj.s', 'fsgnjn.s', 'fsgnjx.s'):
+            fd, fs1, fs2 = (self._parse_float_register(arg) for arg in args[:3])
+            a, b = fregs[fs1], fregs[fs2]
+            if opcode == 'fadd.s':
+                result = a + b
+            elif opcode == 'fsub.s':
+                result = a - b
+            elif opcode == 'fmul.s':
+                result = a * b
+            elif opcode == 'fdiv.s':
+                if b != 0:
+                    result = a / b
+                elif a == 0 or a != a:
+                    result = math.nan
+                else:
+                    result = math.copysign(math.inf, a) * math.copysign(1.0, b)
+            elif opcode == 'fmin.s':
+                result = min(a, b)
+            elif opcode == 'fmax.s':
+                result = max(a, b)
+            elif opcode == 'fsgnj.s':
+                result = math.copysign(a, b)
+            elif opcode == 'fsgnjn.s':
+                result = math.copysign(a, -b)
+            else:
+                result = a * math.copysign(1.0, b)
+            fregs[fd] = a_float32(result)
+
+        elif opcode in ('fmadd.s', 'fmsub.s', 'fnmadd.s', 'fnmsub.s'):
+            fd, fs1, fs2, fs3 = (self._parse_float_register(arg) for arg in args[:4])
+            product = fregs[fs1] * fregs[fs2]
+            if opcode == 'fmadd.s':
+                result = product + fregs[fs3]
+            elif opcode == 'fmsub.s':
+                result = product - fregs[fs3]
+            elif opcode == 'fnmadd.s':
+                result = -product - fregs[fs3]
+            else:
+                result = -product + fregs[fs3]
+            fregs[fd] = a_float32(result)
+
+        elif opcode in ('fmv.s', 'fneg.s', 'fabs.s', 'fsqrt.s'):
+            fd, fs1 = self._parse_float_register(args[0]), self._parse_float_register(args[1])
+            value = fregs[fs1]
+            if opcode == 'fneg.s':
+                value = -value
+            elif opcode == 'fabs.s':
+                value = abs(value)
+            elif opcode == 'fsqrt.s':
+                value = a_float32(math.sqrt(value)) if value >= 0 else math.nan
+            fregs[fd] = value
+
+        elif opcode in ('fmv.s.x', 'fmv.w.x'):
+            bits = self.registers[self._parse_register(args[1])] & 0xFFFFFFFF
+            fregs[self._parse_float_register(args[0])] = struct.unpack('f', struct.pack('I', bits))[0]
+
+        elif opcode in ('fmv.x.s', 'fmv.x.w'):
+            value = fregs[self._parse_float_register(args[1])]
+            self.registers[self._parse_register(args[0])] = struct.unpack('i', struct.pack('f', value))[0]
+
+        elif opcode == 'fcvt.s.w':
+            value = self.registers[self._parse_register(args[1])]
+            fregs[self._parse_float_register(args[0])] = a_float32(float(value))
+
+        elif opcode == 'fcvt.w.s':
+            value = fregs[self._parse_float_register(args[1])]
+            if value != value:
+                result = 2**31 - 1
+            elif math.isinf(value):
+                result = 2**31 - 1 if value > 0 else -2**31
+            else:
+                result = math.trunc(value) if len(args) > 2 and args[2] == 'rtz' else round(value)
+                result = max(-2**31, min(2**31 - 1, result))
+            self.registers[self._parse_register(args[0])] = result
+
+        elif opcode in ('feq.s', 'flt.s', 'fle.s'):
+            rd = self._parse_register(args[0])
+            a = fregs[self._parse_float_register(args[1])]
+            b = fregs[self._parse_float_register(args[2])]
+            if opcode == 'feq.s':
+                self.registers[rd] = int(a == b)
+            elif opcode == 'flt.s':
+                self.registers[rd] = int(a < b)
+            else:
+                self.registers[rd] = int(a <= b)
 
         # Syscalls simplificados
         elif opcode == 'ecall':
+            code = self.registers[17]
             # Si a7 (x17) = 1, imprime el entero en a0 (x10)
-            if self.registers[17] == 1:
-                print(f"Output: {self.registers[10]}")
+            if code == 1:
+                self.output.append(str(self.registers[10]))
+            # 2: flotante en fa0, 4: cadena en la dirección a0, 11: carácter
+            elif code == 2:
+                self.output.append(repr(fregs[10]) if fregs[10] == fregs[10] else 'nan')
+            elif code == 4:
+                self.output.append(self.memory.get(self.registers[10], ''))
+            elif code == 11:
+                self.output.append(chr(self.registers[10]))
+            # 5: leer entero, 6: leer flotante, 12: leer carácter
+            elif code == 5:
+                self.registers[10] = int(self.inputs.pop(0))
+            elif code == 6:
+                fregs[10] = a_float32(float(self.inputs.pop(0)))
+            elif code == 12:
+                self.registers[10] = ord(str(self.inputs.pop(0))[0])
             # Si a7 (x17) = 10, termina el programa
-            elif self.registers[17] == 10:
+            elif code == 10:
                 self.running = False
 
         else:
@@ -159,29 +403,25 @@ class RiscVSimulator:
     def _parse_register(self, reg_str):
         """Convierte una cadena de registro a su índice numérico."""
         reg_str = reg_str.strip(',')
-        if reg_str == 'zero':
-            return 0
-        elif reg_str == 'ra':
-            return 1
-        elif reg_str == 'sp':
-            return 2
-        elif reg_str == 'gp':
-            return 3
-        elif reg_str == 'tp':
-            return 4
-        elif reg_str.startswith('t') and '0' <= reg_str[1] <= '6':
-            return 5 + int(reg_str[1])  # t0-t6: 5-11
-        elif reg_str == 'fp' or reg_str == 's0':
+        if reg_str == 'fp':
             return 8
-        elif reg_str.startswith('s') and '1' <= reg_str[1] <= '11':
-            return 8 + int(reg_str[1])  # s1-s11: 9-19
-        elif reg_str.startswith('a') and '0' <= reg_str[1] <= '7':
-            return 10 + int(reg_str[1])  # a0-a7: 10-17
-        elif reg_str.startswith('x'):
+        elif reg_str in REGISTROS:
+            return REGISTROS.index(reg_str)
+        elif reg_str.startswith('x') and reg_str[1:].isdigit():
             return int(reg_str[1:])
         else:
             raise ValueError(f"Registro no reconocido: {reg_str}")
 
+    def _parse_float_register(self, reg_str):
+        """Convierte una cadena de registro flotante a su índice numérico."""
+        reg_str = reg_str.strip(',')
+        if reg_str in REGISTROS_FLOAT:
+            return REGISTROS_FLOAT.index(reg_str)
+        elif reg_str.startswith('f') and reg_str[1:].isdigit():
+            return int(reg_str[1:])
+        else:
+            raise ValueError(f"Registro flotante no reconocido: {reg_str}")
+
     def _parse_r_type(self, args):
         """Parsea instrucciones tipo R: add rd, rs1, rs2"""
         rd = self._parse_register(args[0])
@@ -193,7 +433,7 @@ class RiscVSimulator:
         """Parsea instrucciones tipo I: addi rd, rs1, imm"""
         rd = self._parse_register(args[0])
         rs1 = self._parse_register(args[1])
-        imm = int(args[2])
+        imm = int(args[2], 0)
         return rd, rs1, imm
 
     def _parse_load(self, args):
@@ -223,6 +463,17 @@ class RiscVSimulator:
         """Resuelve una etiqueta a su dirección correspondiente."""
         if label in self.memory:
             return self.memory[label]
+        # Etiquetas locales: 1f es la siguiente etiqueta 1, 1b la anterior
+        if label[:-1].isdigit() and label[-1] in 'fb':
+            addresses = self.local_labels.get(label[:-1], [])
+            if label[-1] == 'f':
+                candidates = [address for address in addresses if address > self.pc]
+                if candidates:
+                    return min(candidates)
+            else:
+                candidates = [address for address in addresses if address <= self.pc]
+                if candidates:
+                    return max(candidates)
         try:
             # Intenta interpretar como una dirección absoluta
             return int(label)
@@ -257,6 +508,8 @@ def run_riscv_program(program_code):
     simulator = RiscVSimulator()
     simulator.load_program(program_code)
     result = simulator.run()
+    for output in simulator.output:
+        print(f"Output: {output}")
     print(f"\nResultado final (a0): {result}")
     return result
 